@@ -1,19 +1,83 @@
+import time
+
+# 进程开始导入的时刻，用于统计启动耗时（必须在导入 ttkbootstrap 之前记录）
+STARTUP_BEGIN = time.perf_counter()
+
+import sys
+import ipc
+
+# render 子命令只用 Pillow 画图，不需要显示器（见 render.py）
+if __name__ == "__main__" and sys.argv[1:2] == ['render']:
+    import render
+    sys.exit(render.main(sys.argv[2:]))
+
+# 已有小太阳在运行时，只把命令交给它然后退出，不需要导入 Tk/ttkbootstrap
+if __name__ == "__main__":
+    exit_code = ipc.forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
 import ttkbootstrap as ttk
-from PIL import Image, ImageTk
-import json
-import random
-from config_window import ConfigWindow
+from PIL import ImageTk
+import os
+from image_cache import image_cache, resize_high_quality
+from thumbnail_cache import ThumbnailStore
+from file_watcher import FileWatcher
+from scheduler import Scheduler
+from animation import AnimationPlayer, DEFAULT_MAX_PHOTO_BYTES
+from background import executor_for, shutdown_executors
+from motto_store import open_motto_store, ListMottoStore, DEFAULT_QUOTES
+from motto_select import MottoPicker
+from feeds import FeedFetcher, DEFAULT_REFRESH_S
+from slideshow import Slideshow, is_image_collection
+from window_drag import WindowDragger, virtual_desktop
+from tracing import tracer, traced, LoopLagMonitor
+from i18n import TextRegistry
+from text_fit import (
+    TextFitter, MAX_LAYOUT_CACHE, MAX_MEASURE_CACHE,
+    MOTTO_FONT, MOTTO_WIDTH, MOTTO_HEIGHT, MOTTO_WRAPLENGTH, MOTTO_FIT_WIDTH
+)
+from config_store import ConfigStore, CONFIG_PATH
+from theme_manager import ThemeManager
+
+# 箴言库不超过这个条数时，在空闲时预先计算所有箴言的自适应排版
+PRECOMPUTE_LIMIT = 1000
+
+# 影响箴言挑选规则的配置字段（见 motto_select.py）
+MOTTO_RULE_FIELDS = {'motto_mode', 'motto_no_repeat', 'motto_language_filter', 'motto_tags', 'language'}
+
+# 省内存模式（memory_budget）下各缓存的上限：解码后的图片交给 PhotoImage 后即释放，
+# 重新加载时从磁盘缩略图读取
+LOW_MEMORY_PHOTO_BYTES = 2 * 1024 * 1024
+LOW_MEMORY_LAYOUT_CACHE = 256
+LOW_MEMORY_MEASURE_CACHE = 4096
+LOW_MEMORY_PREFETCH = 1
+
+# 启动预算：从开始导入到首次绘制完成的目标耗时（毫秒）
+STARTUP_BUDGET_MS = 500
+IMPORTS_DONE = time.perf_counter()
+
+
+def config_diff(old, new):
+    """返回两份配置之间取值不同的字段名集合"""
+    return {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
 
 class Sunshine:
     """
     悬浮在屏幕上的小太阳，给阴雨天在电脑前工作的你带来温暖！
     """
-    def __init__(self):
-        self.load_config()
+    def __init__(self, app, index, config):
+        self.app = app
+        self.index = index
+        self.config = config
+        self._first_painted = False
         
-        # 创建主窗口
-        self.root = ttk.Window(themename=self.config['theme'])
-        self.root.title("Sunshine小太阳")
+        # 创建窗口：每个小太阳是共享根窗口下的一个 Toplevel
+        self.root = ttk.Toplevel(app.root)
+        # 需要翻译的控件都登记到这里，切换语言时只更新这些控件
+        self.texts = TextRegistry(self.config['language'])
+        self.texts.register(self.root, 'title')
         
         # 设置窗口无边框
         self.root.overrideredirect(True)
@@ -29,107 +93,60 @@ class Sunshine:
         # 强制框架保持设定的大小
         self.frame.pack_propagate(False)
         
-        self.load_translations()
-        
+        # 这个窗口的周期任务共用一个调度器，窗口隐藏时一起暂停；
+        # 任务对齐到间隔的整数倍，多个窗口的同类任务仍在同一时刻唤醒
+        self.scheduler = Scheduler(self.root)
+
         self.create_widgets()
-        
-    def load_config(self):
-        try:
-            with open(r'config.json', 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
-        except:
-            self.config = {
-                'theme': 'minty',
-                'image_path': 'pic/sun.png',
-                'window_width': 250,
-                'window_height': 350,
-                'refresh_interval': 120,
-                'font_size': 10
-            }
-    def load_translations(self):
-        """加载语言翻译"""
-        self.translations = {
-            'zh_CN': {
-                'title': 'Sunshine小太阳',
-                'toggle_top': '取消置顶',
-                'toggle_normal': '置顶',
-                'close': '关闭',
-                'settings': '设置'
-            },
-            'en_US': {
-                'title': 'Sunshine',
-                'toggle_top': 'Unpin',
-                'toggle_normal': 'Pin',
-                'close': 'Close',
-                'settings': 'Settings'
-            }
-        }  
+        self.root.bind('<Map>', self.on_map, add='+')
+
+    def on_map(self, event):
+        if event.widget is not self.root or self._first_painted:
+            return
+        self._first_painted = True
+        # 等首次绘制的空闲任务执行完，再处理非必要的工作
+        self.root.after_idle(self.on_first_paint)
+
+    def on_first_paint(self):
+        """窗口首次绘制完成后再加载图片"""
+        self.app.on_first_paint()
+        self.update_image()
+        self.precompute_layouts()
+
+    @traced('create_widgets')
     def create_widgets(self):
         """
         核心 - 创建窗口部件：图片、箴言、按钮
         """
 
         # 1. 图片部分
-        try:
-            # 加载图片并保持原始比例
-            image = Image.open(self.config['image_path'])
-            # 计算缩放比例，保持宽高比
-            aspect_ratio = image.width / image.height
-            # 预留固定空间：50px给按钮区域，10px上边距，
-            # 取消10px按钮区域上边距
-            target_height = min(self.config['window_height'] - 60, 150)  # 70 = 50(按钮) + 10(上) + 10(按钮上)
-            target_width = int(target_height * aspect_ratio)
-            
-            # 如果宽度超出窗口，则以宽度为基准重新计算
-            if target_width > self.config['window_width'] - 20:  # 预留边距
-                target_width = self.config['window_width'] - 20
-                target_height = int(target_width / aspect_ratio)
-                
-            image = image.resize((target_width, target_height))
-            self.photo = ImageTk.PhotoImage(image)
-            
-            # 创建一个固定高度的Frame来显示图片
-            self.image_frame = ttk.Frame(self.frame, width=230, height=target_height + 20)  # 加上上下边距
-            self.image_frame.pack(anchor="center", pady=(10, 10))
-            self.image_frame.pack_propagate(False)  # 保持固定高度
-            
-            # 创建标签显示图片
-            self.label = ttk.Label(
-                self.image_frame,
-                image=self.photo,
-                bootstyle="light"
-            )
-            self.label.pack(anchor="center")
-            # 使用place布局让图片在高度上居中
-            self.label.place(relx=0.5, rely=0.5, anchor="center")
-            
-        except Exception as e:
-            print(f"无法加载图片: {e}")
-            self.image_frame = ttk.Frame(self.frame, width=230, height=75)  # 固定高度
-            self.image_frame.pack(anchor="center", pady=(10, 10))
-            self.image_frame.pack_propagate(False)  # 保持固定高度
-            
-            self.label = ttk.Label(
-                self.image_frame,
-                text="小太阳图片无法加载! \nUnable to load the \nimage of Sunshine!",
-                bootstyle="warning"
-            )
-            self.label.pack(anchor="center")
-            # 使用place布局让图片在高度上居中
-            self.label.place(relx=0.5, rely=0.5, anchor="center")
+        # 先用空白占位完成首次绘制，窗口显示后再加载图片（见 on_first_paint）
+        placeholder_height = min(self.config['window_height'] - 60, 150)
+        self.image_frame = ttk.Frame(self.frame, width=230, height=placeholder_height + 20)  # 加上上下边距
+        self.image_frame.pack(anchor="center", pady=(10, 10))
+        self.image_frame.pack_propagate(False)  # 保持固定高度
+
+        # 创建标签显示图片
+        self.photo = None
+        self.label = ttk.Label(self.image_frame, bootstyle="light")
+        # 使用place布局让图片在高度上居中
+        self.label.place(relx=0.5, rely=0.5, anchor="center")
+
+        max_photo_bytes = LOW_MEMORY_PHOTO_BYTES if self.app.memory_budget else DEFAULT_MAX_PHOTO_BYTES
+        self.animation = AnimationPlayer(self.scheduler, self.label, max_photo_bytes)
+        self._animation_request = 0
+        self._image_request = 0
+        self.slideshow = None
 
         # 2.箴言部分
         # 加载箴言
-        try:
-            with open('mottos.json', 'r', encoding='utf-8') as f:
-                self.quotes = json.load(f)['quotes']
-        except Exception as e:
-            print(f"无法加载箴言文件: {e}")
-            self.quotes = ["可爱的小太阳今天也要为你驱散阴霾！"]
+        self.mottos = None
+        self.picker = None
+        self.load_mottos()
 
         # 创建一个Frame来容纳箴言标签，以实现真正的居中
         remaining_height = self.config['window_height'] - 70  # 减去按钮区域和边距
-        self.mottos_frame = ttk.Frame(self.frame, width=230,height=75)
+        self.mottos_frame = ttk.Frame(self.frame, width=MOTTO_WIDTH, height=MOTTO_HEIGHT)
         # self.mottos_frame.pack(fill='both', expand=True)
         self.mottos_frame.pack(fill='x', expand=False)  # 改为False，防止自动扩展
         self.mottos_frame.pack_propagate(False)  # 保持固定高度
@@ -138,11 +155,11 @@ class Sunshine:
         self.mottos_label = ttk.Label(
             self.mottos_frame,
             text="",
-            wraplength=200,
+            wraplength=MOTTO_WRAPLENGTH,
             justify="center",
             anchor="center",
             bootstyle="info",
-            font=("微软雅黑", self.config['font_size'])
+            font=(MOTTO_FONT, self.config['font_size'])
         )
         # 使用place让文字真正居中
         self.mottos_label.place(relx=0.5, rely=0.5, anchor="center")
@@ -152,129 +169,676 @@ class Sunshine:
         self.button_frame = ttk.Frame(self.frame, height=50)
         self.button_frame.pack(fill='x', pady=(0, 10))
         self.button_frame.pack_propagate(False)  # 保持固定高度
-        lang = self.config.get('language', 'zh_CN')
 
         # 创建按钮，使用bootstrap风格
-        self.toggle_button = ttk.Button(
+        self.toggle_button = self.texts.register(ttk.Button(
             self.button_frame,
-            text=self.translations[lang]['toggle_top'],
             command=self.toggle_topmost,
             bootstyle="warning-outline",
             width=7
-        )
+        ), 'toggle_top')
         self.toggle_button.pack(side='left', padx=3)
         
-        self.close_button = ttk.Button(
+        self.close_button = self.texts.register(ttk.Button(
             self.button_frame,
-            text=self.translations[lang]['close'],
-            command=self.root.quit,
+            command=self.close,
             bootstyle="danger-outline",
             width=5
-        )
+        ), 'close')
         self.close_button.pack(side='left', padx=3)
         
-        self.config_button = ttk.Button(
+        self.config_button = self.texts.register(ttk.Button(
             self.button_frame,
-            text=self.translations[lang]['settings'],
             command=self.open_config,
             bootstyle="secondary-outline",
             width=7
-        )
+        ), 'settings')
         self.config_button.pack(side='right', padx=2)
         
-        # 绑定鼠标事件用于拖动窗口
-        self.label.bind('<Button-1>', self.start_move)
-        self.label.bind('<B1-Motion>', self.on_move)
+        # 绑定鼠标事件用于拖动窗口，松开后保存位置
+        self.dragger = WindowDragger(self.root, on_release=self.save_position)
+        self.dragger.bind(self.label)
         
         # 初始状态设置为置顶
         self.is_topmost = True
         self.root.attributes('-topmost', self.is_topmost)
 
-        # 更新第一条箴言
-        self.update_mottos()
-        
-    def start_move(self, event):
-        self.x = event.x
-        self.y = event.y
-        
-    def on_move(self, event):
-        deltax = event.x - self.x
-        deltay = event.y - self.y
-        x = self.root.winfo_x() + deltax
-        y = self.root.winfo_y() + deltay
-        self.root.geometry(f"+{x}+{y}")
+        # 更新第一条箴言，之后按刷新间隔轮换
+        self.show_random_motto()
+        self.scheduler.add('mottos', self.config['refresh_interval'] * 1000, self.update_mottos)
         
+    @traced('config.save_position')
+    def save_position(self, x, y):
+        """把拖动后的窗口位置写入 config.json 中这个窗口的分节，下次启动时直接恢复"""
+        self.config['window_x'] = x
+        self.config['window_y'] = y
+        self.app.config_store.update(self.index, {'window_x': x, 'window_y': y})
+
     def toggle_topmost(self):
         self.is_topmost = not self.is_topmost
         self.root.attributes('-topmost', self.is_topmost)
-        lang = self.config.get('language', 'zh_CN')
-        self.toggle_button.configure(
-            text=self.translations[lang]['toggle_top'] if self.is_topmost else self.translations[lang]['toggle_normal'],
-            bootstyle="warning-outline" if self.is_topmost else "info-outline"
-        )
+        self.texts.register(self.toggle_button, 'toggle_top' if self.is_topmost else 'toggle_normal')
+        self.toggle_button.configure(bootstyle="warning-outline" if self.is_topmost else "info-outline")
         
     def open_config(self):
-        def on_config_save(new_config):
-            # 保存当前窗口位置
-            current_x = self.root.winfo_x()
-            current_y = self.root.winfo_y()
-            
-            self.config = new_config
-            # 更新主题
-            ttk.Style().theme_use(new_config['theme'])
-            
-            # 更新窗口大小
+        # 大多数时候不会打开设置，配置窗口在第一次使用时才导入
+        from config_window import ConfigWindow
+        config_window = ConfigWindow(
+            parent=self.root,
+            callback=self.apply_config,
+            instance=self.index,
+            store=self.app.config_store,
+            theme_manager=self.app.theme_manager,
+            replace_motto_file=self.app.replace_motto_file
+        )
+
+    def close(self):
+        """关闭这个窗口，最后一个窗口关闭时退出程序"""
+        self.app.close_widget(self)
+
+    def destroy(self):
+        # 丢弃仍在后台解码的图片和动图，停止这个窗口的所有定时任务
+        self._image_request += 1
+        self._animation_request += 1
+        self.app.executor.cancel(('image', self.index))
+        self.app.executor.cancel(('frames', self.index))
+        if self.slideshow is not None:
+            self.slideshow.stop()
+        self.animation.stop()
+        self.scheduler.stop()
+        self.app.release_mottos(self.mottos_path, self)
+        self.root.destroy()
+
+    @traced('apply_config')
+    def apply_config(self, new_config):
+        """
+        增量应用配置：只更新发生变化的字段所影响的控件
+        """
+        changed = config_diff(self.config, new_config)
+        if not changed:
+            return
+        self.config = new_config
+        size_changed = bool(changed & {'window_width', 'window_height'})
+
+        # 更新主题（所有窗口共用）
+        if 'theme' in changed:
+            self.app.use_theme(new_config['theme'])
+
+        # 更新窗口大小
+        if size_changed:
             self.frame.configure(width=new_config['window_width'], height=new_config['window_height'])
-             # 更新语言
-            lang = new_config.get('language', 'zh_CN')
-            self.root.title(self.translations[lang]['title'])
-            self.toggle_button.configure(text=self.translations[lang]['toggle_top'])
-            self.close_button.configure(text=self.translations[lang]['close'])
-            self.config_button.configure(text=self.translations[lang]['settings'])
-        
-            # 更新图片
+
+        # 更新语言
+        if 'language' in changed:
+            self.texts.set_language(new_config['language'])
+
+        # 更新图片
+        if size_changed or changed & {'image_path', 'slideshow_interval', 'slideshow_shuffle'}:
+            self.update_image()
+
+        # 更新箴言刷新间隔，原有的定时任务被替换而不是叠加
+        if 'refresh_interval' in changed:
+            self.scheduler.reschedule('mottos', new_config['refresh_interval'] * 1000)
+
+        # 更新箴言库
+        if 'mottos_path' in changed:
+            self.load_mottos()
+        elif changed & MOTTO_RULE_FIELDS:
+            self.picker.configure(**self.picker_options())
+
+        # 更新字体大小：自适应时按当前箴言重新排版，否则使用固定字号
+        if 'auto_fit_font' in changed:
+            self.show_motto(self.mottos_label.cget('text'))
+            self.precompute_layouts()
+        elif 'font_size' in changed and not new_config['auto_fit_font']:
+            self.mottos_label.configure(font=(MOTTO_FONT, new_config['font_size']))
+
+        if size_changed and self.dragger.position is not None:
+            # 使用记录的位置重新设置窗口位置
+            self.dragger.move_to(*self.dragger.position)
+
+    def load_mottos(self):
+        """打开 mottos_path 对应的箴言库，使用同一文件的窗口共用一个箴言库"""
+        if self.mottos is not None:
+            self.app.release_mottos(self.mottos_path, self)
+        self.mottos_path = self.config['mottos_path']
+        self.on_mottos_reloaded(self.app.acquire_mottos(self.mottos_path, self))
+
+    def on_mottos_reloaded(self, mottos, show=False):
+        """换用新的箴言库；show 为 True 时（箴言库刚打开，之前显示的是默认箴言）立即换一条"""
+        self.mottos = mottos
+        if self.picker is None:
+            self.picker = MottoPicker(mottos, **self.picker_options())
+        else:
+            self.picker.set_store(mottos)
+            self.picker.configure(**self.picker_options())
+        if show:
+            self.show_random_motto()
+        if self._first_painted:
+            self.precompute_layouts()
+
+    def precompute_layouts(self):
+        """自适应字号时，在空闲时预先计算箴言库中每条箴言的排版，轮换时只需查表"""
+        if not self.config['auto_fit_font'] or len(self.mottos) > PRECOMPUTE_LIMIT:
+            return
+        self.app.fitter.precompute(self.mottos.get(i) for i in range(len(self.mottos)))
+
+    def update_image(self):
+        """按当前配置显示图片、动图或幻灯片"""
+        self.start_slideshow()
+        self._image_request += 1
+        if not is_image_collection(self.config['image_path']):
             try:
-                image = Image.open(new_config['image_path'])
-                # 计算缩放比例，保持宽高比
-                aspect_ratio = image.width / image.height
-                target_height = min(new_config['window_height'] - 70, 150)  # 70 = 50(按钮) + 10(上) + 10(按钮上)
-                target_width = int(target_height * aspect_ratio)
-                
-                # 如果宽度超出窗口，则以宽度为基准重新计算
-                if target_width > new_config['window_width'] - 20:  # 预留边距
-                    target_width = new_config['window_width'] - 20
-                    target_height = int(target_width / aspect_ratio)
-                    
-                image = image.resize((target_width, target_height))
-                self.photo = ImageTk.PhotoImage(image)
-                self.label.configure(image=self.photo)
+                # 已有高质量图片或图像金字塔时立即显示预览，高质量的结果在后台生成后再替换；
+                # 都没有时（如冷启动）先留空，原图的解码也放到后台
+                image, final = image_cache.load_preview(
+                    self.config['image_path'],
+                    self.config['window_width'],
+                    self.config['window_height'],
+                    decode=False
+                )
             except Exception as e:
-                print(f"无法加载图片: {e}")
-            
-            # 更新字体大小
-            self.mottos_label.configure(font=("微软雅黑", new_config['font_size']))
-            
-            # 使用保存的位置重新设置窗口位置
-            self.root.geometry(f'+{current_x}+{current_y}')
-            
-        config_window = ConfigWindow(parent=self.root, callback=on_config_save)
+                self.show_image_error(e)
+            else:
+                if image is None:
+                    self.show_placeholder()
+                    self.preview_image(self._image_request)
+                else:
+                    self.show_image(image)
+                    if not final:
+                        self.refine_image(self._image_request)
+        self.start_animation()
+
+    def preview_image(self, request):
+        """在后台解码原图并生成预览，显示后再生成高质量的图片"""
+        def on_preview(result, error):
+            if request != self._image_request or self.animation.playing:
+                return
+            if error is not None:
+                self.show_image_error(error)
+                return
+            image, final = result
+            self.show_image(image)
+            if not final:
+                self.refine_image(request)
+
+        self.app.executor.submit(
+            image_cache.load_preview,
+            self.config['image_path'],
+            self.config['window_width'],
+            self.config['window_height'],
+            callback=on_preview,
+            key=('image', self.index)
+        )
+
+    def refine_image(self, request):
+        """
+        在后台用 LANCZOS 重新缩放当前图片，完成后替换预览；
+        开启了 image_processes 时在子进程中缩放，结果再放入主进程的缓存
+        """
+        executor = self.app.executor
+        path = self.config['image_path']
+        width = self.config['window_width']
+        height = self.config['window_height']
+        in_process = executor.has_processes
+
+        def on_refined(result, error):
+            # 缩放期间图片或窗口大小已被修改，或动图已经开始播放
+            if request != self._image_request or self.animation.playing:
+                return
+            if error is not None:
+                print(f"无法加载图片: {error}")
+                return
+            if in_process:
+                executor.submit(image_cache.put, path, width, height, result)
+                result = result[2]
+            self.show_image(result)
+
+        # 同一个窗口只保留最新的请求，连续预览时较早的缩放不再执行
+        executor.submit(
+            resize_high_quality if in_process else image_cache.load,
+            path, width, height,
+            callback=on_refined,
+            key=('image', self.index),
+            process=in_process
+        )
+
+    def show_placeholder(self):
+        """图片还在后台解码时先不显示图片"""
+        self.photo = None
+        self.label.configure(image='', text='', bootstyle="light")
 
+    def show_image_error(self, error):
+        print(f"无法加载图片: {error}")
+        self.photo = None
+        self.image_frame.configure(height=75)  # 固定高度
+        self.label.configure(
+            image='',
+            text=self.texts.text('image_error'),
+            bootstyle="warning"
+        )
+
+    def show_image(self, image):
+        """显示一张已缩放好的图片，图片框高度随图片调整"""
+        self.photo = ImageTk.PhotoImage(image)
+        self.image_frame.configure(height=image.height + 20)  # 加上上下边距
+        self.label.configure(image=self.photo, text='', bootstyle="light")
+
+    def start_slideshow(self):
+        """
+        image_path 为文件夹或通配符时，按 slideshow_interval 轮流显示其中的图片
+        """
+        if self.slideshow is not None:
+            self.slideshow.stop()
+            self.slideshow = None
+        if not is_image_collection(self.config['image_path']):
+            return
+        prefetch = self.config['slideshow_prefetch']
+        if self.app.memory_budget:
+            prefetch = min(prefetch, LOW_MEMORY_PREFETCH)
+        self.slideshow = Slideshow(
+            self.scheduler,
+            self.config['image_path'],
+            (self.config['window_width'], self.config['window_height']),
+            self.show_slide,
+            self.config['slideshow_interval'],
+            prefetch=prefetch,
+            shuffle=self.config['slideshow_shuffle']
+        )
+        self.slideshow.start()
+
+    def show_slide(self, path, image):
+        self.show_image(image)
+
+    def start_animation(self):
+        """
+        如果当前图片是动图，在后台解码并缩放所有帧，完成后开始播放；
+        是否为动图也在后台判断，静态图片的结果为 None
+        """
+        self.animation.stop()
+        self._animation_request += 1
+        request = self._animation_request
+        if is_image_collection(self.config['image_path']):
+            return
+
+        def on_frames_loaded(frames, error):
+            # 解码期间图片或窗口大小已被修改，丢弃过期的结果
+            if request != self._animation_request:
+                return
+            if error is not None:
+                print(f"无法加载动图: {error}")
+                return
+            if frames is not None:
+                self.animation.play(frames)
+
+        self.app.executor.submit(
+            image_cache.load_animation,
+            self.config['image_path'],
+            self.config['window_width'],
+            self.config['window_height'],
+            callback=on_frames_loaded,
+            key=('frames', self.index)
+        )
+
+    @traced('update_mottos')
     def update_mottos(self):
         """更新箴言显示"""
-        random_quote = random.choice(self.quotes)
-        self.mottos_label.configure(text=random_quote)
-        # 使用配置中的刷新间隔
-        self.root.after(self.config['refresh_interval'] * 1000, self.update_mottos)
+        self.show_random_motto()
         
+    def picker_options(self):
+        return {
+            'mode': self.config['motto_mode'],
+            'no_repeat': self.config['motto_no_repeat'],
+            'language': self.config['language'] if self.config['motto_language_filter'] else None,
+            'tags': self.config['motto_tags'],
+        }
+
+    def show_random_motto(self):
+        self.show_motto(self.picker.next())
+
+    def show_motto(self, quote):
+        if self.config['auto_fit_font']:
+            size, wraplength = self.app.fitter.fit(quote)
+        else:
+            size, wraplength = self.config['font_size'], MOTTO_WRAPLENGTH
+        self.mottos_label.configure(text=quote, font=(MOTTO_FONT, size), wraplength=wraplength)
+
+    def place_window(self):
+        """恢复保存的位置；没有保存过位置时居中显示，多个窗口依次向右错开"""
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
+        x = self.config['window_x']
+        y = self.config['window_y']
+        if x is None or y is None:
+            # 将窗口放置在屏幕中央
+            x = (screen_width // 2) - (self.config['window_width'] // 2)
+            x += self.index * (self.config['window_width'] + 10)
+            y = (screen_height // 2) - (self.config['window_height'] // 2)
+        # 分辨率变小或显示器被拔掉时保证窗口仍在桌面内；按所有显示器组成的虚拟桌面计算，
+        # 放在副显示器上（包括坐标为负数的左边、上边的显示器）的窗口不会被拉回主显示器
+        left, top, desktop_width, desktop_height = virtual_desktop(self.root)
+        x = max(left, min(x, left + desktop_width - self.config['window_width']))
+        y = max(top, min(y, top + desktop_height - self.config['window_height']))
+        self.dragger.move_to(x, y)
+
+
+class SunshineApp:
+    """
+    在一个进程中运行一个或多个小太阳。
+
+    每个窗口是同一个隐藏根窗口下的 Toplevel，在 config.json 中有自己的配置分节（见 instances.py）；
+    Tk 解释器、主题样式、图片缓存、箴言库、文字测量缓存和文件监视器都只有一份，
+    多开一个窗口只增加它自己的控件和定时任务。
+    """
+    def __init__(self, startup_timing=False, memory_budget=False):
+        self.startup_timing = startup_timing
+        self._first_painted = False
+        # config.json 只在这里解析一次，主窗口和设置窗口共用
+        self.config_store = ConfigStore(CONFIG_PATH)
+        self.config_store.subscribe(self.on_config_changed)
+        self.config_store.subscribe(self.on_image_budget_changed, fields={'image_cache_mb', 'memory_budget'})
+        shared = self.config_store.instance(0)
+        # 省内存模式适合长时间挂在桌面上：命令行参数或配置中开启，其他缓存的上限在启动时确定
+        self.memory_budget = memory_budget or shared['memory_budget']
+        self.on_image_budget_changed(None)
+        # 缩放好的图片同时保存到磁盘，下次启动时不必再解码原图；设为 0 时不使用
+        thumbnail_mb = shared['thumbnail_cache_mb']
+        if thumbnail_mb > 0:
+            image_cache.thumbnails = ThumbnailStore(max_bytes=thumbnail_mb * 1024 * 1024)
+
+        # 根窗口不显示，只负责 Tk 解释器和主题样式
+        self.root = ttk.Window(themename=shared['theme'])
+        self.root.withdraw()
+        # 所有主题切换都经过这里；省内存模式下不预构建其他主题
+        self.theme_manager = ThemeManager(self.root, shared['theme'], prewarm=not self.memory_budget)
+
+        # 读文件、解码图片等可能阻塞的工作都交给执行器，结果在 Tk 线程中回调（见 background.py）
+        self.executor = executor_for(self.root)
+        self.executor.set_process_workers(shared['image_processes'])
+        self.config_store.subscribe(
+            lambda changes: self.executor.set_process_workers(self.config_store.instance(0)['image_processes']),
+            fields={'image_processes'}
+        )
+
+        # 根窗口的调度器只运行共享任务（如文件轮询），根窗口不会显示，因此不会被暂停
+        self.scheduler = Scheduler(self.root)
+
+        # 监视配置文件和箴言文件，外部修改后无需重启即可生效（首次绘制后才开始）
+        self.watcher = FileWatcher(self.scheduler, shared['watch_interval'] * 1000)
+        self.watcher.watch(CONFIG_PATH, self.reload_config)
+
+        # 接收之后启动的 Sunshine.py 发来的命令（见 ipc.py）；已有实例在监听时不再重复监听
+        self.server = ipc.CommandServer(self.scheduler, self.handle_command)
+        if not self.server.start():
+            self.server = None
+
+        # 自适应字号时，为每条箴言选择能放进箴言区域的最大字号
+        self.fitter = TextFitter(
+            self.root, MOTTO_FONT, MOTTO_FIT_WIDTH, MOTTO_HEIGHT,
+            max_layouts=LOW_MEMORY_LAYOUT_CACHE if self.memory_budget else MAX_LAYOUT_CACHE,
+            max_measures=LOW_MEMORY_MEASURE_CACHE if self.memory_budget else MAX_MEASURE_CACHE
+        )
+        # 箴言文件的绝对路径 -> [箴言库, 使用它的窗口, 箴言源拉取器]
+        self._mottos = {}
+        # 正在后台第一次打开的箴言库，期间窗口显示默认箴言
+        self._opening_mottos = set()
+
+        # 分节序号 -> 窗口；被关闭的窗口不会在重新加载配置时再次打开
+        self._instance_count = self.config_store.instance_count()
+        self.widgets = {
+            index: Sunshine(self, index, self.config_store.instance(index))
+            for index in range(self._instance_count)
+        }
+        self.constructed_at = time.perf_counter()
+
+    def on_first_paint(self):
+        """第一个窗口首次绘制完成：报告启动耗时，然后开始监视文件"""
+        if self._first_painted:
+            return
+        self._first_painted = True
+        if self.startup_timing:
+            self.report_startup(time.perf_counter())
+        self.watcher.start()
+        # 箴言源在首次绘制后才开始拉取，启动时只使用 mottos.json 中的箴言
+        for entry in self._mottos.values():
+            if entry[2] is not None:
+                entry[2].start()
+
+    def report_startup(self, painted_at):
+        imports_ms = (IMPORTS_DONE - STARTUP_BEGIN) * 1000
+        construct_ms = (self.constructed_at - IMPORTS_DONE) * 1000
+        total_ms = (painted_at - STARTUP_BEGIN) * 1000
+        print(
+            f"启动耗时 Startup: 导入 imports {imports_ms:.0f}ms, "
+            f"构建窗口 construct {construct_ms:.0f}ms, "
+            f"首次绘制 first paint {total_ms:.0f}ms (预算 budget {STARTUP_BUDGET_MS}ms)"
+        )
+        if total_ms > STARTUP_BUDGET_MS:
+            print("警告：启动耗时超出预算 Warning: startup exceeded its budget")
+
+    @traced('config.changed')
+    def on_config_changed(self, changes):
+        """每个窗口只应用自己发生变化的字段；分节被删除时关闭窗口，新增分节时打开新窗口"""
+        count = self.config_store.instance_count()
+        for index in changes:
+            widget = self.widgets.get(index)
+            if widget is None:
+                continue
+            if index < count:
+                widget.apply_config(self.config_store.instance(index))
+            else:
+                self.close_widget(widget)
+        for index in range(self._instance_count, count):
+            widget = Sunshine(self, index, self.config_store.instance(index))
+            self.widgets[index] = widget
+            widget.place_window()
+        self._instance_count = count
+
+    def on_image_budget_changed(self, changes):
+        shared = self.config_store.instance(0)
+        if self.memory_budget or shared['memory_budget']:
+            # 图片转换为 PhotoImage 后不再保留解码后的原图
+            image_cache.set_budget(0, keep_last=False)
+        else:
+            image_cache.set_budget(shared['image_cache_mb'] * 1024 * 1024)
+
+    def use_theme(self, theme):
+        """主题样式由所有窗口共用，主题没有变化时不重复应用"""
+        self.theme_manager.use(theme)
+
+    def reload_config(self):
+        """在后台读取 config.json，读取期间文件再次变化时只应用最后一次读到的内容"""
+        def on_read(text, error):
+            if error is not None:
+                # 文件可能正在被写入，等下一次变化再读取
+                print(f"无法重新加载配置: {error}")
+                return
+            self.config_store.reload(text)
+
+        self.executor.submit(self.config_store.read_text, callback=on_read, key='config')
+
+    def acquire_mottos(self, path, widget):
+        """
+        打开箴言库：mottos_path 可以是 mottos.json，也可以是每行一条的大型 .txt / .jsonl 箴言库；
+        已被其他窗口打开的文件直接共用。
+        新的箴言库在后台打开（大型箴言库第一次使用时还要建索引），期间先用空的箴言库占位，
+        打开后各窗口立即换上箴言库中的一条
+        """
+        key = os.path.abspath(path)
+        entry = self._mottos.get(key)
+        if entry is None:
+            entry = self._mottos[key] = [None, set(), None]
+            self._set_store(entry, key, ListMottoStore([]))
+            self._opening_mottos.add(key)
+            self.reload_mottos(key)
+            # 箴言文件被修改后只重新加载箴言库，不影响图片和主题
+            self.watcher.watch(key, lambda: self.reload_mottos(key))
+        entry[1].add(widget)
+        return entry[0]
+
+    def release_mottos(self, path, widget):
+        """窗口不再使用某个箴言库，没有窗口使用时关闭它"""
+        key = os.path.abspath(path)
+        entry = self._mottos.get(key)
+        if entry is None:
+            return
+        entry[1].discard(widget)
+        if not entry[1]:
+            self.executor.cancel(('mottos', key))
+            self._opening_mottos.discard(key)
+            self._set_store(entry, key, None)
+            del self._mottos[key]
+            self.watcher.unwatch(key)
+
+    def reload_mottos(self, key):
+        """在后台重新打开箴言库，完成后替换；箴言库被关闭或再次重新加载时丢弃打开的结果"""
+        if key not in self._mottos:
+            return
+
+        def on_opened(store, error):
+            entry = self._mottos[key]
+            self._set_store(entry, key, store)
+            opening = key in self._opening_mottos
+            self._opening_mottos.discard(key)
+            for widget in entry[1]:
+                widget.on_mottos_reloaded(store, show=opening)
+
+        self.executor.submit(
+            self._open_mottos, key,
+            callback=on_opened,
+            key=('mottos', key),
+            cleanup=lambda store: store.close()
+        )
+
+    def replace_motto_file(self, temp_path, path):
+        """
+        用箴言管理写好的临时文件替换箴言文件。Windows 上不能替换仍被 mmap 映射的文件：
+        先让使用它的窗口暂时改用一个空的箴言库并关闭映射，替换后在后台重新打开
+        """
+        key = os.path.abspath(path)
+        entry = self._mottos.get(key)
+        if entry is None or not entry[0].holds_file:
+            os.replace(temp_path, path)
+            return
+        placeholder = ListMottoStore([])
+        self._set_store(entry, key, placeholder)
+        for widget in entry[1]:
+            widget.on_mottos_reloaded(placeholder)
+        try:
+            os.replace(temp_path, path)
+        finally:
+            self.reload_mottos(key)
+
+    def _set_store(self, entry, key, store):
+        """替换箴言库，同时停止旧箴言库的箴言源拉取，为新箴言库拉取它列出的箴言源"""
+        if entry[2] is not None:
+            entry[2].stop()
+            entry[2] = None
+        if entry[0] is not None:
+            entry[0].close()
+        entry[0] = store
+        if store is not None and store.feeds:
+            entry[2] = FeedFetcher(
+                self.scheduler,
+                store,
+                store.feeds,
+                store.feed_refresh or DEFAULT_REFRESH_S,
+                task_name=f'feeds:{key}'
+            )
+            if self._first_painted:
+                entry[2].start()
+
+    def _open_mottos(self, path):
+        try:
+            return open_motto_store(path)
+        except Exception as e:
+            print(f"无法加载箴言文件: {e}")
+            return ListMottoStore(DEFAULT_QUOTES)
+
+    def handle_command(self, request):
+        """处理另一个进程发来的控制命令，返回错误信息或 None"""
+        instance = request.get('instance')
+        if instance is None:
+            widgets = list(self.widgets.values())
+        elif instance in self.widgets:
+            widgets = [self.widgets[instance]]
+        else:
+            return f"没有第 {instance} 个窗口 No widget {instance}"
+        for command in request['commands']:
+            if command == 'show':
+                for widget in widgets:
+                    widget.root.deiconify()
+                    widget.root.lift()
+            elif command == 'reload':
+                self.reload_config()
+                for key in list(self._mottos):
+                    self.reload_mottos(key)
+            elif command == 'next':
+                for widget in widgets:
+                    widget.show_random_motto()
+            elif command == 'show-motto':
+                for widget in widgets:
+                    widget.show_motto(request['text'])
+                    # 从现在开始重新计时，保证推送的箴言显示完整的刷新间隔
+                    interval_ms = widget.config['refresh_interval'] * 1000
+                    widget.scheduler.add_once('mottos', interval_ms, widget.update_mottos)
+            elif command == 'open-settings':
+                # 设置窗口是模态的，只为第一个窗口打开
+                if widgets:
+                    widgets[0].open_config()
+            else:
+                return f"未知命令 Unknown command: {command}"
+        return None
+
+    def close_widget(self, widget):
+        widget.destroy()
+        self.widgets.pop(widget.index, None)
+        if not self.widgets:
+            self.root.quit()
+
     def run(self):
-        # 将窗口放置在屏幕中央
         self.root.update_idletasks()
-        x = (self.root.winfo_screenwidth() // 2) - (self.config['window_width'] // 2)
-        y = (self.root.winfo_screenheight() // 2) - (self.config['window_height'] // 2)
-        self.root.geometry(f'+{x}+{y}')
-        
-        self.root.mainloop()
+        for widget in self.widgets.values():
+            widget.place_window()
+        try:
+            self.root.mainloop()
+        finally:
+            if self.server is not None:
+                self.server.close()
+            shutdown_executors(self.root)
+            self.config_store.flush()
+
+def parse_args(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Sunshine小太阳")
+    parser.add_argument(
+        '--startup-timing',
+        action='store_true',
+        default=bool(os.environ.get('SUNSHINE_STARTUP_TIMING')),
+        help="打印启动各阶段耗时 Print startup timings"
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='PATH',
+        default=os.environ.get('SUNSHINE_TRACE'),
+        help="记录热点路径耗时：.json 为 Chrome trace，其他为滚动日志 "
+             "Record hot-path timings (.json: Chrome trace, otherwise a rolling log)"
+    )
+    parser.add_argument(
+        '--memory-budget',
+        action='store_true',
+        help="省内存模式：不保留解码后的图片，缩小各缓存 "
+             "Low-memory mode: keep no decoded images and use smaller caches"
+    )
+    ipc.add_arguments(parser)
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    app = Sunshine()
+    args = parse_args(sys.argv[1:])
+    if args.trace:
+        tracer.start(args.trace)
+    app = SunshineApp(startup_timing=args.startup_timing, memory_budget=args.memory_budget)
+    if args.trace:
+        LoopLagMonitor(app.root).start()
     app.run()
@@ -0,0 +1,105 @@
+from bisect import bisect_right
+from collections import OrderedDict
+import time
+
+from PIL import ImageTk
+
+from image_cache import unpack_frame
+
+
+# 同时保留的 PhotoImage 总大小上限，超出后按环形缓冲区按需创建
+DEFAULT_MAX_PHOTO_BYTES = 8 * 1024 * 1024
+
+
+class AnimationPlayer:
+    """
+    在一个 Label 上播放动图。
+
+    帧已预先解码并缩放好（很长的动图各帧压缩保存，见 image_cache.PackedFrame），
+    PhotoImage 只为最近播放的几帧保留，按需创建。播放由共享调度器中的一个任务驱动：
+    每次触发时按真实经过的时间选择当前帧，事件循环繁忙时直接跳帧而不会越播越慢；
+    窗口隐藏时调度器暂停，显示后从暂停的位置继续，静态图片不占用任何定时器。
+    """
+    def __init__(self, scheduler, label, max_photo_bytes=DEFAULT_MAX_PHOTO_BYTES, task_name='animation'):
+        self.scheduler = scheduler
+        self.label = label
+        self.max_photo_bytes = max_photo_bytes
+        self.task_name = task_name
+        self.frames = []
+        # 每一帧结束时刻（毫秒），用于按经过时间二分查找当前帧
+        self._frame_ends = []
+        self._total_duration = 0
+        self._photos = OrderedDict()
+        self._ring_size = 0
+        self._started_at = 0.0
+        self._paused_at = None
+        self._current_index = -1
+
+        root = scheduler.root
+        root.bind('<Unmap>', self._on_unmap, add='+')
+        root.bind('<Map>', self._on_map, add='+')
+
+    @property
+    def playing(self):
+        return bool(self.frames)
+
+    def play(self, frames):
+        """开始播放 [(image, duration_ms), ...]，单帧图片不会启动定时器"""
+        self.stop()
+        if len(frames) < 2:
+            return
+        self.frames = frames
+        end = 0
+        for _, duration in frames:
+            end += duration
+            self._frame_ends.append(end)
+        self._total_duration = end
+
+        frame_bytes = frames[0][0].width * frames[0][0].height * 4
+        self._ring_size = max(2, self.max_photo_bytes // max(frame_bytes, 1))
+
+        self._started_at = time.monotonic()
+        if self.scheduler.paused:
+            self._paused_at = self._started_at
+        self.scheduler.add_once(self.task_name, 0, self._tick)
+
+    def stop(self):
+        self.scheduler.cancel(self.task_name)
+        self.frames = []
+        self._frame_ends = []
+        self._total_duration = 0
+        self._photos.clear()
+        self._paused_at = None
+        self._current_index = -1
+
+    def _photo(self, index):
+        photo = self._photos.get(index)
+        if photo is None:
+            photo = ImageTk.PhotoImage(unpack_frame(self.frames[index][0]))
+            self._photos[index] = photo
+            if len(self._photos) > self._ring_size:
+                self._photos.popitem(last=False)
+        else:
+            self._photos.move_to_end(index)
+        return photo
+
+    def _tick(self):
+        elapsed = int((time.monotonic() - self._started_at) * 1000) % self._total_duration
+        index = bisect_right(self._frame_ends, elapsed)
+        if index != self._current_index:
+            self._current_index = index
+            self.label.configure(image=self._photo(index))
+        # 在当前帧结束时刻再次触发，而不是固定地等待一个帧时长
+        return max(self._frame_ends[index] - elapsed, 1)
+
+    def _on_unmap(self, event):
+        if event.widget is not self.scheduler.root or not self.frames or self._paused_at is not None:
+            return
+        self._paused_at = time.monotonic()
+
+    def _on_map(self, event):
+        if event.widget is not self.scheduler.root or not self.frames or self._paused_at is None:
+            return
+        # 从暂停的位置继续播放
+        self._started_at += time.monotonic() - self._paused_at
+        self._paused_at = None
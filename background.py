@@ -0,0 +1,238 @@
+"""
+Tk 线程与后台任务之间的桥梁。
+
+Tk 控件只能在主线程中操作，所有可能阻塞的工作（读文件、解析箴言库、解码和缩放图片、拉取箴言源）
+都交给 BackgroundExecutor：任务在线程池（或可选的进程池）中执行，结果放入队列，
+由 root.after 在 Tk 线程中取出并调用回调；轮询只在有任务未完成期间进行，空闲时没有任何定时器。
+
+同一个 key 的新任务会取消旧任务：尚未开始的直接丢弃，已在执行的结果不再回调，
+例如连续预览配置时只有最后一次的图片会显示出来。
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import time
+import traceback
+import weakref
+
+from tracing import tracer
+
+
+# 后台任务完成后，Tk 线程检查结果的间隔（毫秒）
+POLL_INTERVAL_MS = 30
+
+# 同时执行的任务数上限，超出的任务按提交顺序排队
+DEFAULT_MAX_WORKERS = 4
+
+# 延迟统计保留的样本数
+LATENCY_SAMPLES = 256
+
+# Tk 根窗口 -> {名称: 执行器}
+_executors = weakref.WeakKeyDictionary()
+
+
+class Job:
+    """一个后台任务；cancel() 后不再调用回调，cleanup 用于释放被丢弃的结果（如打开的文件）"""
+    __slots__ = ('func', 'args', 'callback', 'key', 'process', 'cleanup', 'cancelled', 'submitted', 'started')
+
+    def __init__(self, func, args, callback, key, process, cleanup):
+        self.func = func
+        self.args = args
+        self.callback = callback
+        self.key = key
+        self.process = process
+        self.cleanup = cleanup
+        self.cancelled = False
+        self.submitted = time.perf_counter()
+        self.started = None
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class ExecutorMetrics:
+    """任务数、排队深度和延迟（排队等待时间、从提交到回调的总时间）"""
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.max_queue_depth = 0
+        self.wait_ms = deque(maxlen=LATENCY_SAMPLES)
+        self.latency_ms = deque(maxlen=LATENCY_SAMPLES)
+
+    def summary(self):
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'max_queue_depth': self.max_queue_depth,
+            'wait_p50_ms': percentile(self.wait_ms, 50),
+            'latency_p50_ms': percentile(self.latency_ms, 50),
+            'latency_p95_ms': percentile(self.latency_ms, 95),
+        }
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, len(ordered) * p // 100)], 3)
+
+
+class BackgroundExecutor:
+    def __init__(self, root, max_workers=DEFAULT_MAX_WORKERS, process_workers=0):
+        self.root = root
+        self.max_workers = max_workers
+        self.metrics = ExecutorMetrics()
+        self._threads = ThreadPoolExecutor(max_workers, thread_name_prefix='sunshine')
+        self._processes = None
+        self._process_workers = 0
+        self._waiting = deque()
+        self._running = 0
+        # key -> 最新的任务
+        self._latest = {}
+        self._results = queue.SimpleQueue()
+        self._poll_job = None
+        self.set_process_workers(process_workers)
+
+    @property
+    def has_processes(self):
+        return self._process_workers > 0
+
+    @property
+    def queue_depth(self):
+        return len(self._waiting)
+
+    def set_process_workers(self, count):
+        """CPU 密集的图片处理使用的进程数，0 表示全部在线程中执行；进程池在第一次使用时才创建"""
+        if count == self._process_workers:
+            return
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+        self._process_workers = count
+
+    def submit(self, func, *args, callback=None, key=None, process=False, cleanup=None):
+        """
+        在后台执行 func(*args)，完成后在 Tk 线程中调用 callback(result, error)。
+
+        key 相同的旧任务被取消；process 为 True 且开启了进程池时在子进程中执行（func 和参数须可 pickle）
+        """
+        job = Job(func, args, callback, key, process and self.has_processes, cleanup)
+        if key is not None:
+            self.cancel(key)
+            self._latest[key] = job
+        self.metrics.submitted += 1
+        self._waiting.append(job)
+        self._dispatch()
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, len(self._waiting))
+        return job
+
+    def cancel(self, key):
+        """取消 key 对应的任务：还在排队的不会执行，已在执行的结果被丢弃"""
+        job = self._latest.pop(key, None)
+        if job is not None and not job.cancelled:
+            job.cancel()
+            self.metrics.cancelled += 1
+
+    def shutdown(self):
+        for job in self._waiting:
+            job.cancel()
+        self._waiting.clear()
+        self._latest.clear()
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+
+    def _dispatch(self):
+        while self._waiting and self._running < self.max_workers:
+            job = self._waiting.popleft()
+            if job.cancelled:
+                continue
+            self._running += 1
+            job.started = time.perf_counter()
+            self.metrics.wait_ms.append((job.started - job.submitted) * 1000)
+            future = self._pool(job).submit(job.func, *job.args)
+            # 完成回调在工作线程中执行，只把结果放入队列
+            future.add_done_callback(lambda future, job=job: self._results.put((job, future)))
+        if self._running and self._poll_job is None:
+            self._poll_job = self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _pool(self, job):
+        if not job.process:
+            return self._threads
+        if self._processes is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._processes = ProcessPoolExecutor(self._process_workers)
+        return self._processes
+
+    def _poll(self):
+        self._poll_job = None
+        try:
+            while True:
+                try:
+                    job, future = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._running -= 1
+                self._deliver(job, future)
+            self._dispatch()
+        finally:
+            # 即使出错也要继续轮询，否则其余任务的结果要等到下一次 submit 才会送达
+            if self._running and self._poll_job is None:
+                self._poll_job = self.root.after(POLL_INTERVAL_MS, self._poll)
+        if tracer.enabled:
+            tracer.counter('executor', running=self._running, queued=len(self._waiting))
+
+    def _deliver(self, job, future):
+        try:
+            result, error = future.result(), None
+        except Exception as e:
+            result, error = None, e
+        if self._latest.get(job.key) is job:
+            del self._latest[job.key]
+        if job.cancelled:
+            if job.cleanup is not None and error is None:
+                job.cleanup(result)
+            return
+        if error is not None:
+            self.metrics.failed += 1
+        else:
+            self.metrics.completed += 1
+        self.metrics.latency_ms.append((time.perf_counter() - job.submitted) * 1000)
+        if job.callback is not None:
+            # 一个回调出错不影响同一批的其他结果
+            try:
+                job.callback(result, error)
+            except Exception:
+                print(f"后台任务的回调出错: {job.callback!r}")
+                traceback.print_exc()
+
+
+def executor_for(root, name='default', max_workers=DEFAULT_MAX_WORKERS):
+    """
+    root 所在的 Tk 解释器中名为 name 的执行器，第一次使用时创建。
+    可能长时间等待的工作（如联网）使用单独的执行器，不占用读文件、缩放图片的并发名额
+    """
+    tk_root = root.nametowidget('.')
+    executors = _executors.setdefault(tk_root, {})
+    executor = executors.get(name)
+    if executor is None:
+        executor = executors[name] = BackgroundExecutor(tk_root, max_workers)
+    return executor
+
+
+def shutdown_executors(root):
+    """关闭 root 所在解释器的所有执行器（程序退出前调用）"""
+    for executor in _executors.pop(root.nametowidget('.'), {}).values():
+        executor.shutdown()
+
+
+def run_in_background(root, func, callback, *args):
+    """在 root 所在解释器的执行器中执行 func(*args)，完成后在 Tk 线程中调用 callback(result, error)"""
+    return executor_for(root).submit(func, *args, callback=callback)
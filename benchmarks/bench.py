@@ -0,0 +1,308 @@
+"""
+Sunshine 性能基准测试 Benchmark suite
+
+在普通 Linux 机器上无需真实显示器即可运行（自动启动 Xvfb，或使用已有的 DISPLAY）：
+
+    python benchmarks/bench.py                           # 运行全部基准
+    python benchmarks/bench.py --only image,motto        # 只运行不需要 Tk 的基准
+    python benchmarks/bench.py --save-baseline base.json # 保存基线
+    python benchmarks/bench.py --compare base.json       # 与基线比较，退化时返回 1
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# 需要 Tk 显示的基准
+TK_BENCHMARKS = {'startup', 'apply', 'theme'}
+ALL_BENCHMARKS = ['startup', 'apply', 'image', 'motto', 'theme']
+
+# 每个配置字段在预览时来回切换的两个取值
+APPLY_FIELD_VALUES = {
+    'theme': ('sandstone', 'darkly'),
+    'image_path': ('pic/sun.png', 'pic/cat.jpg'),
+    'window_width': (250, 300),
+    'window_height': (310, 360),
+    'refresh_interval': (120, 60),
+    'font_size': (10, 12),
+    'language': ('zh_CN', 'en_US'),
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """把一组耗时（秒）汇总为毫秒统计"""
+    values = sorted(sample * 1000 for sample in samples)
+    return {
+        'n': len(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 0.50),
+        'p90': percentile(values, 0.90),
+        'p99': percentile(values, 0.99),
+        'max': values[-1],
+    }
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def ensure_display():
+    """Linux 上没有 DISPLAY 时启动 Xvfb 虚拟显示，返回 Xvfb 进程（或 None）"""
+    if not sys.platform.startswith('linux') or os.environ.get('DISPLAY'):
+        return None
+    xvfb = shutil.which('Xvfb')
+    if xvfb is None:
+        sys.exit("没有可用的显示，也找不到 Xvfb。No DISPLAY and Xvfb was not found; "
+                 "install Xvfb or run with --only image,motto")
+    display = f':{90 + os.getpid() % 100}'
+    process = subprocess.Popen(
+        [xvfb, display, '-screen', '0', '1920x1080x24', '-nolisten', 'tcp'],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    os.environ['DISPLAY'] = display
+    time.sleep(0.5)
+    return process
+
+
+def child_startup():
+    """子进程：启动 Sunshine，首次绘制时输出一行然后退出"""
+    import Sunshine
+    app = Sunshine.SunshineApp()
+    on_first_paint = app.on_first_paint
+
+    def report_and_quit():
+        print('painted', flush=True)
+        on_first_paint()
+        app.root.after(0, app.root.destroy)
+
+    app.on_first_paint = report_and_quit
+    app.run()
+
+
+def bench_startup(results, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--child', 'startup'],
+            cwd=REPO_ROOT,
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        line = process.stdout.readline()
+        elapsed = time.perf_counter() - start
+        process.wait()
+        if line.strip() != 'painted':
+            raise RuntimeError("启动子进程没有完成首次绘制 startup child did not paint")
+        samples.append(elapsed)
+    results['startup.first_paint'] = summarize(samples)
+
+
+def make_app():
+    import Sunshine
+    app = Sunshine.SunshineApp().widgets[0]
+    app.update_image()
+    app.root.update()
+    return app
+
+
+def bench_apply(results, repeat, app):
+    for field, values in APPLY_FIELD_VALUES.items():
+        samples = []
+        for i in range(repeat):
+            new_config = dict(app.config)
+            new_config[field] = values[i % 2]
+            start = time.perf_counter()
+            app.apply_config(new_config)
+            app.root.update_idletasks()
+            samples.append(time.perf_counter() - start)
+        results[f'apply.{field}'] = summarize(samples)
+
+
+def bench_image(results, repeat):
+    """
+    按窗口实际使用的路径经过 ImageCache 计时：冷启动（预览 + 高质量缩放）、调整窗口大小（复用图像金字塔）、
+    内存命中，以及重启后读取磁盘缩略图
+    """
+    import itertools
+    import tempfile
+    from image_cache import ImageCache
+    from thumbnail_cache import ThumbnailStore
+    pic_dir = os.path.join(REPO_ROOT, 'pic')
+    with tempfile.TemporaryDirectory() as thumbnail_dir:
+        thumbnails = ThumbnailStore(thumbnail_dir)
+        for name in sorted(os.listdir(pic_dir)):
+            path = os.path.join(pic_dir, name)
+
+            def cold():
+                cache = ImageCache()
+                cache.load_preview(path, 250, 310)
+                cache.load(path, 250, 310)
+            results[f'image.{name}.cold'] = summarize(timed(cold, repeat))
+
+            cache = ImageCache()
+            cache.load(path, 250, 310)
+            # 每次同时缩小窗口的宽和高（图片高度最多 150px，窗口高度低于 210 时才有影响），不会命中缩放好的图片
+            sizes = itertools.cycle(zip(range(250, 150, -1), range(209, 109, -1)))
+            results[f'image.{name}.resize'] = summarize(
+                timed(lambda: cache.load(path, *next(sizes)), repeat)
+            )
+            results[f'image.{name}.hit'] = summarize(timed(lambda: cache.load(path, 250, 310), repeat))
+
+            warm = ImageCache()
+            warm.thumbnails = thumbnails
+            warm.load(path, 250, 310)
+
+            def restart():
+                cache = ImageCache()
+                cache.thumbnails = thumbnails
+                cache.load_preview(path, 250, 310, decode=False)
+            results[f'image.{name}.thumbnail'] = summarize(timed(restart, repeat))
+
+
+def bench_motto(results, rotations, app=None):
+    if app is not None:
+        rotate = app.show_random_motto
+    else:
+        # 没有 Tk 时也经过窗口使用的 MottoPicker（权重、过滤和不重复窗口），只是不更新 Label
+        from motto_select import MottoPicker
+        from motto_store import open_motto_store
+        rotate = MottoPicker(open_motto_store(os.path.join(REPO_ROOT, 'mottos.json'))).next
+    # 单次轮换太快，按每批 100 次计时，统计每次轮换的平均耗时
+    batch = 100
+    samples = []
+    for _ in range(max(rotations // batch, 1)):
+        start = time.perf_counter()
+        for _ in range(batch):
+            rotate()
+        samples.append((time.perf_counter() - start) / batch)
+    results['motto.rotation'] = summarize(samples)
+
+
+def bench_theme(results, repeat, app):
+    from config_window import THEMES
+    manager = app.theme_manager
+    # 预构建：与设置窗口打开后空闲时做的相同，记录每个主题的构建耗时
+    for theme in THEMES:
+        manager.build(theme)
+        app.root.update_idletasks()
+    report = manager.report()
+    for theme, ms in report:
+        print(f"theme.build {theme:<12}{ms:>10.2f}ms")
+    switches = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        manager.use(THEMES[i % len(THEMES)])
+        app.root.update_idletasks()
+        switches.append(time.perf_counter() - start)
+    results['theme.build'] = summarize([ms / 1000 for _, ms in report])
+    results['theme.switch'] = summarize(switches)
+
+
+def peak_rss_kb():
+    """本进程和子进程的峰值常驻内存（KB）"""
+    scale = 1024 if sys.platform == 'darwin' else 1  # macOS 上 ru_maxrss 单位为字节
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale,
+    }
+
+
+def print_results(results):
+    print(f"{'benchmark':<32}{'n':>7}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name, stats in results.items():
+        if name == 'peak_rss_kb':
+            continue
+        print(f"{name:<32}{stats['n']:>7}{stats['mean']:>10.3f}{stats['p50']:>10.3f}"
+              f"{stats['p90']:>10.3f}{stats['p99']:>10.3f}{stats['max']:>10.3f}")
+    rss = results['peak_rss_kb']
+    print(f"peak RSS: self {rss['self']} KB, children {rss['children']} KB")
+
+
+def compare(results, baseline, threshold):
+    """按 p50 与基线比较，返回退化的基准列表"""
+    regressions = []
+    for name, stats in results.items():
+        if name == 'peak_rss_kb' or name not in baseline:
+            continue
+        base = baseline[name]['p50']
+        if base > 0 and stats['p50'] > base * (1 + threshold):
+            regressions.append((name, base, stats['p50']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sunshine benchmarks")
+    parser.add_argument('--only', help="逗号分隔的基准 comma separated: " + ','.join(ALL_BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=20, help="每项重复次数 repetitions per benchmark")
+    parser.add_argument('--rotations', type=int, default=10000, help="箴言轮换次数 motto rotations")
+    parser.add_argument('--save-baseline', metavar='PATH', help="保存结果作为基线 save results as baseline")
+    parser.add_argument('--compare', metavar='PATH', help="与基线比较 compare with a baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="允许的 p50 退化比例 allowed p50 slowdown")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    os.chdir(REPO_ROOT)
+    if args.child == 'startup':
+        child_startup()
+        return 0
+
+    selected = args.only.split(',') if args.only else ALL_BENCHMARKS
+    needs_tk = bool(TK_BENCHMARKS & set(selected))
+    xvfb = ensure_display() if needs_tk else None
+    results = {}
+    try:
+        # 已经需要显示时，箴言轮换也走真实的 Label 更新；否则只测挑选箴言本身
+        app = make_app() if needs_tk and {'apply', 'theme', 'motto'} & set(selected) else None
+        if 'startup' in selected:
+            bench_startup(results, max(args.repeat // 4, 3))
+        if 'apply' in selected:
+            bench_apply(results, args.repeat, app)
+        if 'image' in selected:
+            bench_image(results, args.repeat)
+        if 'motto' in selected:
+            bench_motto(results, args.rotations, app)
+        if 'theme' in selected:
+            bench_theme(results, args.repeat, app)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+    results['peak_rss_kb'] = peak_rss_kb()
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, base, current in regressions:
+            print(f"退化 REGRESSION {name}: p50 {base:.3f}ms -> {current:.3f}ms")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Sunshine 长时间运行的内存回归测试 Memory soak test
+
+小太阳通常一挂就是几周，这里反复预览和应用配置、切换主题、轮换箴言、打开再取消设置窗口，
+检查内存是否真正被释放：
+
+    python benchmarks/soak.py                          # 默认 2000 轮
+    python benchmarks/soak.py --cycles 5000 --memory-budget
+
+先预热一轮（每个主题、每种配置都用过一次，各缓存填满），之后用 tracemalloc 统计 Python
+分配的内存，并定期采样 RSS；任何一项增长超过阈值时返回 1。
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from bench import REPO_ROOT, ensure_display
+
+
+# 每一轮中预览并应用的配置字段及其来回切换的取值
+SOAK_FIELD_VALUES = {
+    'image_path': ('pic/sun.png', 'pic/cat.jpg'),
+    'window_width': (250, 300),
+    'window_height': (310, 360),
+    'font_size': (10, 12),
+    'auto_fit_font': (False, True),
+    'language': ('zh_CN', 'en_US'),
+}
+
+# RSS 采样间隔（轮）
+RSS_SAMPLE_EVERY = 100
+
+
+def current_rss_kb():
+    """当前常驻内存（KB）；没有 /proc 的系统上退回到峰值"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        scale = 1024 if sys.platform == 'darwin' else 1
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+
+
+class Soak:
+    def __init__(self, memory_budget, window_every):
+        import Sunshine
+        from config_window import THEMES
+        self.app = Sunshine.SunshineApp(memory_budget=memory_budget)
+        self.widget = self.app.widgets[0]
+        self.themes = THEMES
+        self.window_every = window_every
+        self.widget.update_image()
+        self.app.root.update()
+
+    def cycle(self, i):
+        widget = self.widget
+        for field, values in SOAK_FIELD_VALUES.items():
+            new_config = dict(widget.config)
+            new_config[field] = values[i % 2]
+            widget.apply_config(new_config)
+        self.app.use_theme(self.themes[i % len(self.themes)])
+        widget.show_random_motto()
+        if self.window_every and i % self.window_every == 0:
+            self.preview_and_cancel()
+        self.app.root.update()
+
+    def preview_and_cancel(self):
+        from config_window import ConfigWindow
+        config_window = ConfigWindow(
+            parent=self.widget.root,
+            callback=self.widget.apply_config,
+            instance=self.widget.index,
+            store=self.app.config_store
+        )
+        config_window.save_config(preview=True)
+        config_window.on_cancel()
+
+    def close(self):
+        for widget in list(self.app.widgets.values()):
+            widget.destroy()
+        self.app.root.destroy()
+
+
+def top_growth(before, after, limit=10):
+    stats = after.compare_to(before, 'lineno')
+    return [stat for stat in stats if stat.size_diff > 0][:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sunshine memory soak test")
+    parser.add_argument('--cycles', type=int, default=2000, help="轮数 number of cycles")
+    parser.add_argument('--window-every', type=int, default=50,
+                        help="每隔多少轮打开一次设置窗口 open the settings window every N cycles (0: never)")
+    parser.add_argument('--memory-budget', action='store_true', help="开启省内存模式 enable the memory-budget mode")
+    parser.add_argument('--max-python-growth-kb', type=int, default=1024,
+                        help="允许的 tracemalloc 增长 allowed tracemalloc growth (KB)")
+    parser.add_argument('--max-rss-growth-mb', type=int, default=32,
+                        help="允许的 RSS 增长 allowed RSS growth (MB)")
+    args = parser.parse_args(argv)
+
+    os.chdir(REPO_ROOT)
+    xvfb = ensure_display()
+    try:
+        soak = Soak(args.memory_budget, args.window_every)
+        # 预热：每个主题和每种配置都至少用过一次，缓存达到稳定大小
+        warmup = max(len(soak.themes), args.window_every) * 2
+        for i in range(warmup):
+            soak.cycle(i)
+        gc.collect()
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        rss_start = current_rss_kb()
+        samples = []
+        start = time.perf_counter()
+        for i in range(warmup, warmup + args.cycles):
+            soak.cycle(i)
+            if i % RSS_SAMPLE_EVERY == 0:
+                samples.append(current_rss_kb())
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        rss_end = current_rss_kb()
+        tracemalloc.stop()
+        scheduler = soak.widget.scheduler
+        wakeups = (scheduler.wakeups, scheduler.wakeups_per_hour())
+        soak.close()
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    python_growth_kb = sum(stat.size_diff for stat in after.compare_to(before, 'filename')) / 1024
+    rss_growth_mb = (rss_end - rss_start) / 1024
+    print(f"{args.cycles} cycles in {elapsed:.1f}s, memory budget mode: {args.memory_budget}")
+    print(f"tracemalloc growth: {python_growth_kb:.1f} KB (limit {args.max_python_growth_kb} KB)")
+    print(f"RSS: {rss_start} KB -> {rss_end} KB, growth {rss_growth_mb:.1f} MB (limit {args.max_rss_growth_mb} MB)")
+    print(f"RSS samples (KB): {samples}")
+    print(f"scheduler wakeups: {wakeups[0]} ({wakeups[1]:.0f}/h)")
+
+    failed = False
+    if python_growth_kb > args.max_python_growth_kb:
+        failed = True
+        print("泄漏 LEAK: Python 内存增长超过阈值 Python memory grew past the threshold")
+        for stat in top_growth(before, after):
+            print(f"  {stat}")
+    if rss_growth_mb > args.max_rss_growth_mb:
+        failed = True
+        print("泄漏 LEAK: RSS 增长超过阈值 RSS grew past the threshold")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+config.json 的唯一入口：主窗口和设置窗口共用一个 ConfigStore。
+
+文件只解析一次，按 SCHEMA 校验，缺失的字段使用同一套默认值；
+修改后通知订阅者哪些字段发生了变化，并在后台线程中合并写入（先写临时文件再替换），
+连续保存不会阻塞界面，也不会留下写了一半的文件。
+"""
+from collections import deque
+import json
+import os
+import threading
+import time
+
+from instances import instance_count, instance_config, update_instance
+from tracing import span, traced
+
+
+CONFIG_PATH = 'config.json'
+
+# 连续保存时等待的时间（秒），期间的多次保存合并为一次写入
+SAVE_COALESCE_S = 0.2
+
+# 记住的本进程最近保存的内容条数
+OWN_WRITES = 8
+
+# 字段 -> (允许的类型, 默认值, 最小值)
+SCHEMA = {
+    'theme': (str, 'minty', None),
+    'image_path': (str, 'pic/sun.png', None),
+    'window_width': (int, 250, 100),
+    'window_height': (int, 310, 100),
+    'window_x': (int, None, None),
+    'window_y': (int, None, None),
+    'refresh_interval': (int, 120, 1),
+    'font_size': (int, 10, 5),
+    'auto_fit_font': (bool, False, None),
+    'language': (str, 'zh_CN', None),
+    'mottos_path': (str, 'mottos.json', None),
+    'motto_mode': (str, 'random', None),
+    'motto_no_repeat': (int, 1, 0),
+    'motto_language_filter': (bool, False, None),
+    'motto_tags': (list, None, None),
+    'image_cache_mb': ((int, float), 16, 0),
+    'thumbnail_cache_mb': ((int, float), 64, 0),
+    'watch_interval': ((int, float), 2, 0.1),
+    'slideshow_interval': ((int, float), 30, 1),
+    'slideshow_prefetch': (int, 3, 1),
+    'slideshow_shuffle': (bool, False, None),
+    'memory_budget': (bool, False, None),
+    'image_processes': (int, 0, 0),
+}
+
+DEFAULTS = {key: default for key, (_, default, _) in SCHEMA.items()}
+
+
+def validate_field(key, value):
+    """校验一个字段，不合法时抛出 ValueError；不在 SCHEMA 中的字段原样保留"""
+    if key not in SCHEMA:
+        return value
+    types, default, minimum = SCHEMA[key]
+    if value is None and default is None:
+        return value
+    # bool 是 int 的子类，数值字段不接受 true/false
+    if not isinstance(value, types) or (isinstance(value, bool) and types is not bool):
+        raise ValueError(f"{key} 的类型不正确: {value!r}")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{key} 不能小于 {minimum}: {value!r}")
+    return value
+
+
+def validate(data):
+    """校验整个配置文件的内容，不合法的字段丢弃并使用默认值"""
+    if not isinstance(data, dict):
+        print("配置文件格式不正确，使用默认配置")
+        return {}
+    cleaned = {}
+    sections = data.get('instances')
+    for key, value in data.items():
+        if key == 'instances':
+            continue
+        try:
+            cleaned[key] = validate_field(key, value)
+        except ValueError as e:
+            print(f"配置无效，使用默认值: {e}")
+    if isinstance(sections, list):
+        cleaned['instances'] = [validate(section) for section in sections]
+    return cleaned
+
+
+class ConfigStore:
+    def __init__(self, path=CONFIG_PATH):
+        self.path = path
+        self.data = {}
+        self._subscribers = []
+        # 最近一次读取或写入的文件内容，以及本进程最近保存的各次内容（按时间顺序）：
+        # 合并写入时文件中可能暂时还是较早的一次，重新加载读到其中任何一次都是自己写入的
+        self._text = None
+        self._own_writes = deque(maxlen=OWN_WRITES)
+        self._pending = None
+        self._writer = None
+        self._lock = threading.Lock()
+        self.load()
+
+    @traced('config.load')
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._text = f.read()
+            self.data = validate(json.loads(self._text))
+        except (OSError, ValueError) as e:
+            print(f"无法加载配置，使用默认配置: {e}")
+            self.data = {}
+
+    def instance_count(self):
+        return instance_count(self.data)
+
+    def instance(self, index=0):
+        """第 index 个窗口的完整配置（副本），缺失的字段使用默认值"""
+        return {**DEFAULTS, **instance_config(self.data, index)}
+
+    def subscribe(self, callback, fields=None):
+        """
+        订阅配置变化：callback({分节序号: 变化的字段集合})，总是在 Tk 线程中调用；
+        指定 fields 时只在其中的字段变化时调用
+        """
+        self._subscribers.append((callback, set(fields) if fields is not None else None))
+
+    def update(self, index, values):
+        """修改第 index 个窗口的配置，通知订阅者并在后台保存；字段不合法时抛出 ValueError"""
+        current = self.instance(index)
+        values = {
+            key: validate_field(key, value)
+            for key, value in values.items() if current.get(key) != value
+        }
+        if not values:
+            return
+        before = self._snapshot()
+        update_instance(self.data, index, values)
+        self._notify(before)
+        self.save()
+
+    def read_text(self):
+        """读取 config.json 的内容，可以在后台线程中调用，结果交给 reload"""
+        with span('config.read'), open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    @traced('config.reload')
+    def reload(self, text=None):
+        """
+        config.json 在外部被修改后重新读取（text 为已在后台读到的内容），只通知发生变化的字段
+        """
+        try:
+            if text is None:
+                text = self.read_text()
+            if text == self._text:
+                return
+            if text in self._own_writes:
+                # 自己写入的内容；更早的几次已被覆盖，不会再读到
+                while self._own_writes[0] != text:
+                    self._own_writes.popleft()
+                return
+            data = validate(json.loads(text))
+        except (OSError, ValueError) as e:
+            # 文件可能正在被写入，等下一次变化再读取
+            print(f"无法重新加载配置: {e}")
+            return
+        self._text = text
+        self._own_writes.clear()
+        before = self._snapshot()
+        self.data = data
+        self._notify(before)
+
+    def save(self):
+        """在后台线程中保存；短时间内的多次保存只写入最后一次的内容"""
+        text = json.dumps(self.data, indent=4, ensure_ascii=False)
+        with self._lock:
+            self._text = text
+            self._own_writes.append(text)
+            self._pending = text
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, daemon=True)
+                self._writer.start()
+
+    def flush(self):
+        """等待尚未完成的写入（程序退出前调用）"""
+        with self._lock:
+            writer = self._writer
+        if writer is not None:
+            writer.join()
+
+    def _write_pending(self):
+        while True:
+            time.sleep(SAVE_COALESCE_S)
+            with self._lock:
+                text = self._pending
+                self._pending = None
+            temp_path = f'{self.path}.{os.getpid()}.tmp'
+            try:
+                with span('config.write'):
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        f.write(text)
+                    os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"无法保存配置: {e}")
+            with self._lock:
+                # 写入期间没有新的保存请求时结束，否则再等待一次并写入最新的内容
+                if self._pending is None:
+                    self._writer = None
+                    return
+
+    def _snapshot(self):
+        return [self.instance(index) for index in range(self.instance_count())]
+
+    def _notify(self, before):
+        after = self._snapshot()
+        changes = {}
+        for index in range(max(len(before), len(after))):
+            old = before[index] if index < len(before) else {}
+            new = after[index] if index < len(after) else {}
+            changed = {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+            if changed:
+                changes[index] = changed
+        if not changes:
+            return
+        all_changed = set().union(*changes.values())
+        for callback, fields in list(self._subscribers):
+            if fields is None or fields & all_changed:
+                callback(changes)
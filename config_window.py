@@ -1,62 +1,39 @@
+import os
 import tkinter as tk
 import ttkbootstrap as ttk
-from tkinter import filedialog
-import json
+from tracing import span
+from i18n import TextRegistry, available_languages
+from config_store import ConfigStore
+from theme_manager import ThemeManager
+
+# 可选主题
+THEMES = [
+    "cosmo", "flatly", "litera", "minty", "lumen",
+    "sandstone", "yeti", "pulse", "united", "morph",
+    "journal", "darkly", "superhero", "solar", "cyborg", "vapor"
+]
+
+# 预览防抖延迟：连续点击 spinbox 时只在停顿后应用一次
+PREVIEW_DELAY_MS = 50
 
 class ConfigWindow:
     """
     本文件用于配置窗口，只能在运行 Sunshine.py 时调用
     """
-    def __init__(self, parent=None, callback=None):
-        # 添加翻译字典
-        self.translations = {
-            'zh_CN': {
-                'window_title': '小太阳 Sunshine 配置',
-                'theme_section': '主题选择 (实时预览)',
-                'image_section': '图片设置',
-                'browse_btn': '浏览',
-                'window_size_section': '窗口大小',
-                'width_label': '宽度 (建议>=250):',
-                'height_label': '高度 (建议>=310):',
-                'refresh_section': '文字刷新间隔 (最小支持1秒，否则无法保存)',
-                'interval_label': '间隔(秒):',
-                'font_section': '字体大小 (最小为5)',
-                'size_label': '大小:',
-                'language_section': '语言设置 Language Settings',
-                'language_label': '语言 Language:',
-                'save_btn': '保存 Save',
-                'cancel_btn': '取消 Cancel',
-                'image_file_type': '图片文件类型',
-                'all_files': '所有文件',
-                
-            },
-            'en_US': {
-                'window_title': '小太阳 Sunshine Settings',
-                'theme_section': 'Theme Selection (Live Preview)',
-                'image_section': 'Image Settings',
-                'browse_btn': 'Browse',
-                'window_size_section': 'Window Size',
-                'width_label': 'Width (Suggested: w>=310):',
-                'height_label': 'Height (Suggested: h>=310):',
-                'refresh_section': 'Text Refresh Interval (Minimum 1 second)',
-                'interval_label': 'Interval(s):',
-                'font_section': 'Font Size (Minimum 5)',
-                'size_label': 'Size:',
-                'language_section': '语言设置 Language Settings',
-                'language_label': '语言 Language:',
-                'save_btn': 'Save',
-                'cancel_btn': 'Cancel',
-                'image_file_type': 'Image File Type',
-                'all_files': 'All Files',
-            }
-        }
-
-        self.load_config()
-        self.current_lang = self.config.get('language', 'zh_CN')
+    def __init__(self, parent=None, callback=None, instance=0, store=None, theme_manager=None,
+                 replace_motto_file=None):
+        # 同一进程中可能有多个小太阳，instance 是要配置的窗口在 config.json 中的分节序号
+        self.instance = instance
+        # 与主窗口共用同一个 ConfigStore，不再单独解析 config.json
+        self.store = store or ConfigStore()
+        self.config = self.store.instance(instance)
+        self.current_lang = self.config['language']
+        # 每个需要翻译的控件都登记到这里，切换语言时只更新这些控件
+        self.texts = TextRegistry(self.current_lang)
         
         # 使用Toplevel而不是Window
         self.root = ttk.Toplevel(parent)
-        self.root.title(self.get_text('window_title'))  # 使用翻译的窗口标题
+        self.texts.register(self.root, 'window_title')  # 使用翻译的窗口标题
         self.root.resizable(False, False)
         
         # 设置模态窗口
@@ -64,6 +41,10 @@ class ConfigWindow:
         self.root.grab_set()
         
         self.callback = callback
+        # 用写好的临时文件替换箴言文件：replace_motto_file(临时文件, 箴言文件)
+        self.replace_motto_file = replace_motto_file
+        # 尚未执行的预览任务，用于合并连续的预览请求
+        self._preview_job = None
         # 保存原始配置用于取消时恢复
         self.original_config = self.config.copy()
         
@@ -73,16 +54,12 @@ class ConfigWindow:
         main_frame.pack(fill='both', expand=True)
         
         # 主题选择
-        theme_frame = ttk.LabelFrame(main_frame, text=self.get_text('theme_section'), padding="10")
+        theme_frame = self.texts.register(ttk.LabelFrame(main_frame, padding="10"), 'theme_section')
         theme_frame.pack(fill='x', pady=(0, 10))
         
-        self.themes = [
-            "cosmo", "flatly", "litera", "minty", "lumen", 
-            "sandstone", "yeti", "pulse", "united", "morph", 
-            "journal", "darkly", "superhero", "solar", "cyborg", "vapor"
-        ]
+        self.themes = THEMES
         
-        self.theme_var = tk.StringVar(value=self.config.get('theme', 'minty'))
+        self.theme_var = tk.StringVar(value=self.config['theme'])
         self.theme_combo = ttk.Combobox(
             theme_frame, 
             textvariable=self.theme_var,
@@ -95,30 +72,29 @@ class ConfigWindow:
         self.theme_combo.bind('<<ComboboxSelected>>', self.on_theme_change)
         
         # 图片选择
-        image_frame = ttk.LabelFrame(main_frame, text=self.get_text('image_section'), padding="10")
+        image_frame = self.texts.register(ttk.LabelFrame(main_frame, padding="10"), 'image_section')
         image_frame.pack(fill='x', pady=(0, 10))
         
-        self.image_path_var = tk.StringVar(value=self.config.get('image_path', 'sun.png'))
+        self.image_path_var = tk.StringVar(value=self.config['image_path'])
         image_entry = ttk.Entry(image_frame, textvariable=self.image_path_var, width=30)
         image_entry.pack(side='left', padx=(0, 5))
         
-        browse_btn = ttk.Button(
+        browse_btn = self.texts.register(ttk.Button(
             image_frame,
-            text=self.get_text('browse_btn'),
             command=self.browse_image,
             bootstyle="info-outline"
-        )
+        ), 'browse_btn')
         browse_btn.pack(side='right')
         
         # 窗口大小设置
-        size_frame = ttk.LabelFrame(main_frame, text=self.get_text('window_size_section'), padding="10")
+        size_frame = self.texts.register(ttk.LabelFrame(main_frame, padding="10"), 'window_size_section')
         size_frame.pack(fill='x', pady=(0, 10))
         
         # 宽度
         width_frame = ttk.Frame(size_frame)
         width_frame.pack(fill='x', pady=(0, 5))
-        ttk.Label(width_frame, text=self.get_text('width_label')).pack(side='left')
-        self.width_var = tk.StringVar(value=str(self.config.get('window_width', 250)))
+        self.texts.register(ttk.Label(width_frame), 'width_label').pack(side='left')
+        self.width_var = tk.StringVar(value=str(self.config['window_width']))
         self.width_spinbox = ttk.Spinbox(
             width_frame,
             from_=200,
@@ -134,8 +110,8 @@ class ConfigWindow:
         # 高度
         height_frame = ttk.Frame(size_frame)
         height_frame.pack(fill='x')
-        ttk.Label(height_frame, text=self.get_text('height_label')).pack(side='left')
-        self.height_var = tk.StringVar(value=str(self.config.get('window_height', 250)))
+        self.texts.register(ttk.Label(height_frame), 'height_label').pack(side='left')
+        self.height_var = tk.StringVar(value=str(self.config['window_height']))
         self.height_spinbox = ttk.Spinbox(
             height_frame,
             from_=200,
@@ -149,10 +125,10 @@ class ConfigWindow:
         self.height_spinbox.pack(side='right')
         
         # 刷新时间设置
-        refresh_frame = ttk.LabelFrame(main_frame, text=self.get_text('refresh_section'), padding="10")
+        refresh_frame = self.texts.register(ttk.LabelFrame(main_frame, padding="10"), 'refresh_section')
         refresh_frame.pack(fill='x', pady=(0, 10))
         
-        self.refresh_var = tk.StringVar(value=str(self.config.get('refresh_interval', 120)))
+        self.refresh_var = tk.StringVar(value=str(self.config['refresh_interval']))
         # 添加验证函数
         def validate_refresh(value):
             try:
@@ -163,7 +139,7 @@ class ConfigWindow:
         
         refresh_frame_inner = ttk.Frame(refresh_frame)
         refresh_frame_inner.pack(fill='x')
-        ttk.Label(refresh_frame_inner,text=self.get_text('interval_label')).pack(side='left')
+        self.texts.register(ttk.Label(refresh_frame_inner), 'interval_label').pack(side='left')
 
         # vcmd = (self.root.register(validate_refresh), '%P')
         self.refresh_spinbox = ttk.Spinbox(
@@ -181,14 +157,14 @@ class ConfigWindow:
         self.refresh_spinbox.pack(side='right')
         
         # 字体大小设置
-        font_frame = ttk.LabelFrame(main_frame, text=self.get_text('font_section'), padding="10")
+        font_frame = self.texts.register(ttk.LabelFrame(main_frame, padding="10"), 'font_section')
         font_frame.pack(fill='x', pady=(0, 10))
 
         font_frame_inner = ttk.Frame(font_frame)
         font_frame_inner.pack(fill='x')
-        ttk.Label(font_frame_inner, text=self.get_text('size_label')).pack(side='left')
+        self.texts.register(ttk.Label(font_frame_inner), 'size_label').pack(side='left')
         
-        self.font_size_var = tk.StringVar(value=str(self.config.get('font_size', 10)))
+        self.font_size_var = tk.StringVar(value=str(self.config['font_size']))
         # 添加验证函数
         def validate_font(value):
             try:
@@ -211,60 +187,103 @@ class ConfigWindow:
         self.font_spinbox.bind('<Return>', lambda e: self.on_spinbox_change(self.font_spinbox))
         self.font_spinbox.pack(side='right')
 
+        # 自适应字号：每条箴言使用能放进箴言区域的最大字号
+        self.auto_fit_var = tk.BooleanVar(value=self.config['auto_fit_font'])
+        self.texts.register(ttk.Checkbutton(
+            font_frame,
+            variable=self.auto_fit_var,
+            command=self.schedule_preview,
+            bootstyle="round-toggle"
+        ), 'auto_fit_label').pack(anchor='w', pady=(5, 0))
+
         # 添加语言选择部分
-        lang_frame = ttk.LabelFrame(main_frame, text=self.get_text('language_section'), padding="10")
+        lang_frame = self.texts.register(ttk.LabelFrame(main_frame, padding="10"), 'language_section')
         lang_frame.pack(fill='x', pady=(0, 10))
         
-        self.lang_var = tk.StringVar(value=self.config.get('language', 'zh_CN'))
+        self.lang_var = tk.StringVar(value=self.config['language'])
         lang_frame_inner = ttk.Frame(lang_frame)
         lang_frame_inner.pack(fill='x')
-        ttk.Label(lang_frame_inner, text=self.get_text('language_label')).pack(side='left')
+        self.texts.register(ttk.Label(lang_frame_inner), 'language_label').pack(side='left')
         
         self.lang_var = tk.StringVar(value=self.current_lang)
         self.lang_combo = ttk.Combobox(
             lang_frame_inner,
             textvariable=self.lang_var,
-            values=['zh_CN', 'en_US'],
+            values=available_languages(),
             state='readonly',
             width=10
         )
         self.lang_combo.pack(side='right')
-        self.lang_combo.bind('<<ComboboxSelected>>', lambda e: self.save_config(preview=True))
+        self.lang_combo.bind('<<ComboboxSelected>>', self.on_language_change)
         
+        # 箴言管理：面板在第一次展开时才创建，打开设置窗口时不读取箴言文件
+        self.mottos_frame = self.texts.register(ttk.LabelFrame(main_frame, padding="10"), 'mottos_section')
+        self.mottos_frame.pack(fill='x', pady=(0, 10))
+        self.texts.register(ttk.Button(
+            self.mottos_frame,
+            command=self.toggle_motto_manager,
+            bootstyle="info-outline"
+        ), 'motto_manage_btn').pack(anchor='w')
+        self.motto_manager = None
+
         # 按钮区域
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill='x', pady=(10, 0))
         
-        save_btn = ttk.Button(
+        save_btn = self.texts.register(ttk.Button(
             button_frame,
-            text=self.get_text('save_btn'),
             command=self.save_config,
             bootstyle="success",
             width=8
-        )
+        ), 'save_btn')
         save_btn.pack(side='right', padx=(5, 0))
         
-        cancel_btn = ttk.Button(
+        cancel_btn = self.texts.register(ttk.Button(
             button_frame,
-            text=self.get_text('cancel_btn'),
             command=self.on_cancel,
             bootstyle="danger-outline",
             width=10
-        )
+        ), 'cancel_btn')
         cancel_btn.pack(side='right')
         
         # 设置窗口位置为屏幕中央
         self.center_window()
 
+        # 与主窗口共用主题缓存：窗口显示后在空闲时从当前主题的下一个开始预构建其余主题，
+        # 预览任意主题时都只需切换
+        self.theme_manager = theme_manager or ThemeManager(self.root, ttk.Style().theme_use())
+        position = self.themes.index(self.config['theme']) if self.config['theme'] in self.themes else -1
+        self.theme_manager.prewarm(
+            self.themes[position + 1:] + self.themes[:position + 1],
+            owner=self.root
+        )
+
     def get_text(self, key):
         """获取当前语言的翻译文本"""
-        return self.translations[self.current_lang][key]
+        return self.texts.text(key)
+
+    def schedule_preview(self):
+        """
+        将预览合并到 Tk 事件循环中：短时间内的多次修改只应用最后一次
+        """
+        if self._preview_job is not None:
+            self.root.after_cancel(self._preview_job)
+        self._preview_job = self.root.after(PREVIEW_DELAY_MS, self.flush_preview)
+
+    def flush_preview(self):
+        self._preview_job = None
+        self.save_config(preview=True)
+
+    def cancel_preview(self):
+        if self._preview_job is not None:
+            self.root.after_cancel(self._preview_job)
+            self._preview_job = None
 
     def on_theme_change(self, event=None):
-        # 实时预览主题
-        ttk.Style().theme_use(self.theme_var.get())
+        # 实时预览主题：已预构建的主题只需切换，之后主窗口应用同一主题时不会再次切换
+        self.theme_manager.use(self.theme_var.get())
         # 立即应用到主窗口
-        self.save_config(preview=True)
+        self.schedule_preview()
         
     def on_size_change(self, event=None):
         try:
@@ -272,62 +291,68 @@ class ConfigWindow:
             width = int(self.width_var.get())
             height = int(self.height_var.get())
             if 200 <= width <= 400 and 200 <= height <= 400:
-                self.save_config(preview=True)
+                self.schedule_preview()
         except ValueError:
             pass
         
-    def load_config(self):
-        try:
-            with open('config.json', 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
-        except:
-            self.config = {
-                'theme': 'minty',
-                'image_path': 'sun.png',
-                'window_width': 250,
-                'window_height': 250,
-                'refresh_interval': 120,
-                'font_size': 10
-            }
-    
     def browse_image(self):
+        from tkinter import filedialog
         filename = filedialog.askopenfilename(
             title=self.get_text('image_section'),
             filetypes=[
-                (self.get_text('image_file_type'), "*.png *.jpg *.jpeg *.gif *.bmp"),
+                (self.get_text('image_file_type'), "*.png *.apng *.jpg *.jpeg *.gif *.webp *.bmp"),
                 (self.get_text('all_files'), "*.*")
             ]
         )
         if filename:
             self.image_path_var.set(filename)
-            self.save_config(preview=True)
+            self.schedule_preview()
     
+    def toggle_motto_manager(self):
+        if self.motto_manager is None:
+            from motto_manager import MottoManager
+            self.motto_manager = MottoManager(self.mottos_frame, self.texts, self.config['mottos_path'])
+        if self.motto_manager.winfo_ismapped():
+            self.motto_manager.pack_forget()
+        else:
+            self.motto_manager.pack(fill='both', expand=True, pady=(10, 0))
+
     def save_config(self, preview=False):
+        if not preview:
+            # 正式保存时丢弃尚未执行的预览
+            self.cancel_preview()
         try:
-            new_config = {
+            edited = {
                 'theme': self.theme_var.get(),
                 'image_path': self.image_path_var.get(),
                 'window_width': int(self.width_var.get()),
                 'window_height': int(self.height_var.get()),
                 'refresh_interval': int(self.refresh_var.get()),
                 'font_size': int(self.font_size_var.get()),
+                'auto_fit_font': self.auto_fit_var.get(),
                 'language': self.lang_var.get()  # 添加语言设置
             }
-            
+            # 只提交在窗口中改过的字段：窗口打开期间配置文件被重新加载、或其他分节被修改时，
+            # 其余字段以 ConfigStore 中的最新值为准，不会被打开窗口时的旧值覆盖
+            changed = {
+                key: value for key, value in edited.items() if value != self.original_config[key]
+            }
+            new_config = {**self.store.instance(self.instance), **changed}
+
             if preview:
                 # 预览模式只调用回调函数，不保存到文件
                 if self.callback:
                     self.callback(new_config)
             else:
-                # 保存模式既保存到文件也调用回调函数
-                with open('config.json', 'w', encoding='utf-8') as f:
-                    json.dump(new_config, f, indent=4, ensure_ascii=False)
-                
+                if self.motto_manager is not None:
+                    # 箴言文件在后台写入，写完后由主窗口替换（箴言库可能还映射着原文件）
+                    self.motto_manager.save(self.replace_motto_file or os.replace)
+                # 保存到共用的 ConfigStore：主窗口通过订阅收到变化，文件在后台线程中写入
+                with span('config.save'):
+                    self.store.update(self.instance, changed)
                 if self.callback:
                     self.callback(new_config)
                 self.root.destroy()
-                
-                self.root.destroy()
         except ValueError as e:
             print(f"配置值无效: {e}")
     
@@ -340,9 +365,13 @@ class ConfigWindow:
         self.root.geometry(f'+{x}+{y}')
 
     def on_cancel(self):
-        # 恢复原始配置
+        self.cancel_preview()
+        # 恢复为 ConfigStore 中的配置（预览不会写入 ConfigStore）。
+        # 主题在选择时已立即应用，被丢弃的预览可能还没有让主窗口记下它，这里直接切换回来
+        config = self.store.instance(self.instance)
+        self.theme_manager.use(config['theme'])
         if self.callback:
-            self.callback(self.original_config)
+            self.callback(config)
         self.root.destroy()
 
     def on_spinbox_change(self, spinbox):
@@ -352,58 +381,16 @@ class ConfigWindow:
             min_val = int(spinbox.cget('from'))
             if value < min_val:
                 spinbox.set(str(min_val))
-            self.save_config(preview=True)
+            self.schedule_preview()
         except ValueError:
             pass
 
-    def update_window_texts(self):
-        """更新窗口中的所有文本"""
-        self.root.title(self.get_text('window_title'))
-        
-        # 遍历所有控件更新文本
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ttk.Frame):
-                for child in widget.winfo_children():
-                    if isinstance(child, ttk.LabelFrame):
-                        if 'theme' in str(child):
-                            child.configure(text=self.get_text('theme_section'))
-                        elif 'image' in str(child):
-                            child.configure(text=self.get_text('image_section'))
-                        elif 'size' in str(child):
-                            child.configure(text=self.get_text('window_size_section'))
-                        elif 'refresh' in str(child):
-                            child.configure(text=self.get_text('refresh_section'))
-                        elif 'font' in str(child):
-                            child.configure(text=self.get_text('font_section'))
-                        elif 'lang' in str(child):
-                            child.configure(text=self.get_text('language_section'))
-                            
-                    elif isinstance(child, ttk.Button):
-                        if 'browse' in str(child):
-                            child.configure(text=self.get_text('browse_btn'))
-                        elif 'save' in str(child):
-                            child.configure(text=self.get_text('save_btn'))
-                        elif 'cancel' in str(child):
-                            child.configure(text=self.get_text('cancel_btn'))
-                    # 更新标签文本
-                    elif isinstance(child, ttk.Label):
-                        if '宽度' in str(child) or 'Width' in str(child):
-                            child.configure(text=self.get_text('width_label'))
-                        elif '高度' in str(child) or 'Height' in str(child):
-                            child.configure(text=self.get_text('height_label'))
-                        elif '间隔' in str(child) or 'Interval' in str(child):
-                            child.configure(text=self.get_text('interval_label'))
-                        elif '大小' in str(child) or 'Size' in str(child):
-                            child.configure(text=self.get_text('size_label'))
-                        elif '语言' in str(child) or 'Language' in str(child):
-                            child.configure(text=self.get_text('language_label'))
-
     def on_language_change(self, event=None):
         """语言改变时的处理"""
         self.current_lang = self.lang_var.get()
-        self.update_window_texts()
+        self.texts.set_language(self.current_lang)
         # 立即预览更改
-        self.save_config(preview=True)
+        self.schedule_preview()
 
 if __name__ == "__main__":
     app = ConfigWindow()
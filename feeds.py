@@ -0,0 +1,210 @@
+"""
+箴言源：mottos.json 中的 "feeds" 可以列出 HTTP(S) 或 file:// 地址，作为额外的箴言来源。
+
+    {
+        "quotes": [...],
+        "feeds": ["https://example.com/quotes.json", "file:///home/me/quotes.txt"],
+        "feed_refresh": 3600
+    }
+
+箴言源可以是与 mottos.json 相同格式的 JSON、JSON 字符串列表，或每行一条的文本。
+拉取全部在单独的后台线程中进行，每次请求有总时限，使用 ETag / Last-Modified 条件请求，内容没有变化时不重新下载；
+解析后的结果保存在缓存目录中，启动时直接读取缓存，不等待网络。
+"""
+from functools import partial
+import hashlib
+import json
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from background import executor_for
+from motto_store import parse_line
+from paths import user_cache_dir
+
+
+# 默认每小时检查一次箴言源（秒）
+DEFAULT_REFRESH_S = 3600
+
+# 单次请求的总时限（秒）和箴言源的大小上限
+FETCH_TIMEOUT_S = 10
+MAX_FEED_BYTES = 1024 * 1024
+
+# 每次读取响应的最大字节数
+READ_CHUNK_BYTES = 64 * 1024
+
+# 箴言源使用单独的执行器，最多同时拉取的箴言源数；很慢的服务器不会占满读文件、缩放图片的线程
+FEED_WORKERS = 2
+
+USER_AGENT = 'Sunshine'
+
+
+def parse_feed(data):
+    """解析箴言源的内容，返回箴言列表（字符串，或带规则的箴言对象）"""
+    text = data.decode('utf-8-sig')
+    try:
+        value = json.loads(text)
+    except ValueError:
+        quotes = [parse_line(line.strip()) for line in text.splitlines() if line.strip()]
+    else:
+        if isinstance(value, dict):
+            value = value.get('quotes', [])
+        if not isinstance(value, list):
+            raise ValueError("箴言源格式不正确")
+        # 带规则的箴言保留为对象（见 motto_select.py），缓存中也原样保存
+        quotes = [item if isinstance(item, dict) else str(item) for item in value]
+    return [quote for quote in quotes if quote]
+
+
+class FeedCache:
+    """
+    每个箴言源的缓存：箴言列表和用于条件请求的 ETag / Last-Modified。
+
+    写入时先写临时文件再替换，多个进程同时刷新同一个箴言源也不会读到写了一半的文件。
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or user_cache_dir('feeds')
+
+    def path_for(self, url):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f'{digest}.json')
+
+    def load(self, url):
+        try:
+            with open(self.path_for(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get('url') != url:
+            return None
+        return entry
+
+    def save(self, url, entry):
+        path = self.path_for(url)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(entry, url=url), f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+def fetch_feed(url, etag=None, last_modified=None, timeout=FETCH_TIMEOUT_S):
+    """
+    条件请求一个箴言源，返回 (箴言列表, etag, last_modified)；内容没有变化时箴言列表为 None
+    """
+    if urllib.parse.urlsplit(url).scheme == 'file':
+        # 本地文件以修改时间和大小代替 Last-Modified
+        path = urllib.request.url2pathname(urllib.parse.urlsplit(url).path)
+        stat = os.stat(path)
+        signature = f'{stat.st_mtime_ns}:{stat.st_size}'
+        if signature == last_modified:
+            return None, etag, last_modified
+        with open(path, 'rb') as f:
+            return parse_feed(f.read(MAX_FEED_BYTES + 1)[:MAX_FEED_BYTES]), None, signature
+
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    if etag:
+        request.add_header('If-None-Match', etag)
+    if last_modified:
+        request.add_header('If-Modified-Since', last_modified)
+    # urlopen 的 timeout 只限制每一次网络操作，逐字节缓慢发送的服务器可以一直占住线程；
+    # 读取响应时另外检查总时限
+    deadline = time.monotonic() + timeout
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = read_body(response, deadline)
+            return (
+                parse_feed(data),
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified')
+            )
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, etag, last_modified
+        raise
+
+
+def read_body(response, deadline):
+    """读取响应内容，超过 deadline（time.monotonic() 的时刻）或 MAX_FEED_BYTES 时抛出异常"""
+    chunks = []
+    size = 0
+    while True:
+        if time.monotonic() >= deadline:
+            raise TimeoutError("箴言源响应超时")
+        # read1 只等待一次网络读取，不会为了凑满 READ_CHUNK_BYTES 而一直等下去
+        chunk = response.read1(READ_CHUNK_BYTES)
+        if not chunk:
+            return b''.join(chunks)
+        size += len(chunk)
+        if size > MAX_FEED_BYTES:
+            raise ValueError(f"箴言源超过 {MAX_FEED_BYTES} 字节")
+        chunks.append(chunk)
+
+
+def refresh_feed(url, cache, timeout=FETCH_TIMEOUT_S):
+    """在后台线程中执行：条件请求箴言源并更新缓存，内容没有变化时返回 None"""
+    entry = cache.load(url) or {}
+    quotes, etag, last_modified = fetch_feed(url, entry.get('etag'), entry.get('last_modified'), timeout)
+    if quotes is None:
+        return None
+    cache.save(url, {'etag': etag, 'last_modified': last_modified, 'quotes': quotes})
+    return quotes
+
+
+class FeedFetcher:
+    """
+    定期在后台拉取箴言源，每个箴言源完成后立即交给箴言库，不必等所有箴言源都完成。
+
+    拉取失败或服务器很慢都不影响界面：箴言库继续使用缓存中的箴言，下一次刷新时再重试。
+    """
+    def __init__(self, scheduler, store, feeds, refresh_interval=DEFAULT_REFRESH_S,
+                 cache=None, task_name='feeds'):
+        self.scheduler = scheduler
+        self.store = store
+        self.feeds = list(feeds)
+        self.refresh_interval = refresh_interval
+        self.cache = cache or FeedCache()
+        self.task_name = task_name
+        self.started = False
+        self._pending = set()
+
+    def start(self):
+        """先使用缓存中的箴言，再在后台检查更新"""
+        if self.started:
+            return
+        self.started = True
+        for url in self.feeds:
+            entry = self.cache.load(url)
+            if entry is not None:
+                self.store.set_source(url, entry.get('quotes', []))
+        self.refresh()
+        self.scheduler.add(self.task_name, self.refresh_interval * 1000, self.refresh)
+
+    def stop(self):
+        self.started = False
+        self.scheduler.cancel(self.task_name)
+
+    def refresh(self):
+        for url in self.feeds:
+            # 上一次请求还没有完成（如服务器很慢）时不重复请求
+            if url in self._pending:
+                continue
+            self._pending.add(url)
+            executor_for(self.scheduler.root, 'feeds', FEED_WORKERS).submit(
+                refresh_feed,
+                url,
+                self.cache,
+                callback=partial(self._on_fetched, url)
+            )
+
+    def _on_fetched(self, url, quotes, error):
+        self._pending.discard(url)
+        # 拉取期间箴言库已被关闭或替换
+        if not self.started:
+            return
+        if error is not None:
+            print(f"无法获取箴言源 {url}: {error}")
+            return
+        if quotes is not None:
+            self.store.set_source(url, quotes)
@@ -0,0 +1,153 @@
+import ctypes
+import os
+import sys
+import tkinter as tk
+
+
+# 轮询模式下检查文件的间隔（毫秒）
+DEFAULT_POLL_INTERVAL_MS = 2000
+
+# 收到 inotify 事件后稍等片刻再检查，合并编辑器保存时产生的一连串事件
+INOTIFY_SETTLE_MS = 100
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ATTRIB
+
+
+def file_signature(path):
+    """文件的修改时间和大小，文件不存在时返回 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _Inotify:
+    """通过 ctypes 调用 Linux inotify，监视文件所在目录（编辑器常以重命名方式保存文件）"""
+    def __init__(self):
+        # 直接使用进程中已加载的 libc，find_library 会启动子进程，拖慢启动
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._directories = set()
+
+    def add_directory(self, directory):
+        if directory in self._directories:
+            return
+        if self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed: {directory}')
+        self._directories.add(directory)
+
+    def drain(self):
+        """读空所有待处理事件；具体是哪个文件变化由调用方比较签名判断"""
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    由 Tk 事件循环驱动的文件监视器。
+
+    Linux 上优先使用 inotify，文件描述符直接交给 Tk 的事件循环，空闲时没有任何唤醒；
+    其他平台由调度器以较低频率轮询 os.stat。只有修改时间或大小真正变化时才调用回调。
+    """
+    def __init__(self, scheduler, poll_interval_ms=DEFAULT_POLL_INTERVAL_MS, task_name='file_watcher'):
+        self.scheduler = scheduler
+        self.root = scheduler.root
+        self.poll_interval_ms = poll_interval_ms
+        self.task_name = task_name
+        # 路径 -> [签名, 回调]
+        self._watches = {}
+        self._job = None
+        self._inotify = None
+        self.started = False
+
+    def start(self):
+        """开始监视。启动时只登记路径，真正的监视推迟到窗口显示之后"""
+        if self.started:
+            return
+        self.started = True
+        if sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify()
+                self.root.tk.createfilehandler(self._inotify.fd, tk.READABLE, self._on_inotify)
+            except (OSError, AttributeError, RuntimeError, tk.TclError):
+                if self._inotify is not None:
+                    self._inotify.close()
+                self._inotify = None
+        for path in list(self._watches):
+            self._arm(path)
+
+    def watch(self, path, callback):
+        """监视 path，内容变化时调用 callback()；重复调用会替换之前的回调"""
+        path = os.path.abspath(path)
+        self._watches[path] = [file_signature(path), callback]
+        if self.started:
+            self._arm(path)
+
+    def _arm(self, path):
+        if self._inotify is not None:
+            try:
+                self._inotify.add_directory(os.path.dirname(path))
+            except OSError:
+                # 目录无法监视时退回轮询
+                self._stop_inotify()
+        if self._inotify is None and self.task_name not in self.scheduler.tasks:
+            self.scheduler.add(self.task_name, self.poll_interval_ms, self.check)
+
+    def unwatch(self, path):
+        self._watches.pop(os.path.abspath(path), None)
+
+    def stop(self):
+        self._watches.clear()
+        self.scheduler.cancel(self.task_name)
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self._stop_inotify()
+        self.started = False
+
+    def check(self):
+        """比较所有被监视文件的签名，调用发生变化的文件的回调"""
+        for path, watch in list(self._watches.items()):
+            signature = file_signature(path)
+            if signature != watch[0]:
+                watch[0] = signature
+                # 文件被删除时不回调，等它重新出现
+                if signature is not None:
+                    watch[1]()
+
+    def _on_inotify(self, fd, mask):
+        self._inotify.drain()
+        if self._job is None:
+            self._job = self.root.after(INOTIFY_SETTLE_MS, self._settle)
+
+    def _settle(self):
+        self._job = None
+        self.check()
+
+    def _stop_inotify(self):
+        if self._inotify is None:
+            return
+        self.root.tk.deletefilehandler(self._inotify.fd)
+        self._inotify.close()
+        self._inotify = None
+        # 退回轮询
+        if self.started and self._watches:
+            self.scheduler.add(self.task_name, self.poll_interval_ms, self.check)
@@ -0,0 +1,79 @@
+import json
+import os
+import tkinter as tk
+
+
+# 每种语言一个 JSON 文件，主窗口和配置窗口共用
+LOCALE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales')
+DEFAULT_LANGUAGE = 'zh_CN'
+
+# 已加载的语言 -> 翻译字典；只在第一次使用某种语言时读取，语言再多也不影响启动速度
+_catalogs = {}
+
+
+def available_languages():
+    """列出所有语言，只读取目录而不解析翻译文件"""
+    return sorted(
+        os.path.splitext(name)[0]
+        for name in os.listdir(LOCALE_DIR)
+        if name.endswith('.json')
+    )
+
+
+def catalog(language):
+    messages = _catalogs.get(language)
+    if messages is None:
+        try:
+            with open(os.path.join(LOCALE_DIR, f'{language}.json'), 'r', encoding='utf-8') as f:
+                messages = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"无法加载语言文件 {language}: {e}")
+            messages = {}
+        _catalogs[language] = messages
+    return messages
+
+
+def gettext(language, key):
+    """获取翻译文本，缺失时依次退回默认语言和键名"""
+    text = catalog(language).get(key)
+    if text is None and language != DEFAULT_LANGUAGE:
+        text = catalog(DEFAULT_LANGUAGE).get(key)
+    return key if text is None else text
+
+
+class TextRegistry:
+    """
+    记录每个控件对应的翻译键。
+
+    切换语言时只更新登记过的控件，不需要遍历整个控件树去猜测每个控件显示的是什么。
+    """
+    def __init__(self, language=DEFAULT_LANGUAGE):
+        self.language = language
+        # 控件路径 -> (控件, 翻译键)
+        self._widgets = {}
+
+    def text(self, key):
+        return gettext(self.language, key)
+
+    def register(self, widget, key):
+        """登记控件并立即显示当前语言的文本，返回控件本身以便链式调用；重复登记会替换翻译键"""
+        self._widgets[str(widget)] = (widget, key)
+        self._apply(widget, key)
+        return widget
+
+    def unregister(self, widget):
+        self._widgets.pop(str(widget), None)
+
+    def set_language(self, language):
+        if language == self.language:
+            return
+        self.language = language
+        for widget, key in self._widgets.values():
+            self._apply(widget, key)
+
+    def _apply(self, widget, key):
+        # 顶层窗口显示在标题栏，其他控件显示在 text 选项
+        if isinstance(widget, tk.Wm):
+            widget.title(self.text(key))
+        else:
+            widget.configure(text=self.text(key))
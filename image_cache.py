@@ -0,0 +1,365 @@
+from collections import OrderedDict
+import math
+import os
+import threading
+import zlib
+
+from PIL import Image, ImageSequence
+
+from tracing import span
+
+
+# 默认缓存预算：16MB 足够容纳几十张 230px 宽的缩略图
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# 动图帧时长缺失或过短时使用的时长（毫秒），与浏览器的处理方式一致
+DEFAULT_FRAME_DURATION = 100
+
+# 一张动图解码后的帧总大小超过这个值时，各帧压缩保存，创建 PhotoImage 时再解压；
+# 压缩后仍超过 MAX_PACKED_FRAME_BYTES 时不再解码后面的帧，只循环播放前面的部分
+MAX_DECODED_FRAME_BYTES = 16 * 1024 * 1024
+MAX_PACKED_FRAME_BYTES = 32 * 1024 * 1024
+
+# 图像金字塔：最底层的最长边上限，以及最小一层的最长边下限
+PYRAMID_BASE_SIZE = 1024
+PYRAMID_MIN_SIZE = 64
+PYRAMID_MODES = ('RGB', 'RGBA', 'L')
+
+# 同时保留金字塔的图片数：当前图片和上一张（切换回来或调整窗口大小时复用）
+MAX_PYRAMIDS = 2
+
+
+def compute_target_size(src_width, src_height, window_width, window_height):
+    """
+    根据窗口大小计算图片的目标尺寸，保持原始宽高比
+    """
+    aspect_ratio = src_width / src_height
+    # 预留固定空间：50px给按钮区域，10px上边距
+    target_height = min(window_height - 60, 150)
+    target_width = int(target_height * aspect_ratio)
+
+    # 如果宽度超出窗口，则以宽度为基准重新计算
+    if target_width > window_width - 20:  # 预留边距
+        target_width = window_width - 20
+        target_height = int(target_width / aspect_ratio)
+    return max(target_width, 1), max(target_height, 1)
+
+
+def image_nbytes(image):
+    """估算一张已解码图片（或动图帧列表）占用的内存字节数"""
+    if isinstance(image, list):
+        return sum(image_nbytes(frame) for frame, _ in image)
+    if isinstance(image, PackedFrame):
+        return len(image.data)
+    return image.width * image.height * len(image.getbands())
+
+
+class PackedFrame:
+    """压缩保存的一帧动图，unpack() 还原为图片；很长的动图用它代替逐帧保存的像素"""
+    __slots__ = ('mode', 'size', 'data')
+
+    def __init__(self, image):
+        self.mode = image.mode
+        self.size = image.size
+        self.data = zlib.compress(image.tobytes(), 1)
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    def unpack(self):
+        return Image.frombytes(self.mode, self.size, zlib.decompress(self.data))
+
+
+def unpack_frame(image):
+    """动图的一帧：已解码的图片原样返回，压缩保存的先解压"""
+    return image.unpack() if isinstance(image, PackedFrame) else image
+
+
+def is_animated(path):
+    """判断图片是否为多帧动图（GIF / APNG / WebP）"""
+    with Image.open(path) as image:
+        return getattr(image, 'is_animated', False)
+
+
+class ImagePyramid:
+    """
+    一张图片的多分辨率金字塔，原图只解码一次。
+
+    最底层的最长边不超过 PYRAMID_BASE_SIZE（JPEG 直接以 draft 模式按比例解码），
+    之后每层边长减半；任意目标尺寸都从不小于它的最小一层缩放，
+    缩放耗时只取决于窗口大小，与原图分辨率无关。
+    """
+    def __init__(self, path):
+        with Image.open(path) as image:
+            self.source_size = image.size
+            scale = max(image.size) / PYRAMID_BASE_SIZE
+            if scale > 1:
+                image.draft(None, (math.ceil(image.width / scale), math.ceil(image.height / scale)))
+            if image.mode in PYRAMID_MODES:
+                image.load()
+            else:
+                image = image.convert('RGBA')
+            # draft 只能按 1/2、1/4、1/8 缩小，PNG 等格式也不支持 draft，剩下的用整数倍盒式缩小
+            factor = math.ceil(max(image.size) / PYRAMID_BASE_SIZE)
+            base = image.reduce(factor) if factor > 1 else image.copy()
+        self.levels = [base]
+        while max(self.levels[-1].size) >= 2 * PYRAMID_MIN_SIZE:
+            self.levels.append(self.levels[-1].reduce(2))
+
+    def level_for(self, size):
+        """不小于目标尺寸的最小一层，目标比最底层还大时返回最底层"""
+        for level in reversed(self.levels):
+            if level.width >= size[0] and level.height >= size[1]:
+                return level
+        return self.levels[0]
+
+    def resize(self, size, resample):
+        level = self.level_for(size)
+        if level.size == size:
+            return level.copy()
+        return level.resize(size, resample)
+
+
+class ImageCache:
+    """
+    解码并缩放后的图片的 LRU 缓存，Sunshine 的所有图片加载都经过这里。
+
+    缓存键为 (路径, 修改时间, 目标尺寸)，文件被替换后会自动失效；
+    总占用超过 max_bytes 时淘汰最久未使用的图片。
+    最近用过的几张图片还保留图像金字塔，窗口大小改变时不必重新解码原图。
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # 为 False 时预算可以为 0，图片交给 PhotoImage 后不再保留（省内存模式）
+        self.keep_last = True
+        self.max_pyramids = MAX_PYRAMIDS
+        # 动图各帧不压缩时的总大小上限，省内存模式下总是压缩
+        self.max_frame_bytes = MAX_DECODED_FRAME_BYTES
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        # (路径, 修改时间) -> 原图尺寸，命中时无需再读取文件头
+        self._source_sizes = {}
+        # (路径, 修改时间) -> ImagePyramid
+        self._pyramids = OrderedDict()
+        self._lock = threading.Lock()
+        # 磁盘上的缩略图缓存（见 thumbnail_cache.py），为 None 时只使用内存缓存
+        self.thumbnails = None
+
+    def set_budget(self, max_bytes, keep_last=True):
+        """调整缓存预算，超出部分立即淘汰；省内存模式下不保留图像金字塔"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.keep_last = keep_last
+            self.max_pyramids = MAX_PYRAMIDS if keep_last else 0
+            self.max_frame_bytes = MAX_DECODED_FRAME_BYTES if keep_last else 0
+            self._evict()
+
+    def load(self, path, window_width, window_height):
+        """
+        返回适合当前窗口大小的高质量（LANCZOS）图片，命中缓存时不读取、不解码文件。
+        未命中时较慢，Tk 线程中应先用 load_preview 显示，再在后台调用
+        """
+        return self._load(path, window_width, window_height, 'lanczos', self._resize_lanczos, persistent=True)
+
+    def load_preview(self, path, window_width, window_height, decode=True):
+        """
+        返回 (图片, 是否为最终结果)。已有高质量图片（内存或磁盘缩略图）时直接返回它，
+        否则从图像金字塔中最接近的一层快速缩放一张预览。
+        decode 为 False 时不解码原图：图像金字塔也不在内存中时返回 (None, False)，
+        Tk 线程用它判断能否立即显示，不能时再在后台调用
+        """
+        stat = os.stat(path)
+        image = self._cached(path, stat, window_width, window_height, 'lanczos', persistent=True)
+        if image is not None:
+            return image, True
+        if decode:
+            pyramid = self.pyramid(path, stat.st_mtime_ns)
+        else:
+            with self._lock:
+                pyramid = self._pyramids.get((path, stat.st_mtime_ns))
+            if pyramid is None:
+                return None, False
+        target_size = compute_target_size(*pyramid.source_size, window_width, window_height)
+        with span('image.preview', path=path, size=target_size):
+            return pyramid.resize(target_size, Image.BILINEAR), False
+
+    def load_frames(self, path, window_width, window_height):
+        """
+        返回动图每一帧缩放后的图片及其时长：[(image, duration_ms), ...]
+        """
+        return self._load(path, window_width, window_height, 'frames', self._decode_frames)
+
+    def load_animation(self, path, window_width, window_height):
+        """
+        在后台调用：图片是动图时返回 load_frames 的结果，否则（包括无法打开时）返回 None。
+        判断是否为动图要打开文件并逐帧定位，不应在 Tk 线程中进行
+        """
+        try:
+            if not is_animated(path):
+                return None
+        except Exception:
+            return None
+        return self.load_frames(path, window_width, window_height)
+
+    def put(self, path, window_width, window_height, result):
+        """
+        放入在其他进程中缩放好的高质量图片（见 resize_high_quality），之后的 load 直接命中；
+        同时写入磁盘缩略图，应在后台线程中调用
+        """
+        stat, source_size, image = result
+        mtime = stat.st_mtime_ns
+        with self._lock:
+            self._source_sizes[(path, mtime)] = source_size
+        if self.thumbnails is not None:
+            self.thumbnails.save(path, stat, (window_width, window_height), image, 'lanczos')
+        return self._store((path, mtime, image.size, 'lanczos'), image)
+
+    def pyramid(self, path, mtime):
+        """返回图片的金字塔，最近用过的直接复用"""
+        source_key = (path, mtime)
+        with self._lock:
+            pyramid = self._pyramids.get(source_key)
+            if pyramid is not None:
+                self._pyramids.move_to_end(source_key)
+                return pyramid
+        with span('image.decode', path=path):
+            pyramid = ImagePyramid(path)
+        with self._lock:
+            self._source_sizes[source_key] = pyramid.source_size
+            if self.max_pyramids > 0:
+                self._pyramids[source_key] = pyramid
+                self._evict()
+        return pyramid
+
+    def _resize_lanczos(self, path, mtime, target_size):
+        return self.pyramid(path, mtime).resize(target_size, Image.LANCZOS)
+
+    def _decode_frames(self, path, mtime, target_size):
+        return decode_frames(path, target_size, self.max_frame_bytes)
+
+    def _load(self, path, window_width, window_height, kind, decode, persistent=False):
+        # persistent: 结果同时保存到磁盘缩略图缓存（动图帧不保存）
+        stat = os.stat(path)
+        image = self._cached(path, stat, window_width, window_height, kind, persistent)
+        if image is not None:
+            return image
+        mtime = stat.st_mtime_ns
+        source_key = (path, mtime)
+        with self._lock:
+            self.misses += 1
+            source_size = self._source_sizes.get(source_key)
+        if source_size is None:
+            with Image.open(path) as image:
+                source_size = image.size
+            with self._lock:
+                self._source_sizes[source_key] = source_size
+
+        target_size = compute_target_size(*source_size, window_width, window_height)
+        with span('image.resize', path=path, size=target_size, kind=kind):
+            image = decode(path, mtime, target_size)
+        if persistent and self.thumbnails is not None:
+            self.thumbnails.save(path, stat, (window_width, window_height), image, kind)
+        return self._store((path, mtime, target_size, kind), image)
+
+    def _cached(self, path, stat, window_width, window_height, kind, persistent):
+        """在内存缓存和磁盘缩略图中查找，都没有时返回 None"""
+        mtime = stat.st_mtime_ns
+        with self._lock:
+            source_size = self._source_sizes.get((path, mtime))
+            if source_size is not None:
+                key = (path, mtime, compute_target_size(*source_size, window_width, window_height), kind)
+                image = self._images.get(key)
+                if image is not None:
+                    self._images.move_to_end(key)
+                    self.hits += 1
+                    return image
+        if persistent and self.thumbnails is not None:
+            # 冷启动时内存缓存为空，省内存模式下图片用过即被淘汰：磁盘上有缩略图就不必打开原图
+            image = self.thumbnails.load(path, stat, (window_width, window_height), kind)
+            if image is not None:
+                return self._store((path, mtime, image.size, kind), image)
+        return None
+
+    def _store(self, key, image):
+        with self._lock:
+            if key not in self._images:
+                self._images[key] = image
+                self.current_bytes += image_nbytes(image)
+                self._evict()
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._source_sizes.clear()
+            self._pyramids.clear()
+            self.current_bytes = 0
+
+    def _evict(self):
+        # 至少保留最近使用的一张，避免单张大图无法显示
+        while self.current_bytes > self.max_bytes and len(self._images) > int(self.keep_last):
+            _, image = self._images.popitem(last=False)
+            self.current_bytes -= image_nbytes(image)
+        while len(self._pyramids) > self.max_pyramids:
+            self._pyramids.popitem(last=False)
+
+
+def decode_for_window(path, window_width, window_height):
+    """
+    按窗口大小解码一张图片，不经过缓存，用于只显示一次的图片（如幻灯片）
+    """
+    with span('image.decode', path=path), Image.open(path) as image:
+        target_size = compute_target_size(*image.size, window_width, window_height)
+        image.draft(None, target_size)
+        return image.resize(target_size, Image.LANCZOS)
+
+
+def resize_high_quality(path, window_width, window_height):
+    """
+    在进程池中执行的 load：不经过缓存，返回 (文件状态, 原图尺寸, LANCZOS 缩放后的图片)，
+    结果交给主进程的 ImageCache.put
+    """
+    stat = os.stat(path)
+    pyramid = ImagePyramid(path)
+    target_size = compute_target_size(*pyramid.source_size, window_width, window_height)
+    return stat, pyramid.source_size, pyramid.resize(target_size, Image.LANCZOS)
+
+
+def decode_frames(path, target_size, max_bytes=MAX_DECODED_FRAME_BYTES):
+    """
+    逐帧解码动图并缩放到目标尺寸，同时读取每帧的显示时长。
+    各帧总大小超过 max_bytes 时改为压缩保存（PackedFrame），压缩后超过 MAX_PACKED_FRAME_BYTES 时截断
+    """
+    frames = []
+    total = 0
+    packed = False
+    with Image.open(path) as image:
+        for frame in ImageSequence.Iterator(image):
+            frame.load()
+            duration = frame.info.get('duration') or 0
+            if duration <= 10:
+                duration = DEFAULT_FRAME_DURATION
+            resized = frame.convert('RGBA').resize(target_size)
+            if not packed and total + image_nbytes(resized) > max_bytes:
+                packed = True
+                frames = [(PackedFrame(decoded), decoded_duration) for decoded, decoded_duration in frames]
+                total = sum(image_nbytes(decoded) for decoded, _ in frames)
+            if packed:
+                resized = PackedFrame(resized)
+                if total + image_nbytes(resized) > MAX_PACKED_FRAME_BYTES and frames:
+                    print(f"动图太大，只播放前 {len(frames)} 帧: {path}")
+                    break
+            total += image_nbytes(resized)
+            frames.append((resized, int(duration)))
+    return frames
+
+
+# 主窗口与配置窗口共用的缓存实例
+image_cache = ImageCache()
@@ -0,0 +1,43 @@
+"""
+一个进程中的多个小太阳共用一个 config.json。
+
+顶层字段是所有窗口的默认配置；可选的 "instances" 列表中每一项是一个窗口的配置分节，
+只需写出与顶层不同的字段。没有 "instances" 时只有一个窗口，直接使用顶层配置。
+"""
+
+
+# 所有窗口共用一个 Tk 解释器，这些字段只能在顶层设置
+SHARED_KEYS = ('theme', 'image_cache_mb', 'thumbnail_cache_mb', 'watch_interval', 'memory_budget',
+               'image_processes')
+
+
+def instance_count(data):
+    return max(len(data.get('instances') or ()), 1)
+
+
+def instance_config(data, index):
+    """第 index 个窗口的完整配置：顶层配置加上该窗口分节中的字段"""
+    config = {key: value for key, value in data.items() if key != 'instances'}
+    sections = data.get('instances') or ()
+    if index < len(sections):
+        config.update(
+            (key, value) for key, value in sections[index].items() if key not in SHARED_KEYS
+        )
+    return config
+
+
+def update_instance(data, index, values):
+    """
+    把第 index 个窗口的配置写回 data：共享字段写入顶层，其余写入该窗口的分节，
+    与顶层相同且分节中原本没有的字段不会被复制到分节中
+    """
+    sections = data.get('instances') or ()
+    section = sections[index] if index < len(sections) else None
+    for key, value in values.items():
+        if key == 'instances':
+            continue
+        if section is None or key in SHARED_KEYS:
+            data[key] = value
+        elif key in section or data.get(key) != value:
+            section[key] = value
+    return data
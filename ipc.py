@@ -0,0 +1,259 @@
+"""
+单实例运行：第一个启动的小太阳在本地套接字（Windows 上为命名管道）上接收控制命令。
+
+之后再次运行 Sunshine.py 时只连接已运行的实例，发送命令后立即退出，不会导入 Tk/ttkbootstrap：
+    python Sunshine.py --show-motto "..."   显示指定的箴言，直到下一次轮换
+    python Sunshine.py --next               换一条箴言
+    python Sunshine.py --reload             重新读取配置和箴言文件
+    python Sunshine.py --open-settings      打开设置窗口
+不带命令再次运行时，只把已运行的窗口显示到最前面。
+"""
+import json
+import os
+import socket
+import sys
+import zlib
+
+
+# 客户端等待响应的超时（秒）
+CLIENT_TIMEOUT = 2.0
+
+# 服务端读取一条请求的超时（秒）：客户端连接后会立即发送请求
+REQUEST_TIMEOUT = 0.5
+MAX_REQUEST_BYTES = 64 * 1024
+
+# 无法把套接字交给 Tk 事件循环时（Windows），检查新命令的间隔（毫秒）
+POLL_INTERVAL_MS = 250
+
+_USE_PIPE = sys.platform == 'win32'
+
+
+def endpoint(directory=None):
+    """
+    监听地址。配置文件按工作目录查找，因此每个目录对应一个实例，在不同目录运行的小太阳互不干扰
+    """
+    directory = os.path.abspath(directory or os.getcwd())
+    digest = f'{zlib.crc32(directory.encode("utf-8")):08x}'
+    if _USE_PIPE:
+        return rf'\\.\pipe\sunshine-{digest}'
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return os.path.join(runtime_dir, f'sunshine-{os.getuid()}-{digest}.sock')
+
+
+def add_arguments(parser):
+    group = parser.add_argument_group("控制已运行的小太阳 Control a running Sunshine")
+    group.add_argument(
+        '--show-motto',
+        metavar='TEXT',
+        help="显示指定的箴言 Show the given motto"
+    )
+    group.add_argument(
+        '--next',
+        action='store_true',
+        help="换一条箴言 Show another motto"
+    )
+    group.add_argument(
+        '--reload',
+        action='store_true',
+        help="重新读取配置和箴言文件 Reload the config and motto files"
+    )
+    group.add_argument(
+        '--open-settings',
+        action='store_true',
+        help="打开设置窗口 Open the settings window"
+    )
+    group.add_argument(
+        '--instance',
+        type=int,
+        metavar='N',
+        help="只控制第 N 个窗口（从 0 开始） Only control widget N (counting from 0)"
+    )
+
+
+def request_from_args(args):
+    """把命令行参数转换为一条请求，没有任何命令时返回 None"""
+    commands = []
+    if args.reload:
+        commands.append('reload')
+    if args.next:
+        commands.append('next')
+    if args.show_motto is not None:
+        commands.append('show-motto')
+    if args.open_settings:
+        commands.append('open-settings')
+    if not commands:
+        return None
+    return {'commands': commands, 'text': args.show_motto, 'instance': args.instance}
+
+
+def forward(argv):
+    """
+    把命令行中的命令发给已运行的实例，返回进程退出码；返回 None 表示应当正常启动
+    """
+    if '-h' in argv or '--help' in argv:
+        return None
+    import argparse
+    parser = argparse.ArgumentParser(add_help=False)
+    add_arguments(parser)
+    args, _ = parser.parse_known_args(argv)
+    request = request_from_args(args)
+    try:
+        response = send(request or {'commands': ['show']})
+    except (OSError, ValueError):
+        if request is None:
+            return None
+        print("小太阳没有运行 Sunshine is not running", file=sys.stderr)
+        return 1
+    if request is None:
+        print("小太阳已在运行 Sunshine is already running")
+    if not response.get('ok'):
+        print(response.get('error'), file=sys.stderr)
+        return 1
+    return 0
+
+
+def send(request, address=None):
+    """发送一条请求并等待响应；没有实例在运行时抛出 OSError"""
+    address = address or endpoint()
+    data = json.dumps(request, ensure_ascii=False).encode('utf-8')
+    if _USE_PIPE:
+        from multiprocessing.connection import Client
+        with Client(address, family='AF_PIPE') as connection:
+            connection.send_bytes(data)
+            return json.loads(connection.recv_bytes(MAX_REQUEST_BYTES))
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.connect(address)
+        sock.sendall(data + b'\n')
+        return json.loads(_read_line(sock))
+
+
+def _read_line(sock):
+    data = b''
+    while not data.endswith(b'\n') and len(data) < MAX_REQUEST_BYTES:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+class CommandServer:
+    """
+    在 Tk 事件循环中接收控制命令。
+
+    Unix 上监听套接字直接交给 Tk 的事件循环，空闲时没有任何唤醒；
+    Windows 上由后台线程在命名管道上等待连接，请求经队列交给调度器中的低频任务处理。
+    handler(request) 总是在 Tk 线程中调用，返回错误信息或 None。
+    """
+    def __init__(self, scheduler, handler, address=None, task_name='ipc'):
+        self.scheduler = scheduler
+        self.root = scheduler.root
+        self.handler = handler
+        self.address = address or endpoint()
+        self.task_name = task_name
+        self._sock = None
+        self._listener = None
+        self._queue = None
+
+    def start(self):
+        """开始监听；已有其他实例在监听时返回 False"""
+        if _USE_PIPE:
+            return self._start_pipe()
+        return self._start_socket()
+
+    def close(self):
+        if self._sock is not None:
+            self.root.tk.deletefilehandler(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        if self._listener is not None:
+            self.scheduler.cancel(self.task_name)
+            self._listener.close()
+            self._listener = None
+
+    def _start_socket(self):
+        import tkinter as tk
+        if os.path.exists(self.address):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.settimeout(CLIENT_TIMEOUT)
+                    probe.connect(self.address)
+                return False
+            except OSError:
+                # 上一次运行没有正常退出，留下了无人监听的套接字文件
+                os.unlink(self.address)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self.address)
+            os.chmod(self.address, 0o600)
+            sock.listen()
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            return False
+        self._sock = sock
+        self.root.tk.createfilehandler(sock.fileno(), tk.READABLE, self._on_readable)
+        return True
+
+    def _on_readable(self, fd, mask):
+        try:
+            connection, _ = self._sock.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        with connection:
+            connection.settimeout(REQUEST_TIMEOUT)
+            try:
+                data = _read_line(connection)
+                # 其他实例启动时只连接一下确认是否有实例在运行，不发送请求
+                if data:
+                    connection.sendall(self._respond(data) + b'\n')
+            except OSError as e:
+                print(f"无法处理控制命令: {e}")
+
+    def _start_pipe(self):
+        from multiprocessing.connection import Listener
+        import queue
+        import threading
+        try:
+            # 同名管道已存在时创建失败，说明已有实例在运行
+            self._listener = Listener(self.address, family='AF_PIPE')
+        except OSError:
+            return False
+        self._queue = queue.Queue()
+        threading.Thread(target=self._accept_loop, args=(self._listener,), daemon=True).start()
+        self.scheduler.add(self.task_name, POLL_INTERVAL_MS, self._drain)
+        return True
+
+    def _accept_loop(self, listener):
+        while True:
+            try:
+                connection = listener.accept()
+            except OSError:
+                return
+            try:
+                data = connection.recv_bytes(MAX_REQUEST_BYTES)
+            except (OSError, EOFError):
+                connection.close()
+                continue
+            self._queue.put((connection, data))
+
+    def _drain(self):
+        while not self._queue.empty():
+            connection, data = self._queue.get_nowait()
+            with connection:
+                try:
+                    connection.send_bytes(self._respond(data))
+                except OSError as e:
+                    print(f"无法处理控制命令: {e}")
+
+    def _respond(self, data):
+        try:
+            error = self.handler(json.loads(data))
+        except (ValueError, KeyError, TypeError) as e:
+            error = f"无效的控制命令 Invalid command: {e}"
+        return json.dumps({'ok': error is None, 'error': error}, ensure_ascii=False).encode('utf-8')
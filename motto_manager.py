@@ -0,0 +1,301 @@
+"""
+设置窗口中的箴言管理：搜索、添加、修改和删除 mottos_path 中的箴言。
+
+箴言文件在后台线程中读取，倒排索引（见 motto_search.py）在空闲时分批建立，
+列表只创建可见的几行，箴言库再大也不会为每条箴言创建一个控件。
+修改先保存在内存中，点击设置窗口的保存按钮时才写回文件，取消则全部丢弃。
+"""
+import os
+import time
+import tkinter as tk
+import ttkbootstrap as ttk
+
+from background import run_in_background
+from motto_search import MottoIndex
+from motto_store import read_motto_file, write_motto_temp
+from tracing import span
+
+
+# 每次建索引占用事件循环的时间（秒），其余时间留给输入和绘制
+INDEX_SLICE_S = 0.008
+
+# 列表可见的行数
+VISIBLE_ROWS = 8
+
+
+class VirtualList(ttk.Frame):
+    """
+    只创建可见行的列表：条目可以有几十万条，Listbox 中始终只有 rows 行，
+    滚动时按位置向 getter 取出这几行的文本
+    """
+    def __init__(self, master, rows=VISIBLE_ROWS, width=36, on_select=None):
+        super().__init__(master)
+        self.rows = rows
+        self.on_select = on_select
+        self.count = 0
+        self.getter = None
+        self.top = 0
+        self.selected = None
+
+        self.listbox = tk.Listbox(
+            self,
+            height=rows,
+            width=width,
+            activestyle='none',
+            exportselection=False
+        )
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.listbox.bind('<<ListboxSelect>>', self._on_listbox_select)
+        self.listbox.bind('<MouseWheel>', self._on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda e: self.scroll_to(self.top - 3))
+        self.listbox.bind('<Button-5>', lambda e: self.scroll_to(self.top + 3))
+        self.listbox.bind('<Up>', lambda e: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda e: self._move_selection(1))
+        self.listbox.bind('<Prior>', lambda e: self._move_selection(-self.rows))
+        self.listbox.bind('<Next>', lambda e: self._move_selection(self.rows))
+
+    def set_items(self, count, getter, selected=None):
+        """替换全部条目；selected 为要保持选中的位置"""
+        self.count = count
+        self.getter = getter
+        self.selected = selected
+        if selected is not None:
+            self.scroll_to(selected - self.rows // 2)
+        else:
+            self.scroll_to(0)
+
+    def scroll_to(self, top):
+        self.top = max(0, min(top, self.count - self.rows))
+        self.refresh()
+        return 'break'
+
+    def yview(self, *args):
+        """滚动条的回调：('moveto', 比例) 或 ('scroll', 数量, 'units' / 'pages')"""
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * self.count))
+        elif args[0] == 'scroll':
+            step = self.rows if args[2] == 'pages' else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    def refresh(self):
+        end = min(self.top + self.rows, self.count)
+        self.listbox.delete(0, 'end')
+        if end > self.top:
+            self.listbox.insert('end', *(self.getter(i) for i in range(self.top, end)))
+        if self.selected is not None and self.top <= self.selected < end:
+            self.listbox.selection_set(self.selected - self.top)
+        if self.count:
+            self.scrollbar.set(self.top / self.count, end / self.count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def select(self, index):
+        self.selected = index
+        if not self.top <= index < self.top + self.rows:
+            self.top = max(0, min(index - self.rows // 2, self.count - self.rows))
+        self.refresh()
+        if self.on_select:
+            self.on_select(index)
+
+    def _on_listbox_select(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            self.select(self.top + selection[0])
+
+    def _on_mousewheel(self, event):
+        # Windows 上每一格为 120
+        return self.scroll_to(self.top - int(event.delta / 120) * 3)
+
+    def _move_selection(self, step):
+        if self.count:
+            current = self.selected if self.selected is not None else self.top - 1
+            self.select(max(0, min(current + step, self.count - 1)))
+        return 'break'
+
+
+class MottoManager(ttk.Frame):
+    """箴言管理面板，path 为当前窗口的 mottos_path"""
+    def __init__(self, master, texts, path):
+        super().__init__(master)
+        self.texts = texts
+        self.path = path
+        # 键 -> 箴言（字符串或带规则的对象），键的先后即文件中的顺序
+        self.items = {}
+        self.extra = {}
+        self.next_key = 0
+        self.index = MottoIndex()
+        self.results = []
+        self.selected_key = None
+        self.loaded = False
+        self.dirty = False
+        self._search_job = None
+        self._build_job = None
+
+        # 搜索
+        search_frame = ttk.Frame(self)
+        search_frame.pack(fill='x', pady=(0, 5))
+        self.texts.register(ttk.Label(search_frame), 'motto_search_label').pack(side='left')
+        self.count_label = ttk.Label(search_frame)
+        self.count_label.pack(side='right')
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', lambda *args: self.schedule_search())
+        ttk.Entry(search_frame, textvariable=self.search_var).pack(side='left', fill='x', expand=True, padx=5)
+
+        # 搜索结果
+        self.list = VirtualList(self, on_select=self.on_select)
+        self.list.pack(fill='both', expand=True)
+
+        # 编辑
+        self.edit_var = tk.StringVar()
+        ttk.Entry(self, textvariable=self.edit_var).pack(fill='x', pady=(5, 5))
+        button_frame = ttk.Frame(self)
+        button_frame.pack(fill='x')
+        self.texts.register(ttk.Button(
+            button_frame,
+            command=self.delete_motto,
+            bootstyle="danger-outline"
+        ), 'motto_delete_btn').pack(side='right')
+        self.texts.register(ttk.Button(
+            button_frame,
+            command=self.update_motto,
+            bootstyle="info-outline"
+        ), 'motto_update_btn').pack(side='right', padx=5)
+        self.texts.register(ttk.Button(
+            button_frame,
+            command=self.add_motto,
+            bootstyle="success-outline"
+        ), 'motto_add_btn').pack(side='right')
+
+        self.count_label.configure(text='…')
+        # 结果交给主窗口轮询：设置窗口在读取完成前关闭也不影响
+        run_in_background(self.nametowidget('.'), read_motto_file, self.on_loaded, path)
+
+    def on_loaded(self, result, error):
+        if not self.winfo_exists():
+            return
+        if error is not None:
+            print(f"无法加载箴言文件: {error}")
+            self.count_label.configure(text=self.texts.text('motto_load_error'))
+            return
+        items, self.extra = result
+        for item in items:
+            self.add_item(item)
+        self.loaded = True
+        self.schedule_build()
+        self.run_search()
+
+    def add_item(self, item):
+        key = self.next_key
+        self.next_key += 1
+        self.items[key] = item
+        self.index.add(key, item_text(item))
+        return key
+
+    def schedule_build(self):
+        """在空闲时分批建索引，每批不超过 INDEX_SLICE_S"""
+        if self._build_job is None and self.index.pending:
+            self._build_job = self.after(1, self._build_step)
+
+    def _build_step(self):
+        self._build_job = None
+        with span('motto.index', pending=self.index.pending):
+            done = self.index.build(time.perf_counter() + INDEX_SLICE_S)
+        if not done:
+            self.schedule_build()
+
+    def schedule_search(self):
+        """合并同一轮事件中的多次输入，只搜索一次"""
+        if self._search_job is None:
+            self._search_job = self.after_idle(self.run_search)
+
+    def run_search(self):
+        self._search_job = None
+        if not self.loaded:
+            return
+        query = self.search_var.get()
+        with span('motto.search', query=query):
+            self.results = self.index.search(query)
+        try:
+            selected = self.results.index(self.selected_key) if self.selected_key is not None else None
+        except ValueError:
+            selected = None
+        self.list.set_items(len(self.results), self.row_text, selected)
+        self.count_label.configure(text=f'{len(self.results)} / {len(self.items)}')
+
+    def row_text(self, position):
+        # 列表每条只显示一行
+        return ' '.join(item_text(self.items[self.results[position]]).split())
+
+    def on_select(self, position):
+        self.selected_key = self.results[position]
+        self.edit_var.set(item_text(self.items[self.selected_key]))
+
+    def add_motto(self):
+        text = self.edit_var.get().strip()
+        if not text or not self.loaded:
+            return
+        self.selected_key = self.add_item(text)
+        self.changed()
+
+    def update_motto(self):
+        text = self.edit_var.get().strip()
+        if not text or self.selected_key is None:
+            return
+        item = self.items[self.selected_key]
+        # 带规则的箴言只修改文本，权重、标签等保持不变
+        self.items[self.selected_key] = dict(item, text=text) if isinstance(item, dict) else text
+        self.index.add(self.selected_key, text)
+        self.changed()
+
+    def delete_motto(self):
+        if self.selected_key is None:
+            return
+        del self.items[self.selected_key]
+        self.index.remove(self.selected_key)
+        self.selected_key = None
+        self.edit_var.set('')
+        self.changed()
+
+    def changed(self):
+        self.dirty = True
+        self.schedule_build()
+        self.run_search()
+
+    def save(self, replace=os.replace):
+        """
+        在后台写回箴言文件，写完后在 Tk 线程中调用 replace(临时文件, 箴言文件) 替换原文件；
+        使用该文件的小太阳会在文件变化后重新加载
+        """
+        if not self.dirty:
+            return
+        path = self.path
+        self.dirty = False
+
+        def on_written(temp_path, error):
+            if error is None:
+                try:
+                    replace(temp_path, path)
+                except OSError as e:
+                    error = e
+            if error is not None:
+                print(f"无法保存箴言文件: {error}")
+
+        # 设置窗口保存后立即关闭，回调不引用这个面板
+        run_in_background(
+            self.nametowidget('.'),
+            write_to_temp,
+            on_written,
+            path, list(self.items.values()), dict(self.extra)
+        )
+
+
+def write_to_temp(path, items, extra):
+    with span('motto.save', count=len(items)):
+        return write_motto_temp(path, items, extra)
+
+
+def item_text(item):
+    return item.get('text', '') if isinstance(item, dict) else str(item)
@@ -0,0 +1,180 @@
+"""
+箴言库的倒排索引，供设置窗口中的箴言管理边输入边搜索。
+
+中文（及日文假名）按单字和相邻两字建索引，英文按单词建索引并支持前缀匹配；
+查询词之间以空格分隔，每个查询词都须出现在箴言中（不区分大小写）。
+索引先给出候选箴言，再逐条确认查询词确实连续出现，候选很少时不必扫描整个箴言库。
+增删改只更新受影响的箴言；新加入的箴言可以分批建索引（build），尚未建索引的箴言在搜索时逐条比较。
+"""
+from collections import deque
+import re
+import time
+
+
+_CJK_RUN = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+_WORD = re.compile('[0-9a-z\u00c0-\u024f]+')
+
+# 英文前缀按前两个字母分桶；一个前缀匹配的单词超过这个数时不再展开，改为逐条比较
+MAX_PREFIX_WORDS = 256
+
+
+def index_terms(text):
+    """一条（已转为小写的）箴言的索引项：(中文单字和相邻两字, 英文单词)"""
+    characters = set()
+    for run in _CJK_RUN.findall(text):
+        characters.update(run)
+        characters.update(run[i:i + 2] for i in range(len(run) - 1))
+    return characters, set(_WORD.findall(text))
+
+
+class MottoIndex:
+    """以整数键标识箴言的倒排索引，键的先后即箴言在箴言库中的顺序"""
+    def __init__(self):
+        # 键 -> 小写的箴言，用于确认候选和删除时找回索引项
+        self._texts = {}
+        # 索引项 -> 含有它的箴言键集合
+        self._postings = {}
+        # 英文单词的前两个字母 -> 单词集合，用于前缀匹配
+        self._prefixes = {}
+        # 英文单词的首字母 -> 含有以它开头的单词的箴言键集合，用于只输入了一个字母的查询
+        self._initials = {}
+        # 尚未建索引的箴言键：按加入顺序排队，删除或再次修改时只从集合中移除
+        self._pending = set()
+        self._queue = deque()
+
+    def __len__(self):
+        return len(self._texts)
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def add(self, key, text):
+        """加入或修改一条箴言，在下一次 build 时建索引"""
+        if key in self._texts and key not in self._pending:
+            self._unindex(key)
+        self._texts[key] = text.lower()
+        if key not in self._pending:
+            self._pending.add(key)
+            self._queue.append(key)
+
+    def remove(self, key):
+        if key not in self._texts:
+            return
+        if key in self._pending:
+            self._pending.discard(key)
+        else:
+            self._unindex(key)
+        del self._texts[key]
+
+    def build(self, deadline=None):
+        """
+        为尚未建索引的箴言建索引；给出 deadline（time.perf_counter() 的时刻）时到时即停，
+        全部完成时返回 True
+        """
+        while self._queue:
+            key = self._queue.popleft()
+            if key not in self._pending:
+                continue
+            self._pending.discard(key)
+            characters, words = index_terms(self._texts[key])
+            all_postings = self._postings
+            for term in characters:
+                postings = all_postings.get(term)
+                if postings is None:
+                    all_postings[term] = {key}
+                else:
+                    postings.add(key)
+            for word in words:
+                postings = all_postings.get(word)
+                if postings is None:
+                    all_postings[word] = {key}
+                    if len(word) >= 2:
+                        self._prefixes.setdefault(word[:2], set()).add(word)
+                else:
+                    postings.add(key)
+                self._initials.setdefault(word[0], set()).add(key)
+            if deadline is not None and time.perf_counter() >= deadline:
+                return not self._pending
+        return True
+
+    def search(self, query):
+        """返回按箴言库顺序排列的匹配键列表；查询为空时返回所有箴言"""
+        words = query.lower().split()
+        if not words:
+            return list(self._texts)
+        sets, checks = self._plan(words)
+        texts = self._texts
+        if not sets:
+            # 查询中没有可以查索引的字词（如只有标点），逐条比较
+            patterns = [word_pattern(word) for word in words]
+            return [key for key in texts if all(pattern.search(texts[key]) for pattern in patterns)]
+        sets.sort(key=len)
+        candidates = sets[0]
+        for postings in sets[1:]:
+            if not candidates:
+                break
+            candidates = candidates & postings
+        keys = sorted(candidates)
+        if checks:
+            keys = [key for key in keys if all(pattern.search(texts[key]) for pattern in checks)]
+        if self._pending:
+            # 尚未建索引的箴言逐条比较
+            patterns = [word_pattern(word) for word in words]
+            keys += [
+                key for key in self._pending
+                if all(pattern.search(texts[key]) for pattern in patterns)
+            ]
+            keys.sort()
+        return keys
+
+    def _plan(self, words):
+        """
+        每个查询词对应的候选集合，以及索引不能精确回答、需要逐条确认的查询词：
+        单个不超过两字的中文词、单个英文单词（前缀）可以直接由索引回答
+        """
+        sets = []
+        checks = []
+        for word in words:
+            runs = _CJK_RUN.findall(word)
+            parts = _WORD.findall(word)
+            exact = len(runs) + len(parts) == 1 and ''.join(runs + parts) == word
+            for run in runs:
+                if len(run) == 1:
+                    sets.append(self._postings.get(run, set()))
+                else:
+                    exact = exact and len(run) == 2
+                    sets.extend(self._postings.get(run[i:i + 2], set()) for i in range(len(run) - 1))
+            for part in parts:
+                matches = [term for term in self._prefixes.get(part[:2], ()) if term.startswith(part)]
+                if len(part) >= 2 and len(matches) <= MAX_PREFIX_WORDS:
+                    sets.append(set().union(*(self._postings[term] for term in matches)))
+                else:
+                    # 只输入了一个字母，或前缀太常见：先按首字母缩小范围
+                    exact = exact and len(part) == 1
+                    sets.append(self._initials.get(part[0], set()))
+            if not exact:
+                checks.append(word_pattern(word))
+        return sets, checks
+
+    def _unindex(self, key):
+        characters, words = index_terms(self._texts[key])
+        for term in characters | words:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.discard(key)
+            if not postings:
+                del self._postings[term]
+                if term in words:
+                    self._prefixes.get(term[:2], set()).discard(term)
+        for initial in {word[0] for word in words}:
+            self._initials[initial].discard(key)
+
+
+def word_pattern(word):
+    """查询词的匹配规则：以英文字母或数字开头时须位于单词开头，否则为子串"""
+    pattern = re.escape(word)
+    if _WORD.match(word):
+        pattern = '(?<![0-9a-z\u00c0-\u024f])' + pattern
+    return re.compile(pattern)
@@ -0,0 +1,351 @@
+"""
+按规则挑选箴言：权重、标签、语言和时段过滤，以及不重复窗口 / 洗牌模式。
+
+mottos.json 中的箴言除了字符串，也可以写成带规则的对象：
+
+    {"text": "早安，小太阳！", "weight": 3, "tags": ["morning"], "lang": "zh", "hours": [6, 11]}
+
+- weight：相对权重，默认 1，0 表示不再出现
+- tags：标签；配置了 motto_tags 时只挑选带有其中任一标签的箴言
+- lang：语言；开启 motto_language_filter 时只挑选与界面语言一致的箴言，未写明时按是否含有中文判断
+- hours：显示的时段 [开始, 结束)，按本地时间的小时计算，开始大于结束时跨越午夜
+
+每段箴言（mottos.json 本身或一个箴言源）按当前的过滤条件预先建好别名表，抽一条只需常数时间；
+过滤条件或某段箴言变化时只重建受影响的表。
+"""
+from array import array
+from collections import deque
+import random
+import re
+import time
+
+
+# 不重复窗口中的箴言被抽中时先重抽几次（通常一次就够），仍然落在窗口中时改为逐条扫描，
+# 在窗口之外的箴言中按权重抽取
+NO_REPEAT_ATTEMPTS = 8
+
+# 置换的混合轮数，每轮为一次奇数乘法、加法和右移异或，都是 2^k 上的双射
+PERMUTATION_ROUNDS = 3
+
+_CJK = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+
+
+class Rule:
+    """一条箴言的挑选规则"""
+    __slots__ = ('weight', 'tags', 'lang', 'hours')
+
+    def __init__(self, weight=1.0, tags=(), lang=None, hours=None):
+        self.weight = weight
+        self.tags = frozenset(tags)
+        self.lang = lang
+        self.hours = hours
+
+    def in_hours(self, hour):
+        if self.hours is None:
+            return True
+        start, end = self.hours
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+
+def parse_rule(item):
+    """从 mottos.json 中的一项箴言读取规则，没有规则字段或不是对象时返回 None"""
+    if not isinstance(item, dict) or not item.keys() & {'weight', 'tags', 'lang', 'hours'}:
+        return None
+    weight = item.get('weight', 1)
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+        print(f"箴言权重无效，使用 1: {weight!r}")
+        weight = 1
+    tags = item.get('tags') or ()
+    if isinstance(tags, str):
+        tags = (tags,)
+    hours = item.get('hours')
+    if hours is not None:
+        try:
+            start, end = (int(hour) % 24 for hour in hours)
+            hours = (start, end)
+        except (TypeError, ValueError):
+            print(f"箴言时段无效，忽略: {hours!r}")
+            hours = None
+    return Rule(float(weight), (str(tag) for tag in tags), language_code(item.get('lang')), hours)
+
+
+def language_code(language):
+    """'zh_CN'、'zh-TW'、'zh' 都视为 'zh'"""
+    if not language:
+        return None
+    return re.split('[_-]', str(language), 1)[0].lower()
+
+
+def detect_language(text):
+    return 'zh' if _CJK.search(text) else 'en'
+
+
+class MottoSegment:
+    """
+    箴言库中的一段箴言：mottos.json 本身，或一个箴言源。
+
+    texts 为可按序号取值的箴言序列，rules 为对应的规则列表（都没有规则时为 None）；
+    各过滤条件下的抽样表缓存在段内，同一箴言库的所有窗口共用，箴言源更新时整段替换。
+    detect_language 为 False 时（大型按行箴言库）不扫描全文判断语言，语言过滤对这一段不生效。
+    """
+    def __init__(self, texts, rules=None, detect_language=True):
+        self.texts = texts
+        self.rules = rules if rules and any(rules) else None
+        self.detect_language = detect_language
+        rules = [rule for rule in self.rules or () if rule is not None]
+        self.uses_hours = any(rule.hours is not None for rule in rules)
+        self.uses_language = detect_language or any(rule.lang is not None for rule in rules)
+        self._languages = None
+        self._tables = {}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def table(self, language, hour, tags):
+        """按过滤条件返回抽样表，没有规则影响的条件归一化后共用一张表"""
+        if not self.uses_language:
+            language = None
+        if not self.uses_hours:
+            hour = None
+        key = (language, hour, tags)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = self._build(language, hour, tags)
+        return table
+
+    def _build(self, language, hour, tags):
+        count = len(self.texts)
+        if language is None and tags is None and self.rules is None:
+            return UniformTable(range(count))
+        if language is not None and self.detect_language and self._languages is None:
+            self._languages = [detect_language(self.texts[i]) for i in range(count)]
+        indices = array('I')
+        weights = []
+        for i in range(count):
+            rule = self.rules[i] if self.rules is not None else None
+            if rule is not None:
+                if rule.weight <= 0 or (hour is not None and not rule.in_hours(hour)):
+                    continue
+                if tags is not None and not rule.tags & tags:
+                    continue
+            elif tags is not None:
+                continue
+            if language is not None:
+                quote_language = rule.lang if rule is not None and rule.lang else (
+                    self._languages[i] if self._languages is not None else None
+                )
+                if quote_language is not None and quote_language != language:
+                    continue
+            indices.append(i)
+            weights.append(rule.weight if rule is not None else 1.0)
+        if len(set(weights)) <= 1:
+            return UniformTable(indices)
+        return AliasTable(indices, weights)
+
+
+class UniformTable:
+    """等权重的抽样表"""
+    def __init__(self, indices):
+        self.indices = indices
+        self.total = float(len(indices))
+
+    def __len__(self):
+        return len(self.indices)
+
+    def sample(self, rng):
+        return self.indices[rng.randrange(len(self.indices))]
+
+    def weight(self, position):
+        return 1.0
+
+
+class AliasTable:
+    """Vose 别名表：构建 O(n)，按权重抽一条 O(1)"""
+    def __init__(self, indices, weights):
+        count = len(weights)
+        self.indices = indices
+        self.weights = array('d', weights)
+        self.total = sum(weights)
+        self.probability = array('d', bytes(8 * count))
+        self.alias = array('I', bytes(4 * count))
+        scaled = [weight * count / self.total for weight in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        # 剩下的都是浮点误差，概率视为 1
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def __len__(self):
+        return len(self.indices)
+
+    def sample(self, rng):
+        i = rng.randrange(len(self.indices))
+        if rng.random() >= self.probability[i]:
+            i = self.alias[i]
+        return self.indices[i]
+
+    def weight(self, position):
+        return self.weights[position]
+
+
+class Permutation:
+    """
+    [0, n) 的一个随机排列，按位置逐个计算，不需要 O(n) 内存：
+    在 2^k 上做几轮可逆的混合，超出 n 的值继续混合直到落回 [0, n)（平均不到两次）
+    """
+    def __init__(self, count, rng):
+        self.count = count
+        bits = max((count - 1).bit_length(), 1)
+        self.mask = (1 << bits) - 1
+        self.shift = max(bits // 2, 1)
+        self.keys = [
+            (rng.getrandbits(bits) | 1, rng.getrandbits(bits)) for _ in range(PERMUTATION_ROUNDS)
+        ]
+
+    def _mix(self, value):
+        for multiplier, increment in self.keys:
+            value = (value * multiplier + increment) & self.mask
+            value ^= value >> self.shift
+        return value
+
+    def __getitem__(self, position):
+        value = self._mix(position)
+        while value >= self.count:
+            value = self._mix(value)
+        return value
+
+
+class MottoPicker:
+    """
+    一个窗口的箴言挑选器。箴言库和抽样表由所有窗口共用，最近显示过的箴言和洗牌进度属于各个窗口。
+
+    mode 为 'random' 时按权重随机抽取，最近 no_repeat 条不再出现（符合条件的箴言不超过 no_repeat 条时除外）；
+    为 'shuffle' 时每一轮把符合条件的箴言各显示一次，顺序随机（权重只用于排除权重为 0 的箴言）。
+    """
+    def __init__(self, store, mode='random', no_repeat=1, language=None, tags=None, rng=None):
+        self.store = store
+        self.rng = rng or random.Random()
+        self.recent = deque()
+        self._bag = None
+        self._bag_key = None
+        self._bag_position = 0
+        self.configure(mode, no_repeat, language, tags)
+
+    def configure(self, mode='random', no_repeat=1, language=None, tags=None):
+        """
+        修改挑选规则；language 为 None 时不按语言过滤，tags 为空时不按标签过滤
+        """
+        self.mode = mode
+        self.no_repeat = max(int(no_repeat), 0)
+        self.language = language_code(language)
+        self.tags = frozenset(tags) if tags else None
+        self._bag = None
+        while len(self.recent) > self.no_repeat:
+            self.recent.popleft()
+
+    def set_store(self, store):
+        self.store = store
+        self.recent.clear()
+        self._bag = None
+
+    def next(self):
+        candidates = self._candidates(time.localtime().tm_hour)
+        if not candidates:
+            return self.store.random()
+        if self.mode == 'shuffle':
+            segment, index = self._next_from_bag(candidates)
+        else:
+            segment, index = self._sample(candidates)
+        self._remember((segment, index))
+        return segment.texts[index]
+
+    def _candidates(self, hour):
+        """每段箴言在当前条件下的抽样表；没有任何箴言符合条件时放宽为不过滤"""
+        segments = self.store.segments()
+        candidates = [
+            (segment, segment.table(self.language, hour, self.tags)) for segment in segments
+        ]
+        candidates = [(segment, table) for segment, table in candidates if len(table)]
+        if candidates or (self.language is None and self.tags is None):
+            return candidates
+        candidates = [(segment, segment.table(None, hour, None)) for segment in segments]
+        return [(segment, table) for segment, table in candidates if len(table)]
+
+    def _sample(self, candidates):
+        count = sum(len(table) for _, table in candidates)
+        window = min(self.no_repeat, count - 1)
+        recent = set(list(self.recent)[-window:]) if window > 0 else ()
+        total = sum(table.total for _, table in candidates)
+        for _ in range(NO_REPEAT_ATTEMPTS):
+            # 先按各段的总权重选段，段数很少，不随箴言数量增长
+            point = self.rng.random() * total
+            for segment, table in candidates:
+                point -= table.total
+                if point < 0:
+                    break
+            choice = (segment, table.sample(self.rng))
+            if choice not in recent:
+                return choice
+        return self._sample_excluding(candidates, recent)
+
+    def _sample_excluding(self, candidates, recent):
+        """
+        按权重在不重复窗口之外的箴言中抽一条。需要扫描所有候选，只在重抽多次仍落在窗口中时使用，
+        例如权重集中在最近显示过的几条箴言上
+        """
+        def eligible():
+            for segment, table in candidates:
+                for position, index in enumerate(table.indices):
+                    if (segment, index) not in recent:
+                        yield segment, index, table.weight(position)
+
+        total = sum(weight for _, _, weight in eligible())
+        point = self.rng.random() * total
+        for segment, index, weight in eligible():
+            choice = (segment, index)
+            point -= weight
+            if point < 0:
+                break
+        return choice
+
+    def _next_from_bag(self, candidates):
+        key = (self.language, self.tags, tuple(table for _, table in candidates))
+        count = sum(len(table) for _, table in candidates)
+        if self._bag is None or self._bag_key != key or self._bag_position >= count:
+            self._new_round(key, count, candidates)
+        position = self._bag[self._bag_position]
+        self._bag_position += 1
+        for segment, table in candidates:
+            if position < len(table):
+                return segment, table.indices[position]
+            position -= len(table)
+
+    def _new_round(self, key, count, candidates):
+        # 新一轮的第一条不能是刚显示过的箴言，重新打乱几次
+        for _ in range(NO_REPEAT_ATTEMPTS):
+            self._bag = Permutation(count, self.rng)
+            position = self._bag[0]
+            for segment, table in candidates:
+                if position < len(table):
+                    break
+                position -= len(table)
+            if count <= 1 or (segment, table.indices[position]) not in self.recent:
+                break
+        self._bag_key = key
+        self._bag_position = 0
+
+    def _remember(self, choice):
+        if self.no_repeat <= 0:
+            return
+        self.recent.append(choice)
+        while len(self.recent) > self.no_repeat:
+            self.recent.popleft()
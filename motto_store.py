@@ -0,0 +1,256 @@
+from array import array
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import tempfile
+
+from motto_select import MottoSegment, parse_rule
+
+
+# 箴言文件无法加载时显示的默认箴言
+DEFAULT_QUOTES = ["可爱的小太阳今天也要为你驱散阴霾！"]
+
+# 索引文件头：魔数 + 源文件大小 + 源文件修改时间，均为 8 字节以保证偏移数组对齐
+INDEX_MAGIC = b'SUNIDX01'
+INDEX_HEADER = struct.Struct('=8sQQ')
+
+
+class MottoStore:
+    """箴言库的公共接口：按序号取出一条箴言，或随机取出一条"""
+    # 额外的箴言源地址（见 feeds.py）和检查更新的间隔（秒）
+    feeds = ()
+    feed_refresh = None
+    # 是否一直打开（映射）着箴言文件；Windows 上这时不能替换该文件（见 SunshineApp.replace_motto_file）
+    holds_file = False
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def get(self, index):
+        raise NotImplementedError
+
+    def __getitem__(self, index):
+        return self.get(index)
+
+    def random(self):
+        if len(self) == 0:
+            return DEFAULT_QUOTES[0]
+        return self.get(random.randrange(len(self)))
+
+    def segments(self):
+        """
+        按段组织的箴言（见 motto_select.py），默认整个箴言库为一段，不带规则
+        """
+        if getattr(self, '_segments', None) is None:
+            self._segments = [MottoSegment(self, detect_language=False)]
+        return self._segments
+
+    def close(self):
+        pass
+
+
+class ListMottoStore(MottoStore):
+    """
+    保存在内存中的小型箴言库，对应 mottos.json 的格式。
+
+    箴言可以是字符串，也可以是带挑选规则的对象（见 motto_select.py）；
+    mottos.json 本身和每个箴言源各为一段，箴言源更新时只替换它自己的一段
+    """
+    def __init__(self, quotes, feeds=(), feed_refresh=None):
+        self._base = make_segment(quotes)
+        self.quotes = list(self._base.texts)
+        self.feeds = list(feeds)
+        self.feed_refresh = feed_refresh
+        # 箴言源地址 -> 该箴言源的一段箴言
+        self._sources = {}
+        self._segments = [self._base]
+
+    def set_source(self, name, quotes):
+        """加入或替换一个箴言源的箴言，其他箴言源不受影响"""
+        self._sources[name] = make_segment(quotes)
+        self._segments = [self._base, *self._sources.values()]
+        self.quotes = [quote for segment in self._segments for quote in segment.texts]
+
+    def __len__(self):
+        return len(self.quotes)
+
+    def get(self, index):
+        return self.quotes[index]
+
+
+class LineMottoStore(MottoStore):
+    """
+    每行一条箴言的大型箴言库（.txt 或 .jsonl）。
+
+    首次使用时扫描一遍文件，把每条箴言的起始字节偏移写入索引文件；
+    之后源文件和索引都通过 mmap 访问，随机取一条只需解析这一行，
+    启动时间和内存占用不随箴言数量增长。
+    """
+    holds_file = True
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+        self._index_file, self._index_map, self.offsets = self._open_index(stat)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get(self, index):
+        start = self.offsets[index]
+        end = self._data.find(b'\n', start)
+        if end < 0:
+            end = len(self._data)
+        return parse_line(self._data[start:end].decode('utf-8').strip())
+
+    def close(self):
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        self.offsets = []
+        for handle in (self._index_map, self._index_file, self._data, self._file):
+            if hasattr(handle, 'close'):
+                handle.close()
+
+    def _open_index(self, stat):
+        index_path = index_path_for(self.path)
+        if not self._index_is_fresh(index_path, stat):
+            try:
+                self._build_index(index_path, stat)
+            except OSError:
+                # 箴言文件所在目录不可写时，把索引放到临时目录
+                index_path = index_path_for(self.path, tempfile.gettempdir())
+                if not self._index_is_fresh(index_path, stat):
+                    self._build_index(index_path, stat)
+
+        index_file = open(index_path, 'rb')
+        if os.fstat(index_file.fileno()).st_size == INDEX_HEADER.size:
+            return index_file, None, []
+        index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets = memoryview(index_map)[INDEX_HEADER.size:].cast('Q')
+        return index_file, index_map, offsets
+
+    @staticmethod
+    def _index_is_fresh(index_path, stat):
+        try:
+            with open(index_path, 'rb') as f:
+                header = f.read(INDEX_HEADER.size)
+        except OSError:
+            return False
+        if len(header) != INDEX_HEADER.size:
+            return False
+        return INDEX_HEADER.unpack(header) == (INDEX_MAGIC, stat.st_size, stat.st_mtime_ns)
+
+    def _build_index(self, index_path, stat):
+        data = self._data
+        offsets = array('Q')
+        start = 0
+        length = len(data)
+        while start < length:
+            end = data.find(b'\n', start)
+            if end < 0:
+                end = length
+            # 跳过空行
+            if data[start:end].strip():
+                offsets.append(start)
+            start = end + 1
+
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns))
+            f.write(offsets.tobytes())
+        os.replace(temp_path, index_path)
+
+
+def index_path_for(path, directory=None):
+    if directory is None:
+        return path + '.idx'
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directory, f'sunshine-{digest}.idx')
+
+
+def make_segment(items):
+    """由 mottos.json 或箴言源中的箴言（字符串或对象）生成一段箴言"""
+    texts = []
+    rules = []
+    for item in items:
+        text = item.get('text', '') if isinstance(item, dict) else str(item)
+        if text:
+            texts.append(text)
+            rules.append(parse_rule(item))
+    return MottoSegment(texts, rules)
+
+
+def parse_line(line):
+    """解析一行箴言：JSON 字符串、带 text 字段的 JSON 对象，或纯文本"""
+    if line[:1] in ('{', '"'):
+        try:
+            value = json.loads(line)
+        except ValueError:
+            return line
+        if isinstance(value, dict):
+            return value.get('text', '')
+        return str(value)
+    return line
+
+
+def read_motto_file(path):
+    """
+    读取箴言文件供编辑：返回 (箴言列表, 其余内容)。
+    箴言为字符串或带规则的对象；.json 的其余内容（如 feeds）保存时原样写回
+    """
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return list(data.get('quotes', [])), {key: value for key, value in data.items() if key != 'quotes'}
+    items = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = line
+            if line[:1] in ('{', '"'):
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    pass
+            items.append(item)
+    return items, {}
+
+
+def write_motto_file(path, items, extra=None):
+    """把编辑后的箴言写回文件，保持原来的格式；先写临时文件再替换，监视文件的窗口只会读到完整的内容"""
+    os.replace(write_motto_temp(path, items, extra), path)
+
+
+def write_motto_temp(path, items, extra=None):
+    """
+    把箴言写入 path 旁边的临时文件并返回它的路径，可以在后台线程中调用；
+    替换原文件由调用方完成（原文件可能还被打开的箴言库映射着）
+    """
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        if os.path.splitext(path)[1].lower() == '.json':
+            json.dump({**(extra or {}), 'quotes': list(items)}, f, indent=4, ensure_ascii=False)
+        else:
+            for item in items:
+                # 对象、含换行或以引号、花括号开头的箴言写成 JSON，其余写成纯文本
+                if isinstance(item, str) and '\n' not in item and item[:1] not in ('{', '"'):
+                    f.write(item + '\n')
+                else:
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    return temp_path
+
+
+def open_motto_store(path):
+    """根据扩展名打开箴言库：.json 为小型列表，.txt / .jsonl 为按行索引的大型库"""
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return ListMottoStore(data['quotes'], data.get('feeds', ()), data.get('feed_refresh'))
+    return LineMottoStore(path)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+
+def user_cache_dir(*parts):
+    """
+    小太阳的缓存目录（不存在时创建）：Windows 上为 %LOCALAPPDATA%\\Sunshine\\Cache，
+    macOS 上为 ~/Library/Caches/Sunshine，其他系统遵循 XDG_CACHE_HOME；
+    可以用环境变量 SUNSHINE_CACHE_DIR 指定其他目录
+    """
+    base = os.environ.get('SUNSHINE_CACHE_DIR')
+    if not base:
+        if sys.platform == 'win32':
+            local = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+            base = os.path.join(local, 'Sunshine', 'Cache')
+        elif sys.platform == 'darwin':
+            base = os.path.expanduser('~/Library/Caches/Sunshine')
+        else:
+            base = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'sunshine')
+    directory = os.path.join(base, *parts)
+    os.makedirs(directory, exist_ok=True)
+    return directory
@@ -0,0 +1,327 @@
+"""
+无界面渲染：把小太阳的卡片（图片、主题配色的箴言、按钮）直接画成 PNG，不需要显示器和 Tk。
+
+    python Sunshine.py render                          # 随机一条箴言 -> sunshine.png
+    python Sunshine.py render --text "今天也要加油" -o card.png
+    python Sunshine.py render --all --out-dir cards    # 箴言库中的每一条，多进程并行
+
+布局与 Sunshine.create_widgets 一致；主题配色取自 ttkbootstrap 的主题定义，不需要创建 Tk。
+批量渲染时每个工作进程只解码、缩放一次图片，并预先画好除箴言以外的部分，
+每张卡片只需复制底图并写上箴言。
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from config_store import ConfigStore, CONFIG_PATH
+from i18n import gettext
+from image_cache import image_cache
+from motto_store import open_motto_store, DEFAULT_QUOTES
+from slideshow import is_image_collection, list_images
+from text_fit import (
+    TextFitter, MOTTO_FONT, MOTTO_HEIGHT, MOTTO_WRAPLENGTH, MOTTO_FIT_WIDTH
+)
+
+
+# 外边框和按钮区域的尺寸，对应 create_widgets 中的 padx/pady 和按钮 Frame
+OUTER_PADDING = 5
+BUTTON_AREA_HEIGHT = 50
+
+# Tk 的字号单位是磅，按 96 DPI 换算为像素
+POINTS_TO_PIXELS = 96 / 72
+
+# 依次尝试的字体文件：微软雅黑和常见的中文字体，Pillow 会在系统字体目录中查找
+FONT_CANDIDATES = (
+    'msyh.ttc', 'msyh.ttf', 'simhei.ttf',
+    'NotoSansCJK-Regular.ttc', 'NotoSansSC-Regular.otf', 'wqy-microhei.ttc',
+    'PingFang.ttc', 'Arial Unicode.ttf', 'DejaVuSans.ttf',
+)
+
+# 批量渲染时每个任务包含的卡片数
+CHUNK_SIZE = 16
+
+DEFAULT_OUTPUT = 'sunshine.png'
+DEFAULT_OUT_DIR = 'render'
+
+
+def theme_colors(theme):
+    """主题配色；只导入主题定义，不会初始化 Tk"""
+    from ttkbootstrap.themes.standard import STANDARD_THEMES
+    definition = STANDARD_THEMES.get(theme) or STANDARD_THEMES['minty']
+    return definition['colors']
+
+
+class FontSet:
+    """按字号缓存的字体；没有找到中文字体时退回 Pillow 内置字体（可能无法显示中文）"""
+    def __init__(self, path=None):
+        self.path = path
+        self._fonts = {}
+        self._warned = False
+
+    def get(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = self._load(max(int(round(size * POINTS_TO_PIXELS)), 1))
+        return font
+
+    def _load(self, pixels):
+        for candidate in ((self.path,) if self.path else FONT_CANDIDATES):
+            try:
+                font = ImageFont.truetype(candidate, pixels)
+            except OSError:
+                continue
+            self.path = candidate
+            if not self._warned and not supports_cjk(font):
+                # 如只找到了 DejaVuSans：中文会画成方框
+                self._warned = True
+                print(f"字体 {candidate} 不含中文字形，中文箴言会显示为方框，可用 --font 指定中文字体文件")
+            return font
+        if not self._warned:
+            self._warned = True
+            print(f"找不到字体 {self.path or MOTTO_FONT}，使用内置字体（可能无法显示中文），可用 --font 指定字体文件")
+        return ImageFont.load_default(pixels)
+
+
+def supports_cjk(font):
+    """字体是否含有中文字形：缺字时画出的是与不存在的字符相同的占位符"""
+    def glyph(text):
+        image = Image.new('L', (font.size * 2, font.size * 2))
+        ImageDraw.Draw(image).text((0, 0), text, fill=255, font=font)
+        return image.tobytes()
+    return glyph('\u4e2d') != glyph('\uffff')
+
+
+class _MeasureFont:
+    """让 TextFitter 用 Pillow 字体测量：提供与 tkinter.font.Font 相同的 measure 和 metrics"""
+    def __init__(self, font):
+        self.font = font
+
+    def measure(self, text):
+        return int(round(self.font.getlength(text)))
+
+    def metrics(self, option):
+        ascent, descent = self.font.getmetrics()
+        return ascent + descent
+
+
+class PillowTextFitter(TextFitter):
+    """与窗口中相同的自适应字号和换行规则，只是用 Pillow 字体测量文字"""
+    def __init__(self, fonts, *args, **kwargs):
+        super().__init__(None, MOTTO_FONT, *args, **kwargs)
+        self.fonts = fonts
+
+    def _font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = _MeasureFont(self.fonts.get(size))
+        return font
+
+
+def card_image_path(config):
+    """幻灯片模式使用文件夹中的第一张图片"""
+    path = config['image_path']
+    if is_image_collection(path):
+        images = list_images(path)
+        return images[0] if images else None
+    return path
+
+
+class CardRenderer:
+    """
+    画一张小太阳卡片。创建时解码图片并画好背景、图片和按钮，
+    之后每条箴言只需复制底图并写上文字
+    """
+    def __init__(self, config, font_path=None, buttons=True):
+        self.config = config
+        self.colors = theme_colors(config['theme'])
+        self.fonts = FontSet(font_path)
+        self.fitter = PillowTextFitter(self.fonts, MOTTO_FIT_WIDTH, MOTTO_HEIGHT)
+        self.base, self.motto_top = self._draw_base(buttons)
+
+    def _draw_base(self, buttons):
+        config = self.config
+        width = config['window_width']
+        height = config['window_height']
+        card = Image.new('RGB', (width + 2 * OUTER_PADDING, height + 2 * OUTER_PADDING), self.colors['bg'])
+        draw = ImageDraw.Draw(card)
+        draw.rectangle(
+            (OUTER_PADDING, OUTER_PADDING, OUTER_PADDING + width - 1, OUTER_PADDING + height - 1),
+            fill=self.colors['light']
+        )
+
+        # 1. 图片：宽 230、高为图片高度加 20 的框，上下各留 10px
+        image = None
+        path = card_image_path(config)
+        try:
+            if path is not None:
+                image = image_cache.load(path, width, height)
+        except Exception as e:
+            print(f"无法加载图片: {e}")
+        frame_top = OUTER_PADDING + 10
+        if image is not None:
+            frame_height = image.height + 20
+            x = OUTER_PADDING + (width - image.width) // 2
+            y = frame_top + (frame_height - image.height) // 2
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                card.paste(image, (x, y), image)
+            else:
+                card.paste(image.convert('RGB'), (x, y))
+        else:
+            frame_height = 75
+            self._draw_text(draw, gettext(config['language'], 'image_error'), self.colors['warning'],
+                            10, OUTER_PADDING + width // 2, frame_top + frame_height // 2, MOTTO_WRAPLENGTH)
+        motto_top = frame_top + frame_height + 10
+
+        # 3. 按钮：左边置顶、关闭，右边设置
+        if buttons:
+            self._draw_buttons(draw, motto_top + MOTTO_HEIGHT)
+        return card, motto_top
+
+    def _draw_buttons(self, draw, top):
+        language = self.config['language']
+        font = self.fonts.get(10)
+        center_y = top + BUTTON_AREA_HEIGHT // 2
+        char_width = font.getlength('0')
+        left = OUTER_PADDING + 3
+        right = OUTER_PADDING + self.config['window_width'] - 2
+        for key, color, chars, side in (
+            ('toggle_top', 'warning', 7, 'left'),
+            ('close', 'danger', 5, 'left'),
+            ('settings', 'secondary', 7, 'right'),
+        ):
+            text = gettext(language, key)
+            button_width = int(max(chars * char_width, font.getlength(text)) + 20)
+            if side == 'left':
+                box = (left, center_y - 15, left + button_width, center_y + 15)
+                left += button_width + 6
+            else:
+                box = (right - button_width, center_y - 15, right, center_y + 15)
+                right -= button_width + 4
+            draw.rounded_rectangle(box, radius=4, outline=self.colors[color], width=1)
+            draw.text(((box[0] + box[2]) / 2, center_y), text, fill=self.colors[color], font=font, anchor='mm')
+
+    def _draw_text(self, draw, text, color, size, center_x, center_y, wraplength):
+        font = self.fonts.get(size)
+        lines = self.fitter.wrap_lines(text, size, wraplength)
+        line_height = sum(font.getmetrics())
+        y = center_y - line_height * len(lines) / 2
+        for line in lines:
+            draw.text((center_x, y), line, fill=color, font=font, anchor='ma')
+            y += line_height
+
+    def render(self, text):
+        # 2. 箴言：与窗口中一样，自适应时按 TextFitter 选择字号和换行宽度
+        if self.config['auto_fit_font']:
+            size, wraplength = self.fitter.fit(text)
+        else:
+            size, wraplength = self.config['font_size'], MOTTO_WRAPLENGTH
+        card = self.base.copy()
+        self._draw_text(
+            ImageDraw.Draw(card), text, self.colors['info'], size,
+            OUTER_PADDING + self.config['window_width'] // 2,
+            self.motto_top + MOTTO_HEIGHT // 2,
+            wraplength
+        )
+        return card
+
+
+# 工作进程中的渲染器，由 _init_worker 创建，之后的任务都复用它
+_renderer = None
+
+
+def _init_worker(config, font_path, buttons):
+    global _renderer
+    _renderer = CardRenderer(config, font_path, buttons)
+
+
+def _render_to_file(task):
+    index, text, path = task
+    _renderer.render(text).save(path)
+    return index
+
+
+def render_all(config, texts, out_dir, jobs=None, font_path=None, buttons=True):
+    """把每条箴言渲染为 out_dir 中的一张 PNG，返回张数"""
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(i, text, os.path.join(out_dir, f'{i:05d}.png')) for i, text in enumerate(texts)]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks) or 1))
+    if jobs == 1:
+        _init_worker(config, font_path, buttons)
+        for task in tasks:
+            _render_to_file(task)
+        return len(tasks)
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(config, font_path, buttons)) as pool:
+        for _ in pool.imap_unordered(_render_to_file, tasks, chunksize=CHUNK_SIZE):
+            pass
+    return len(tasks)
+
+
+def load_texts(config):
+    """箴言库中的所有箴言，加上缓存中已有的箴言源（不联网）"""
+    try:
+        store = open_motto_store(config['mottos_path'])
+    except Exception as e:
+        print(f"无法加载箴言文件: {e}")
+        return []
+    try:
+        if store.feeds:
+            from feeds import FeedCache
+            cache = FeedCache()
+            for url in store.feeds:
+                entry = cache.load(url)
+                if entry is not None:
+                    store.set_source(url, entry.get('quotes', []))
+        return [store.get(i) for i in range(len(store))]
+    finally:
+        store.close()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='Sunshine.py render',
+        description="把小太阳卡片渲染为 PNG，不需要显示器 Render Sunshine cards to PNG without a display"
+    )
+    parser.add_argument('--text', help="要渲染的箴言，默认随机一条 The motto to render (default: a random one)")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT, help="输出文件 Output file")
+    parser.add_argument('--all', action='store_true',
+                        help="渲染箴言库中的每一条 Render every motto in the library")
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR,
+                        help="--all 的输出目录 Output directory for --all")
+    parser.add_argument('--jobs', type=int, help="进程数，默认为 CPU 核数 Worker processes (default: CPU count)")
+    parser.add_argument('--instance', type=int, default=0, help="使用第 N 个窗口的配置 Use widget N's config")
+    parser.add_argument('--config', default=CONFIG_PATH, help="配置文件 Config file")
+    parser.add_argument('--font', help="字体文件 Font file")
+    parser.add_argument('--no-buttons', action='store_true', help="不画按钮（用作壁纸） Omit the buttons")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    config = ConfigStore(args.config).instance(args.instance)
+    buttons = not args.no_buttons
+
+    if args.all:
+        texts = load_texts(config)
+        start = time.perf_counter()
+        count = render_all(config, texts, args.out_dir, args.jobs, args.font, buttons)
+        elapsed = time.perf_counter() - start
+        print(f"{count} cards -> {args.out_dir} in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.1f} cards/s)")
+        return 0
+
+    text = args.text
+    if text is None:
+        texts = load_texts(config)
+        text = random.choice(texts or DEFAULT_QUOTES)
+    CardRenderer(config, args.font, buttons).render(text).save(args.output)
+    print(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
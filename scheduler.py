@@ -0,0 +1,156 @@
+import math
+import time
+
+from tracing import tracer
+
+
+# 任务可以提前执行的比例：到期时间在这个范围内的任务合并到同一次唤醒中执行
+COALESCE_FRACTION = 0.1
+MAX_SLACK_MS = 2000
+
+
+class _Task:
+    __slots__ = ('name', 'interval_ms', 'callback', 'due', 'slack')
+
+    def __init__(self, name, interval_ms, callback):
+        self.name = name
+        self.interval_ms = interval_ms
+        self.callback = callback
+        self.due = 0.0
+        self.slack = 0.0
+
+
+class Scheduler:
+    """
+    统一管理所有周期任务（箴言轮换、幻灯片、动图、文件轮询）的定时器。
+
+    所有周期任务只占用一个 root.after，等待最早到期的任务；
+    周期任务的触发时间对齐到间隔的整数倍，并把即将到期的任务合并到同一次唤醒中，
+    尽量减少进程被唤醒的次数。窗口隐藏时所有任务暂停，显示后继续。
+    """
+    def __init__(self, root):
+        self.root = root
+        self.tasks = {}
+        self.paused = False
+        self.wakeups = 0
+        self.started_at = time.monotonic()
+        self._job = None
+        self._job_due = None
+
+        self.root.bind('<Unmap>', self._on_unmap, add='+')
+        self.root.bind('<Map>', self._on_map, add='+')
+
+    def add(self, name, interval_ms, callback):
+        """
+        添加（或替换同名的）周期任务。
+
+        callback 返回一个数字时，表示下一次在多少毫秒后执行（用于动图等不定间隔的任务）；
+        返回 None 时按 interval_ms 对齐执行。
+        """
+        task = _Task(name, interval_ms, callback)
+        self.tasks[name] = task
+        self._schedule_aligned(task, time.monotonic())
+        self._arm()
+
+    def add_once(self, name, delay_ms, callback, interval_ms=None):
+        """
+        添加一个 delay_ms 后首次执行的任务；之后由 callback 的返回值决定，
+        返回 None 时按 interval_ms（默认等于 delay_ms）对齐执行
+        """
+        task = _Task(name, interval_ms or delay_ms, callback)
+        self.tasks[name] = task
+        self._schedule_delay(task, time.monotonic(), delay_ms)
+        self._arm()
+
+    def cancel(self, name):
+        if self.tasks.pop(name, None) is not None:
+            self._arm()
+
+    def reschedule(self, name, interval_ms):
+        """修改任务的间隔，下一次执行时间按新间隔重新对齐"""
+        task = self.tasks.get(name)
+        if task is None:
+            return
+        task.interval_ms = interval_ms
+        self._schedule_aligned(task, time.monotonic())
+        self._arm()
+
+    def stop(self):
+        """取消所有任务（如窗口被关闭时）"""
+        self.tasks.clear()
+        self._cancel_job()
+
+    def wakeups_per_hour(self):
+        """创建以来平均每小时唤醒的次数，记录在追踪文件的 scheduler 计数器中，soak.py 结束时也会输出"""
+        hours = (time.monotonic() - self.started_at) / 3600
+        return self.wakeups / hours if hours > 0 else 0.0
+
+    def pause(self):
+        self.paused = True
+        self._cancel_job()
+
+    def resume(self):
+        self.paused = False
+        self._arm()
+
+    def _schedule_aligned(self, task, now):
+        interval = task.interval_ms / 1000
+        # 对齐到间隔的整数倍，间隔相同或成倍数的任务会在同一时刻到期
+        task.due = (math.floor(now / interval + 1e-9) + 1) * interval
+        task.slack = min(interval * COALESCE_FRACTION, MAX_SLACK_MS / 1000)
+
+    def _schedule_delay(self, task, now, delay_ms):
+        # 指定了具体延迟的任务（如动图的下一帧）不提前执行
+        task.due = now + delay_ms / 1000
+        task.slack = 0.0
+
+    def _arm(self):
+        if self.paused or not self.tasks:
+            self._cancel_job()
+            return
+        due = min(task.due for task in self.tasks.values())
+        if self._job is not None and self._job_due == due:
+            return
+        self._cancel_job()
+        delay_ms = max(int((due - time.monotonic()) * 1000), 0)
+        self._job_due = due
+        self._job = self.root.after(delay_ms, self._run)
+
+    def _cancel_job(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+            self._job_due = None
+
+    def _run(self):
+        self._job = None
+        self._job_due = None
+        self.wakeups += 1
+        if tracer.enabled:
+            tracer.counter('scheduler', wakeups=self.wakeups, wakeups_per_hour=round(self.wakeups_per_hour(), 1))
+        now = time.monotonic()
+        for task in [t for t in self.tasks.values() if t.due - t.slack <= now]:
+            try:
+                next_delay = task.callback()
+            except Exception as e:
+                print(f"定时任务 {task.name} 出错: {e}")
+                next_delay = None
+            # 回调中可能取消或替换了自己
+            if self.tasks.get(task.name) is not task:
+                continue
+            now = time.monotonic()
+            if next_delay is None:
+                # 任务可能因合并而提前执行，从原定时刻开始计算下一次，避免重复执行
+                self._schedule_aligned(task, max(now, task.due))
+            else:
+                self._schedule_delay(task, now, next_delay)
+        self._arm()
+
+    def _on_unmap(self, event):
+        if event.widget is self.root:
+            self.pause()
+
+    def _on_map(self, event):
+        if event.widget is self.root and self.paused:
+            # 暂停期间错过的触发只补执行一次
+            self.resume()
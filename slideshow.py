@@ -0,0 +1,95 @@
+import glob
+import os
+import queue
+import random
+import threading
+
+from background import POLL_INTERVAL_MS
+from image_cache import decode_for_window
+
+
+IMAGE_EXTENSIONS = {'.png', '.apng', '.jpg', '.jpeg', '.gif', '.webp', '.bmp'}
+
+# 默认预取的图片数量，内存占用只取决于这个窗口而不是文件夹大小
+DEFAULT_PREFETCH = 3
+
+
+def is_image_collection(path):
+    """image_path 指向文件夹或通配符时进入幻灯片模式"""
+    return os.path.isdir(path) or any(c in path for c in '*?[')
+
+
+def list_images(source):
+    """列出文件夹或通配符匹配到的所有图片，按文件名排序"""
+    if os.path.isdir(source):
+        with os.scandir(source) as entries:
+            paths = [entry.path for entry in entries if entry.is_file()]
+    else:
+        paths = glob.glob(source)
+    return sorted(p for p in paths if os.path.splitext(p)[1].lower() in IMAGE_EXTENSIONS)
+
+
+class Slideshow:
+    """
+    轮流显示文件夹中的图片。
+
+    后台线程按顺序解码并缩放接下来的几张图片，放入有界队列；
+    调度器到点时只从队列中取出现成的图片显示，切换图片从不阻塞界面。
+    """
+    def __init__(self, scheduler, source, window_size, on_image, interval,
+                 prefetch=DEFAULT_PREFETCH, shuffle=False, task_name='slideshow'):
+        self.scheduler = scheduler
+        self.task_name = task_name
+        self.source = source
+        self.window_size = window_size
+        self.on_image = on_image
+        self.interval_ms = interval * 1000
+        self.shuffle = shuffle
+        self._queue = queue.Queue(maxsize=max(prefetch, 1))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._prefetch, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        # 第一张图片解码完成后立即显示，之后按间隔切换
+        self.scheduler.add_once(self.task_name, POLL_INTERVAL_MS, self._tick, interval_ms=self.interval_ms)
+
+    def stop(self):
+        self._stop.set()
+        self.scheduler.cancel(self.task_name)
+
+    def _tick(self):
+        try:
+            path, image = self._queue.get_nowait()
+        except queue.Empty:
+            # 下一张还没准备好：保留当前图片，稍后再试
+            if not self._thread.is_alive():
+                self.scheduler.cancel(self.task_name)
+            return POLL_INTERVAL_MS
+        self.on_image(path, image)
+
+    def _prefetch(self):
+        while not self._stop.is_set():
+            paths = list_images(self.source)
+            if self.shuffle:
+                random.shuffle(paths)
+            decoded = 0
+            for path in paths:
+                if self._stop.is_set():
+                    return
+                try:
+                    image = decode_for_window(path, *self.window_size)
+                except Exception as e:
+                    print(f"无法加载图片: {path}: {e}")
+                    continue
+                decoded += 1
+                # 队列满时等待 Tk 线程取走图片，同时响应停止请求
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put((path, image), timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+            if decoded == 0:
+                print(f"没有可显示的图片: {self.source}")
+                return
@@ -0,0 +1,44 @@
+"""测试用的 Tk 替身"""
+import heapq
+import itertools
+import time
+
+
+class FakeRoot:
+    """
+    只实现执行器和调度器需要的 after / after_cancel / nametowidget / bind，由测试驱动事件循环。
+    与 Tk 一样，回调抛出的异常被记录下来（errors），事件循环继续运行
+    """
+    def __init__(self):
+        self.errors = []
+        self._timers = []
+        self._ids = itertools.count()
+
+    def nametowidget(self, name):
+        return self
+
+    def bind(self, sequence, func, add=None):
+        pass
+
+    def after(self, ms, callback):
+        timer_id = next(self._ids)
+        heapq.heappush(self._timers, (time.monotonic() + ms / 1000, timer_id, callback))
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self._timers = [timer for timer in self._timers if timer[1] != timer_id]
+        heapq.heapify(self._timers)
+
+    def run_until(self, condition, timeout=5):
+        end = time.monotonic() + timeout
+        while not condition() and time.monotonic() < end:
+            if not self._timers:
+                time.sleep(0.01)
+                continue
+            due, _, callback = heapq.heappop(self._timers)
+            time.sleep(max(0, due - time.monotonic()))
+            try:
+                callback()
+            except Exception as e:
+                self.errors.append(e)
+        return condition()
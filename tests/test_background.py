@@ -0,0 +1,27 @@
+import time
+
+from background import BackgroundExecutor
+from fakes import FakeRoot
+
+
+def test_a_failing_callback_does_not_stop_other_results():
+    root = FakeRoot()
+    executor = BackgroundExecutor(root)
+    delivered = []
+
+    def fail(result, error):
+        raise RuntimeError('回调出错')
+
+    def record(result, error):
+        delivered.append(result)
+
+    executor.submit(lambda: 'a', callback=fail)
+    executor.submit(lambda: 'b', callback=record)
+    # 出错之后才完成的任务也要送达，不需要再提交新任务来重新开始轮询
+    executor.submit(lambda: time.sleep(0.2) or 'c', callback=record)
+    try:
+        assert root.run_until(lambda: len(delivered) == 2)
+    finally:
+        executor.shutdown()
+    assert sorted(delivered) == ['b', 'c']
+    assert root.errors == []
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from config_store import ConfigStore, DEFAULTS
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({
+        'theme': 'darkly',
+        'instances': [{'window_x': 10}, {'window_x': 1920, 'font_size': 12}],
+    }), encoding='utf-8')
+    return ConfigStore(str(path))
+
+
+def test_instances_inherit_top_level_and_defaults(store):
+    assert store.instance_count() == 2
+    assert store.instance(1)['theme'] == 'darkly'
+    assert store.instance(1)['font_size'] == 12
+    assert store.instance(0)['font_size'] == DEFAULTS['font_size']
+
+
+def test_update_only_touches_given_fields(store):
+    changes = []
+    store.subscribe(changes.append)
+    store.update(0, {'font_size': 14})
+    store.flush()
+    assert changes == [{0: {'font_size'}}]
+    saved = json.loads(open(store.path, encoding='utf-8').read())
+    assert saved['instances'][0] == {'window_x': 10, 'font_size': 14}
+    assert saved['instances'][1] == {'window_x': 1920, 'font_size': 12}
+
+
+def test_update_rejects_invalid_values(store):
+    with pytest.raises(ValueError):
+        store.update(0, {'window_width': 'wide'})
+
+
+def test_reload_keeps_external_changes_and_ignores_own_writes(store):
+    changes = []
+    store.subscribe(changes.append, fields={'theme'})
+    store.update(1, {'font_size': 16})
+    store.flush()
+    store.reload()
+    assert changes == []
+    data = json.loads(open(store.path, encoding='utf-8').read())
+    data['theme'] = 'minty'
+    store.reload(json.dumps(data))
+    assert changes == [{0: {'theme'}, 1: {'theme'}}]
+    assert store.instance(1)['font_size'] == 16
+
+
+def test_invalid_file_falls_back_to_defaults(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text('{not json', encoding='utf-8')
+    assert ConfigStore(str(path)).instance(0) == DEFAULTS
+
+
+def test_reading_back_an_older_coalesced_write_is_not_an_external_edit(store):
+    changes = []
+    store.subscribe(changes.append)
+    store.update(0, {'font_size': 14})
+    store.flush()
+    older = open(store.path, encoding='utf-8').read()
+    store.update(0, {'font_size': 15})
+    changes.clear()
+    # 文件监视读到的还是合并前较早的一次写入
+    store.reload(older)
+    assert changes == []
+    assert store.instance(0)['font_size'] == 15
+    store.flush()
+    store.reload()
+    assert changes == [] and store.instance(0)['font_size'] == 15
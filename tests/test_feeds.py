@@ -0,0 +1,228 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+import time
+import urllib.error
+
+import pytest
+
+from fakes import FakeRoot
+from feeds import MAX_FEED_BYTES, FeedCache, FeedFetcher, fetch_feed, parse_feed, refresh_feed
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    # 路径 -> 处理函数，由各个测试设置
+    routes = {}
+
+    def do_GET(self):
+        self.routes[self.path](self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    FeedHandler.routes = {}
+    yield httpd, f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def trickle(handler):
+    """每次只发送一个字节，每个字节都在单次超时之内"""
+    body = b'["a", "b", "c", "d", "e", "f", "g", "h"]'
+    handler.send_response(200)
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    for byte in body:
+        handler.wfile.write(bytes([byte]))
+        handler.wfile.flush()
+        time.sleep(0.1)
+
+
+def test_trickling_server_hits_the_overall_deadline(server):
+    httpd, base = server
+    FeedHandler.routes['/slow'] = trickle
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        fetch_feed(base + '/slow', timeout=0.5)
+    # 每次读取最多再等一次单次超时
+    assert time.monotonic() - start < 1.5
+
+
+# ---- 内容解析、条件请求、缓存和错误处理 ----
+
+
+
+def serve(body, etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT', status=200):
+    """按 If-None-Match / If-Modified-Since 返回 304 的处理函数，记录收到的请求头"""
+    requests = []
+
+    def handler(request):
+        requests.append(dict(request.headers))
+        if status != 200:
+            request.send_error(status)
+            return
+        if etag is not None:
+            unchanged = request.headers.get('If-None-Match') == etag
+        else:
+            unchanged = request.headers.get('If-Modified-Since') == last_modified
+        if unchanged:
+            request.send_response(304)
+            request.end_headers()
+            return
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        request.send_response(200)
+        if etag is not None:
+            request.send_header('ETag', etag)
+        request.send_header('Last-Modified', last_modified)
+        request.send_header('Content-Length', str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+    handler.requests = requests
+    return handler
+
+
+def stall(handler):
+    """接受连接后迟迟不响应"""
+    time.sleep(2)
+
+
+@pytest.mark.parametrize('data, quotes', [
+    ('["a", "b"]', ['a', 'b']),
+    ('{"quotes": ["a", {"text": "b", "weight": 2}]}', ['a', {'text': 'b', 'weight': 2}]),
+    ('﻿one\n\n two \n', ['one', 'two']),
+    ('["", "a"]', ['a']),
+])
+def test_parse_feed(data, quotes):
+    assert parse_feed(data.encode('utf-8')) == quotes
+
+
+def test_parse_feed_rejects_non_list_json():
+    with pytest.raises(ValueError):
+        parse_feed(b'{"quotes": "not a list"}')
+
+
+def test_conditional_request_with_etag(server):
+    httpd, base = server
+    handler = FeedHandler.routes['/feed'] = serve('["a", "b"]')
+    quotes, etag, last_modified = fetch_feed(base + '/feed')
+    assert quotes == ['a', 'b'] and etag == '"v1"'
+    assert fetch_feed(base + '/feed', etag, last_modified) == (None, etag, last_modified)
+    assert handler.requests[1]['If-None-Match'] == '"v1"'
+
+
+def test_conditional_request_with_last_modified(server):
+    httpd, base = server
+    FeedHandler.routes['/feed'] = serve('["a"]', etag=None)
+    quotes, etag, last_modified = fetch_feed(base + '/feed')
+    assert quotes == ['a'] and etag is None
+    assert fetch_feed(base + '/feed', None, last_modified)[0] is None
+
+
+def test_refresh_caches_and_skips_unchanged(server, tmp_path):
+    httpd, base = server
+    handler = FeedHandler.routes['/feed'] = serve('["a"]')
+    cache = FeedCache(str(tmp_path))
+    url = base + '/feed'
+    assert refresh_feed(url, cache) == ['a']
+    assert cache.load(url)['quotes'] == ['a']
+    assert refresh_feed(url, cache) is None
+    assert len(handler.requests) == 2
+
+
+def test_failing_server_keeps_the_cache(server, tmp_path):
+    httpd, base = server
+    cache = FeedCache(str(tmp_path))
+    url = base + '/feed'
+    cache.save(url, {'etag': None, 'last_modified': None, 'quotes': ['cached']})
+    FeedHandler.routes['/feed'] = serve('', status=500)
+    with pytest.raises(urllib.error.HTTPError):
+        refresh_feed(url, cache)
+    assert cache.load(url)['quotes'] == ['cached']
+
+
+def test_stalled_server_times_out(server):
+    httpd, base = server
+    FeedHandler.routes['/stall'] = stall
+    start = time.monotonic()
+    with pytest.raises((TimeoutError, urllib.error.URLError)):
+        fetch_feed(base + '/stall', timeout=0.3)
+    assert time.monotonic() - start < 1.5
+
+
+def test_oversized_feed_is_rejected(server):
+    httpd, base = server
+    FeedHandler.routes['/big'] = serve(b'x' * (MAX_FEED_BYTES + 1))
+    with pytest.raises(ValueError):
+        fetch_feed(base + '/big')
+
+
+def test_file_feed_uses_modification_signature(tmp_path):
+    path = tmp_path / 'quotes.txt'
+    path.write_text('a\nb\n', encoding='utf-8')
+    url = path.as_uri()
+    quotes, _, signature = fetch_feed(url)
+    assert quotes == ['a', 'b']
+    assert fetch_feed(url, None, signature)[0] is None
+
+
+def test_cache_ignores_entries_for_other_urls(tmp_path):
+    cache = FeedCache(str(tmp_path))
+    cache.save('http://a/', {'quotes': ['a']})
+    # 把 a 的缓存文件冒充 b 的：地址不一致时视为没有缓存
+    os.replace(cache.path_for('http://a/'), cache.path_for('http://b/'))
+    assert cache.load('http://b/') is None
+
+
+# ---- FeedFetcher：在 Tk 线程外拉取，每个箴言源完成后立即交给箴言库 ----
+
+
+class FakeScheduler:
+    def __init__(self, root):
+        self.root = root
+        self.tasks = {}
+
+    def add(self, name, interval_ms, callback):
+        self.tasks[name] = callback
+
+    def cancel(self, name):
+        self.tasks.pop(name, None)
+
+
+class RecordingStore:
+    def __init__(self):
+        self.sources = {}
+
+    def set_source(self, name, quotes):
+        self.sources[name] = quotes
+
+
+def test_fetcher_uses_cache_first_and_isolates_failures(server, tmp_path):
+    httpd, base = server
+    FeedHandler.routes['/good'] = serve('["fresh"]')
+    FeedHandler.routes['/bad'] = serve('', status=500)
+    FeedHandler.routes['/slow'] = trickle
+    good, bad, slow = base + '/good', base + '/bad', base + '/slow'
+    cache = FeedCache(str(tmp_path))
+    cache.save(good, {'quotes': ['cached']})
+    root = FakeRoot()
+    store = RecordingStore()
+    fetcher = FeedFetcher(FakeScheduler(root), store, [slow, bad, good], cache=cache)
+
+    start = time.monotonic()
+    fetcher.start()
+    # start 只读取缓存，不等待网络
+    assert time.monotonic() - start < 0.5
+    assert store.sources == {good: ['cached']}
+
+    # 慢的和失败的箴言源不影响其他箴言源
+    assert root.run_until(lambda: store.sources.get(good) == ['fresh'])
+    assert bad not in store.sources
+    fetcher.stop()
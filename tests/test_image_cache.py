@@ -0,0 +1,95 @@
+from PIL import Image
+
+import image_cache
+from image_cache import (
+    ImageCache, PackedFrame, decode_frames, image_nbytes, resize_high_quality, unpack_frame
+)
+from thumbnail_cache import ThumbnailStore
+
+
+def make_image(tmp_path, size=(1600, 1200)):
+    path = str(tmp_path / 'big.png')
+    Image.new('RGB', size, 'orange').save(path)
+    return path
+
+
+def test_preview_without_decode_only_uses_what_is_in_memory(tmp_path):
+    path = make_image(tmp_path)
+    cache = ImageCache()
+    assert cache.load_preview(path, 230, 200, decode=False) == (None, False)
+    image, final = cache.load_preview(path, 230, 200)
+    assert not final and image.width <= 230
+    # 图像金字塔已在内存中，调整窗口大小时不必再解码
+    image, final = cache.load_preview(path, 300, 300, decode=False)
+    assert image is not None and not final
+    cache.load(path, 230, 200)
+    image, final = cache.load_preview(path, 230, 200, decode=False)
+    assert final
+
+
+def test_put_caches_an_image_resized_elsewhere(tmp_path):
+    path = make_image(tmp_path)
+    cache = ImageCache()
+    cache.put(path, 230, 200, resize_high_quality(path, 230, 200))
+    assert cache.load_preview(path, 230, 200, decode=False)[1]
+    assert cache.load(path, 230, 200).size == (186, 140)
+    assert cache.misses == 0
+
+
+def test_memory_budget_mode_reloads_from_the_thumbnail(tmp_path, monkeypatch):
+    path = make_image(tmp_path)
+    cache = ImageCache()
+    directory = tmp_path / 'thumbnails'
+    directory.mkdir()
+    cache.thumbnails = ThumbnailStore(str(directory))
+    cache.set_budget(0, keep_last=False)
+    size = cache.load(path, 230, 200).size
+    assert cache.misses == 1
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError('源图片不应再被打开')
+
+    monkeypatch.setattr(image_cache.Image, 'open', no_decode)
+    # 内存中已没有这张图片，直接读取磁盘缩略图
+    image, final = cache.load_preview(path, 230, 200, decode=False)
+    assert final and image.size == size
+    assert cache.load(path, 230, 200).size == size
+    assert cache.misses == 1
+
+
+def test_load_animation_is_none_for_static_or_missing_images(tmp_path):
+    cache = ImageCache()
+    assert cache.load_animation(make_image(tmp_path), 230, 200) is None
+    assert cache.load_animation(str(tmp_path / 'missing.gif'), 230, 200) is None
+    path = str(tmp_path / 'blink.gif')
+    frames = [Image.new('RGB', (40, 40), color) for color in ('red', 'blue')]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=50, loop=0)
+    frames = cache.load_animation(path, 230, 200)
+    assert [duration for _, duration in frames] == [50, 50]
+
+
+def make_gif(tmp_path, count=6, size=(40, 40)):
+    path = str(tmp_path / 'long.gif')
+    frames = [Image.new('RGB', size, (i * 40, 0, 0)) for i in range(count)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=50, loop=0)
+    return path
+
+
+def test_long_animations_keep_packed_frames(tmp_path):
+    path = make_gif(tmp_path)
+    frames = decode_frames(path, (40, 40), max_bytes=40 * 40 * 4 * 2)
+    assert len(frames) == 6
+    assert all(isinstance(frame, PackedFrame) for frame, _ in frames)
+    assert image_nbytes(frames) < 6 * 40 * 40 * 4
+    assert unpack_frame(frames[3][0]).getpixel((0, 0)) == (120, 0, 0, 255)
+    # 不超过预算时保留解码后的图片
+    frames = decode_frames(path, (40, 40))
+    assert not any(isinstance(frame, PackedFrame) for frame, _ in frames)
+
+
+def test_packed_frames_are_truncated_past_the_hard_cap(tmp_path, monkeypatch):
+    path = make_gif(tmp_path)
+    one_frame = len(PackedFrame(Image.new('RGBA', (40, 40))).data)
+    monkeypatch.setattr(image_cache, 'MAX_PACKED_FRAME_BYTES', one_frame * 3)
+    frames = decode_frames(path, (40, 40), max_bytes=0)
+    assert 1 <= len(frames) <= 3
@@ -0,0 +1,19 @@
+import os
+
+from instances import SHARED_KEYS, instance_config, update_instance
+
+
+def test_shared_keys_stay_at_the_top_level():
+    data = {'theme': 'minty', 'instances': [{'theme': 'darkly', 'font_size': 12}, {}]}
+    assert instance_config(data, 0) == {'theme': 'minty', 'font_size': 12}
+    update_instance(data, 1, {'theme': 'darkly', 'font_size': 14})
+    assert data['theme'] == 'darkly'
+    assert data['instances'][1] == {'font_size': 14}
+
+
+def test_readme_lists_every_shared_key():
+    readme = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'README.md')
+    with open(readme, encoding='utf-8') as f:
+        text = f.read()
+    section = next(line for line in text.splitlines() if '`instances`' in line)
+    assert all(f'`{key}`' in section for key in SHARED_KEYS)
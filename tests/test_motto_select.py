@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from motto_select import MottoPicker
+from motto_store import ListMottoStore
+
+
+def back_to_back_repeats(quotes, picks=20000, no_repeat=1, seed=1):
+    picker = MottoPicker(ListMottoStore(quotes), no_repeat=no_repeat, rng=random.Random(seed))
+    previous = None
+    repeats = 0
+    for _ in range(picks):
+        text = picker.next()
+        repeats += text == previous
+        previous = text
+    return repeats
+
+
+@pytest.mark.parametrize('quotes', [
+    ['a', 'b'],
+    [{'text': 'a', 'weight': 3}, 'b', 'c'],
+    [{'text': 'a', 'weight': 20}, 'b'],
+    [{'text': 'a', 'weight': 1000}, 'b', 'c', 'd'],
+])
+def test_no_back_to_back_repeats(quotes):
+    assert back_to_back_repeats(quotes) == 0
+
+
+def test_no_repeat_window_with_skewed_weights():
+    quotes = [{'text': 'a', 'weight': 50}, {'text': 'b', 'weight': 50}, 'c', 'd']
+    picker = MottoPicker(ListMottoStore(quotes), no_repeat=2, rng=random.Random(2))
+    history = [picker.next() for _ in range(5000)]
+    for i in range(2, len(history)):
+        assert history[i] not in history[i - 2:i]
+
+
+def test_skewed_weights_keep_their_ratio_among_eligible():
+    # 'a' 最近刚显示过时只能在 b、c 中按 2:1 抽取
+    quotes = [{'text': 'a', 'weight': 100}, {'text': 'b', 'weight': 2}, 'c']
+    picker = MottoPicker(ListMottoStore(quotes), no_repeat=1, rng=random.Random(3))
+    counts = {'b': 0, 'c': 0}
+    previous = None
+    for _ in range(30000):
+        text = picker.next()
+        if previous == 'a':
+            counts[text] += 1
+        previous = text
+    assert 1.7 < counts['b'] / counts['c'] < 2.3
+
+
+def test_single_candidate_may_repeat():
+    picker = MottoPicker(ListMottoStore(['only']), no_repeat=3, rng=random.Random(4))
+    assert [picker.next() for _ in range(3)] == ['only'] * 3
+
+
+def test_shuffle_shows_every_quote_once_per_round():
+    quotes = [f'q{i}' for i in range(50)]
+    picker = MottoPicker(ListMottoStore(quotes), mode='shuffle', rng=random.Random(5))
+    assert sorted(picker.next() for _ in range(50)) == sorted(quotes)
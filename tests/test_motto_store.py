@@ -0,0 +1,57 @@
+import json
+import os
+
+from motto_store import (
+    LineMottoStore, ListMottoStore, open_motto_store, read_motto_file, write_motto_file, write_motto_temp
+)
+
+
+ITEMS = ['plain', '"quoted" start', 'two\nlines', {'text': 'weighted', 'weight': 3}]
+
+
+def test_json_roundtrip_keeps_other_fields(tmp_path):
+    path = str(tmp_path / 'mottos.json')
+    write_motto_file(path, ITEMS, {'feeds': ['file:///x.txt']})
+    items, extra = read_motto_file(path)
+    assert items == ITEMS
+    assert extra == {'feeds': ['file:///x.txt']}
+    assert isinstance(open_motto_store(path), ListMottoStore)
+
+
+def test_line_roundtrip(tmp_path):
+    path = str(tmp_path / 'mottos.jsonl')
+    write_motto_file(path, ITEMS)
+    items, _ = read_motto_file(path)
+    assert items == ITEMS
+    store = open_motto_store(path)
+    try:
+        assert isinstance(store, LineMottoStore) and store.holds_file
+        assert [store.get(i) for i in range(len(store))] == ['plain', '"quoted" start', 'two\nlines', 'weighted']
+    finally:
+        store.close()
+
+
+def test_temp_file_replaces_a_closed_line_store(tmp_path):
+    path = str(tmp_path / 'mottos.txt')
+    write_motto_file(path, ['old'])
+    store = LineMottoStore(path)
+    temp_path = write_motto_temp(path, ['new one', 'new two'])
+    assert open(path, encoding='utf-8').read() == 'old\n'
+    # 与 SunshineApp.replace_motto_file 的顺序相同：先关闭映射，再替换，再重新打开
+    store.close()
+    os.replace(temp_path, path)
+    store = LineMottoStore(path)
+    try:
+        assert [store.get(i) for i in range(len(store))] == ['new one', 'new two']
+    finally:
+        store.close()
+
+
+def test_line_store_skips_blank_lines(tmp_path):
+    path = tmp_path / 'mottos.txt'
+    path.write_text('a\n\n  \nb\n' + json.dumps({'text': 'c'}) + '\n', encoding='utf-8')
+    store = LineMottoStore(str(path))
+    try:
+        assert [store.get(i) for i in range(len(store))] == ['a', 'b', 'c']
+    finally:
+        store.close()
@@ -0,0 +1,32 @@
+from PIL import ImageFont
+import pytest
+
+from config_store import DEFAULTS
+from render import CardRenderer, supports_cjk, OUTER_PADDING
+from text_fit import MOTTO_FIT_WIDTH
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    config = dict(DEFAULTS, image_path=str(tmp_path / 'missing.png'), auto_fit_font=True)
+    return CardRenderer(config, buttons=False)
+
+
+def test_auto_fit_uses_the_widget_text_width(renderer):
+    assert renderer.fitter.max_width == MOTTO_FIT_WIDTH
+
+
+def test_card_has_the_widget_size(renderer):
+    card = renderer.render('今天也要加油 keep going')
+    assert card.size == (
+        DEFAULTS['window_width'] + 2 * OUTER_PADDING,
+        DEFAULTS['window_height'] + 2 * OUTER_PADDING
+    )
+
+
+def test_supports_cjk_detects_latin_only_fonts():
+    try:
+        font = ImageFont.truetype('DejaVuSans.ttf', 14)
+    except OSError:
+        pytest.skip('DejaVuSans.ttf is not installed')
+    assert not supports_cjk(font)
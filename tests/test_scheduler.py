@@ -0,0 +1,19 @@
+from fakes import FakeRoot
+from scheduler import Scheduler
+from tracing import tracer
+
+
+def test_wakeups_are_reported_as_a_trace_counter(monkeypatch):
+    monkeypatch.setattr(tracer, 'enabled', True)
+    root = FakeRoot()
+    scheduler = Scheduler(root)
+    runs = []
+    # 间隔相同的两个任务合并到同一次唤醒中
+    scheduler.add('a', 50, lambda: runs.append('a'))
+    scheduler.add('b', 50, lambda: runs.append('b'))
+    assert root.run_until(lambda: len(runs) >= 4)
+    scheduler.stop()
+    assert scheduler.wakeups == 2
+    counters = [event for event in tracer.events if event['name'] == 'scheduler']
+    assert counters[-1]['args']['wakeups'] == 2
+    assert counters[-1]['args']['wakeups_per_hour'] > 0
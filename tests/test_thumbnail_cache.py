@@ -0,0 +1,45 @@
+import os
+import time
+
+from PIL import Image
+
+from thumbnail_cache import STALE_TEMP_S, THUMBNAIL_HEADER, ThumbnailStore
+
+
+def make_store(tmp_path, max_bytes):
+    source = tmp_path / 'sun.png'
+    Image.new('RGB', (8, 8)).save(source)
+    directory = tmp_path / 'thumbnails'
+    directory.mkdir()
+    return ThumbnailStore(str(directory), max_bytes), str(source), os.stat(source)
+
+
+def test_overwriting_a_thumbnail_does_not_grow_the_total(tmp_path):
+    image = Image.new('RGB', (10, 10))
+    size = THUMBNAIL_HEADER.size + len(image.tobytes())
+    store, source, stat = make_store(tmp_path, 3 * size)
+    store.save(source, stat, (230, 200), image)
+    store.save(source, stat, (300, 300), image)
+    evictions = []
+    evict = store._evict
+    store._evict = lambda: evictions.append(1) or evict()
+    for _ in range(3):
+        store.save(source, stat, (230, 200), image)
+    # 总大小没有超出上限，不需要扫描目录
+    assert store._total_bytes == 2 * size
+    assert evictions == []
+
+
+def test_eviction_only_removes_stale_temp_files(tmp_path):
+    image = Image.new('RGB', (10, 10))
+    store, source, stat = make_store(tmp_path, 1)
+    writing = os.path.join(store.directory, 'a.thumb.1.2.tmp')
+    stale = os.path.join(store.directory, 'b.thumb.3.4.tmp')
+    for path in (writing, stale):
+        with open(path, 'wb') as f:
+            f.write(b'x' * 100)
+    old = time.time() - STALE_TEMP_S - 60
+    os.utime(stale, (old, old))
+    store.save(source, stat, (230, 200), image)
+    assert os.path.exists(writing)
+    assert not os.path.exists(stale)
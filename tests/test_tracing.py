@@ -0,0 +1,76 @@
+from collections import deque
+import json
+import threading
+import time
+
+from tracing import MAX_EVENTS, Tracer
+
+
+def test_flush_while_worker_threads_record(tmp_path):
+    tracer = Tracer()
+    tracer.enabled = True
+    tracer.path = str(tmp_path / 'trace.json')
+    # 缓冲区小一些，写出快，复制与追加交错的机会更多
+    tracer.events = deque(maxlen=1000)
+    stop = threading.Event()
+
+    def work():
+        while not stop.is_set():
+            start = time.perf_counter()
+            tracer.record('work', start, time.perf_counter())
+            tracer.counter('queue', depth=1)
+            time.sleep(0)
+
+    threads = [threading.Thread(target=work) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        # 写出时复制事件列表不能因为工作线程追加而失败
+        for _ in range(20):
+            tracer.flush()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    tracer.flush(wait=True)
+    with open(tracer.path, encoding='utf-8') as f:
+        events = json.load(f)['traceEvents']
+    assert events and all(event['name'] in ('work', 'queue') for event in events)
+
+
+def test_flush_with_full_buffer_does_not_block(tmp_path):
+    tracer = Tracer()
+    tracer.enabled = True
+    tracer.path = str(tmp_path / 'trace.json')
+    start = time.perf_counter()
+    for _ in range(MAX_EVENTS):
+        tracer.record('work', start, start, {'detail': 'x' * 32})
+    assert len(tracer.events) == MAX_EVENTS
+
+    # 让后台写出停在半路，写出期间 flush 仍然立即返回
+    writing = threading.Event()
+    release = threading.Event()
+    write = tracer._write
+
+    def slow_write(snapshot):
+        writing.set()
+        release.wait(5)
+        write(snapshot)
+
+    tracer._write = slow_write
+    try:
+        tracer.flush()
+        assert writing.wait(5)
+        start = time.perf_counter()
+        tracer.flush()
+        tracer.record('after', start, start)
+        assert time.perf_counter() - start < 0.2
+    finally:
+        release.set()
+
+    tracer._write = write
+    tracer.flush(wait=True)
+    with open(tracer.path, encoding='utf-8') as f:
+        events = json.load(f)['traceEvents']
+    assert len(events) == MAX_EVENTS and events[-1]['name'] == 'after'
@@ -0,0 +1,48 @@
+from window_drag import WindowDragger
+
+
+class DesktopRoot:
+    """主显示器 1920x1080，左边还有一个 1280x1024 的显示器"""
+    def winfo_vrootx(self):
+        return -1280
+
+    def winfo_vrooty(self):
+        return 0
+
+    def winfo_vrootwidth(self):
+        return 3200
+
+    def winfo_vrootheight(self):
+        return 1080
+
+    def winfo_screenwidth(self):
+        return 1920
+
+    def winfo_screenheight(self):
+        return 1080
+
+    def winfo_width(self):
+        return 250
+
+    def winfo_height(self):
+        return 310
+
+    def winfo_x(self):
+        return 100
+
+    def winfo_y(self):
+        return 100
+
+
+class Event:
+    x_root = y_root = 0
+
+
+def test_snaps_to_the_virtual_desktop_edges():
+    dragger = WindowDragger(DesktopRoot())
+    dragger.on_press(Event())
+    # 主显示器的左边缘不是桌面边缘，不吸附
+    assert dragger.snap(5, 300) == (5, 300)
+    assert dragger.snap(-1275, 300) == (-1280, 300)
+    assert dragger.snap(1920 - 250 + 8, 1080 - 310 - 8) == (1920 - 250, 1080 - 310)
+
@@ -0,0 +1,167 @@
+from collections import OrderedDict
+import re
+import tkinter.font as tkfont
+
+
+# 箴言区域的字体、尺寸和固定字号时的换行宽度，窗口（Sunshine.py）和无界面渲染（render.py）共用
+MOTTO_FONT = "微软雅黑"
+MOTTO_WIDTH = 230
+MOTTO_HEIGHT = 75
+MOTTO_WRAPLENGTH = 200
+
+# 自适应字号时文字可用的宽度：箴言区域左右各留 10px
+MOTTO_FIT_WIDTH = MOTTO_WIDTH - 20
+
+# 自动适应时可选的字体大小范围
+MIN_FONT_SIZE = 6
+MAX_FONT_SIZE = 20
+
+# 缓存上限：单词/字符宽度缓存，以及每条箴言的排版结果缓存
+MAX_MEASURE_CACHE = 50000
+MAX_LAYOUT_CACHE = 4096
+
+# 中日韩字符之间可以任意换行，其他文字按空白分词
+_CJK = '\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef'
+_TOKEN_PATTERN = re.compile(rf'[{_CJK}]|[^\s{_CJK}]+|\s+')
+
+
+class TextFitter:
+    """
+    为每条箴言选择能放进固定区域的最大字号和换行宽度。
+
+    单词和字符的宽度按 (文本, 字体, 字号) 缓存，每条箴言的排版结果也会缓存，
+    轮换箴言时通常只需查表，不再调用 Font.measure。
+    """
+    def __init__(self, root, family, max_width, max_height,
+                 min_size=MIN_FONT_SIZE, max_size=MAX_FONT_SIZE,
+                 max_layouts=MAX_LAYOUT_CACHE, max_measures=MAX_MEASURE_CACHE):
+        self.root = root
+        self.family = family
+        self.max_width = max_width
+        self.max_height = max_height
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_layouts = max_layouts
+        self.max_measures = max_measures
+        self._fonts = {}
+        self._linespace = {}
+        self._widths = {}
+        self._layouts = OrderedDict()
+
+    def fit(self, text):
+        """返回 (字号, 换行宽度)"""
+        key = (text, self.family, self.max_width, self.max_height)
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self._layouts.move_to_end(key)
+            return layout
+
+        tokens = _TOKEN_PATTERN.findall(text)
+        # 行数随字号单调增加，二分查找能放下的最大字号
+        low, high = self.min_size, self.max_size
+        best = (self.min_size, self.max_width)
+        while low <= high:
+            size = (low + high) // 2
+            lines, widest = self._wrap(tokens, size)
+            if lines * self._line_height(size) <= self.max_height:
+                # 留出 2px 余量，保证 Label 按同样的位置换行
+                best = (size, min(widest + 2, self.max_width))
+                low = size + 1
+            else:
+                high = size - 1
+
+        self._layouts[key] = best
+        if len(self._layouts) > self.max_layouts:
+            self._layouts.popitem(last=False)
+        return best
+
+    def precompute(self, texts, batch=20):
+        """在空闲时分批计算一组箴言的排版，避免阻塞界面"""
+        iterator = iter(texts)
+
+        def step():
+            for _ in range(batch):
+                text = next(iterator, None)
+                if text is None:
+                    return
+                self.fit(text)
+            self.root.after_idle(step)
+
+        self.root.after_idle(step)
+
+    def wrap_lines(self, text, size, width=None):
+        """按与 _wrap 相同的规则换行，返回每一行的文本（用于无界面渲染）"""
+        width = width or self.max_width
+        lines = []
+        line = ''
+        line_width = 0
+        for token in _TOKEN_PATTERN.findall(text):
+            if token.isspace():
+                if '\n' in token:
+                    lines.append(line)
+                    lines.extend([''] * (token.count('\n') - 1))
+                    line = ''
+                    line_width = 0
+                elif line_width:
+                    line += ' '
+                    line_width += self._measure(' ', size)
+                continue
+            token_width = self._measure(token, size)
+            if line_width and line_width + token_width > width:
+                lines.append(line.rstrip())
+                line = ''
+                line_width = 0
+            line += token
+            line_width += token_width
+        lines.append(line.rstrip())
+        return lines
+
+    def _font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = tkfont.Font(self.root, family=self.family, size=size)
+            self._fonts[size] = font
+        return font
+
+    def _line_height(self, size):
+        height = self._linespace.get(size)
+        if height is None:
+            height = self._font(size).metrics('linespace')
+            self._linespace[size] = height
+        return height
+
+    def _measure(self, token, size):
+        key = (token, self.family, size)
+        width = self._widths.get(key)
+        if width is None:
+            if len(self._widths) > self.max_measures:
+                self._widths.clear()
+            width = self._font(size).measure(token)
+            self._widths[key] = width
+        return width
+
+    def _wrap(self, tokens, size):
+        """模拟 Label 的换行，返回 (行数, 最宽一行的宽度)"""
+        lines = 1
+        line_width = 0
+        widest = 0
+        for token in tokens:
+            if token.isspace():
+                if '\n' in token:
+                    lines += token.count('\n')
+                    widest = max(widest, line_width)
+                    line_width = 0
+                elif line_width:
+                    line_width += self._measure(' ', size)
+                continue
+            width = self._measure(token, size)
+            if line_width and line_width + width > self.max_width:
+                widest = max(widest, line_width)
+                lines += 1
+                line_width = 0
+            if width > self.max_width:
+                # 单词本身比一行还宽，会被强制断开
+                lines += width // self.max_width
+                width = width % self.max_width
+            line_width += width
+        return lines, max(widest, line_width, 1)
@@ -0,0 +1,95 @@
+"""
+主题样式的缓存与预构建。
+
+ttkbootstrap 第一次使用某个主题时要从头生成所有样式和图片元素，在设置窗口中滚动主题列表会明显卡顿；
+之后再切换到这个主题只需应用已有的样式。打开设置窗口后，ThemeManager 在空闲时逐个构建其余主题
+（切换过去再立即切换回来，同一个回调中完成，界面不会闪烁），预览任意主题时都只是切换。
+所有主题切换都经过 use，主题没有变化时不重复调用 theme_use。
+"""
+from collections import deque
+import time
+
+import ttkbootstrap as ttk
+
+from tracing import span
+
+
+# 两次预构建之间的间隔（毫秒），期间处理输入和绘制
+PREWARM_INTERVAL_MS = 50
+
+
+class ThemeManager:
+    def __init__(self, root, theme, prewarm=True):
+        self.root = root
+        self.current = theme
+        # 为 False 时不预构建（省内存模式），主题在第一次使用时构建
+        self.prewarm_enabled = prewarm
+        # 已构建的主题 -> 构建耗时（毫秒）；启动时的主题由 ttk.Window 构建，耗时未知
+        self.build_ms = {theme: None}
+        self._queue = deque()
+        self._owner = None
+        self._job = None
+
+    def is_built(self, theme):
+        return theme in self.build_ms
+
+    def use(self, theme):
+        """切换主题，与当前主题相同时什么也不做；返回是否切换了"""
+        if theme == self.current:
+            return False
+        built = theme in self.build_ms
+        start = time.perf_counter()
+        with span('theme_use', theme=theme, cached=built):
+            ttk.Style().theme_use(theme)
+        if not built:
+            self.build_ms[theme] = (time.perf_counter() - start) * 1000
+        self.current = theme
+        return True
+
+    def build(self, theme):
+        """构建一个主题但不改变当前主题，返回构建耗时（毫秒）；已构建时返回 None"""
+        if theme in self.build_ms:
+            return None
+        style = ttk.Style()
+        with span('theme.build', theme=theme):
+            start = time.perf_counter()
+            style.theme_use(theme)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # 同一个回调中切换回来，中间不会重绘
+            style.theme_use(self.current)
+        self.build_ms[theme] = elapsed_ms
+        return elapsed_ms
+
+    def prewarm(self, themes, owner=None):
+        """
+        在空闲时逐个构建 themes 中尚未构建的主题，每次只构建一个；
+        owner（如设置窗口）被关闭后停止
+        """
+        if not self.prewarm_enabled:
+            return
+        self._owner = owner
+        self._queue = deque(theme for theme in themes if theme not in self.build_ms)
+        if self._queue and self._job is None:
+            self._job = self.root.after(PREWARM_INTERVAL_MS, self._prewarm_step)
+
+    def stop(self):
+        self._queue.clear()
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _prewarm_step(self):
+        self._job = None
+        if self._owner is not None and not self._owner.winfo_exists():
+            self._queue.clear()
+            return
+        while self._queue:
+            if self.build(self._queue.popleft()) is not None:
+                break
+        if self._queue:
+            self._job = self.root.after(PREWARM_INTERVAL_MS, self._prewarm_step)
+
+    def report(self):
+        """各主题的构建耗时，从慢到快：[(主题, 毫秒), ...]"""
+        costs = [(theme, ms) for theme, ms in self.build_ms.items() if ms is not None]
+        return sorted(costs, key=lambda item: item[1], reverse=True)
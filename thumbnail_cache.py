@@ -0,0 +1,133 @@
+import hashlib
+import os
+import struct
+import threading
+import time
+
+from PIL import Image
+
+from paths import user_cache_dir
+
+
+# 磁盘缩略图缓存的默认上限
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 文件头：魔数 + 宽 + 高 + 颜色模式，之后是未压缩的像素
+THUMBNAIL_MAGIC = b'SUNTHMB1'
+THUMBNAIL_HEADER = struct.Struct('=8sII4s')
+
+# 直接保存像素的颜色模式，其他模式先转换为 RGBA
+RAW_MODES = ('RGB', 'RGBA', 'L', 'LA')
+
+# 超过这个时间（秒）的临时文件视为写入中途退出的进程留下的，淘汰时删除
+STALE_TEMP_S = 3600
+
+
+class ThumbnailStore:
+    """
+    保存在用户缓存目录中的缩略图，重启后无需再解码原图。
+
+    缓存键为 (源文件路径, 修改时间, 文件大小, 窗口尺寸)，源文件被替换或窗口大小改变后自动失效；
+    命中时不需要打开原图，只读取缩放好的像素。
+    多个小太阳同时启动时可能同时写入同一张缩略图：先写临时文件再原子替换，读到的总是完整的文件。
+    总大小超过 max_bytes 时删除最久未使用的文件（命中时更新文件的修改时间）。
+    """
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or user_cache_dir('thumbnails')
+        self.max_bytes = max_bytes
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+    def path_for(self, path, stat, window_size, variant):
+        key = f'{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{window_size}|{variant}'
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.thumb')
+
+    def load(self, path, stat, window_size, variant=''):
+        """返回缓存的缩略图，没有缓存时返回 None"""
+        thumbnail_path = self.path_for(path, stat, window_size, variant)
+        try:
+            with open(thumbnail_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < THUMBNAIL_HEADER.size:
+            return None
+        magic, width, height, mode = THUMBNAIL_HEADER.unpack_from(data)
+        mode = mode.rstrip(b'\0').decode('ascii')
+        if magic != THUMBNAIL_MAGIC or mode not in RAW_MODES:
+            return None
+        try:
+            image = Image.frombytes(mode, (width, height), data[THUMBNAIL_HEADER.size:])
+        except ValueError:
+            return None
+        try:
+            os.utime(thumbnail_path)
+        except OSError:
+            pass
+        return image
+
+    def save(self, path, stat, window_size, image, variant=''):
+        if self.max_bytes <= 0:
+            return
+        if image.mode not in RAW_MODES:
+            image = image.convert('RGBA')
+        header = THUMBNAIL_HEADER.pack(
+            THUMBNAIL_MAGIC, image.width, image.height, image.mode.encode('ascii')
+        )
+        data = header + image.tobytes()
+        thumbnail_path = self.path_for(path, stat, window_size, variant)
+        temp_path = f'{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            # 覆盖已有的缩略图时，总大小只增加两者之差
+            old_size = os.stat(thumbnail_path).st_size
+        except OSError:
+            old_size = 0
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, thumbnail_path)
+        except OSError as e:
+            print(f"无法保存缩略图: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(data) - old_size
+            if self._total_bytes is None or self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # 其他进程也会写入这个目录，淘汰时重新统计实际占用；
+        # 只淘汰写完的缩略图，临时文件可能正被其他进程写入，只删除早已过时的
+        entries = []
+        stale_before = time.time() - STALE_TEMP_S
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if entry.name.endswith('.tmp'):
+                if stat.st_mtime < stale_before:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                continue
+            if entry.name.endswith('.thumb'):
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # 其他进程可能已删除，或在 Windows 上正在读取
+                continue
+            total -= size
+        self._total_bytes = total
@@ -0,0 +1,203 @@
+"""
+可选的性能追踪：记录热点路径的耗时和 Tk 事件循环的延迟。
+
+通过 `python Sunshine.py --trace trace.json`（或环境变量 SUNSHINE_TRACE）开启：
+- 以 .json 结尾时输出 Chrome trace 格式，可在 chrome://tracing 或 Perfetto 中打开；
+- 其他路径输出按大小滚动的文本日志。
+未开启时 span() 几乎没有开销。
+"""
+from collections import deque
+from contextlib import contextmanager, nullcontext
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+
+# 内存中最多保留的事件数，超出后丢弃最早的事件；写出时要整体序列化，不宜过大
+MAX_EVENTS = 20000
+
+# 事件循环延迟的采样间隔，以及写出 trace 文件的间隔（毫秒）
+LAG_SAMPLE_MS = 100
+FLUSH_INTERVAL_MS = 5000
+
+# 滚动日志的单个文件大小和保留数量
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.events = deque(maxlen=MAX_EVENTS)
+        # 工作线程也会记录事件；追加和写出时的复制都在锁内进行，复制时 deque 不会被修改
+        self._lock = threading.Lock()
+        # 后台写出线程：只保留最新一份待写的快照，写文件时持有 _write_lock；
+        # 快照按 _generation 编号，较旧的快照不会覆盖已写出的较新的快照
+        self._generation = 0
+        self._written = 0
+        self._pending = None
+        self._pending_ready = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._logger = None
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def start(self, path):
+        """开始记录，进程退出时自动写出"""
+        self.enabled = True
+        self.path = path
+        if not path.endswith('.json'):
+            # 只在开启时才导入 logging，不影响正常启动速度
+            import logging
+            import logging.handlers
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._logger = logging.getLogger('sunshine.trace')
+            self._logger.setLevel(logging.INFO)
+            self._logger.addHandler(handler)
+            self._logger.propagate = False
+        atexit.register(self.flush, wait=True)
+
+    def span(self, name, **args):
+        """记录一段代码的耗时：with tracer.span('name'): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, args)
+
+    @contextmanager
+    def _span(self, name, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), args)
+
+    def record(self, name, start, end, args=None):
+        if self._logger is not None:
+            detail = f" {args}" if args else ''
+            self._logger.info(f"{name} {(end - start) * 1000:.3f}ms{detail}")
+            return
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': self._pid,
+            'tid': threading.get_ident(),
+            'args': args or {},
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def counter(self, name, **values):
+        if self._logger is not None:
+            self._logger.info(f"{name} {values}")
+            return
+        event = {
+            'name': name,
+            'ph': 'C',
+            'ts': (time.perf_counter() - self._origin) * 1e6,
+            'pid': self._pid,
+            'args': values,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def flush(self, wait=False):
+        """
+        把内存中的事件写入 Chrome trace 文件。调用方只复制一份快照，序列化和写文件在后台线程中进行，
+        不阻塞 Tk 事件循环；wait 为 True 时（进程退出前）在当前线程中写完再返回
+        """
+        if not self.enabled or self._logger is not None:
+            return
+        with self._lock:
+            events = list(self.events)
+            self._generation += 1
+            snapshot = (self._generation, events)
+        if wait:
+            self._write(snapshot)
+            return
+        with self._pending_ready:
+            # 上一份快照还没写出时直接替换，只写最新的
+            self._pending = snapshot
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name='sunshine-trace', daemon=True
+                )
+                self._writer.start()
+            self._pending_ready.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._pending_ready:
+                while self._pending is None:
+                    self._pending_ready.wait()
+                snapshot, self._pending = self._pending, None
+            try:
+                self._write(snapshot)
+            except OSError as e:
+                print(f"写出 trace 文件失败: {e}")
+
+    def _write(self, snapshot):
+        """先写临时文件再替换，避免写出一半"""
+        generation, events = snapshot
+        with self._write_lock:
+            if generation <= self._written:
+                return
+            self._written = generation
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+            os.replace(temp_path, self.path)
+
+
+def traced(name):
+    """装饰器：把整个函数记录为一个 span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class LoopLagMonitor:
+    """
+    测量 Tk 事件循环的延迟：定时器实际触发时间比预期晚多少，就说明事件循环被阻塞了多久
+    """
+    def __init__(self, root, interval_ms=LAG_SAMPLE_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._expected = None
+        self._last_flush = time.perf_counter()
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self.root.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        lag_ms = max(now - self._expected, 0) * 1000
+        tracer.counter('loop_lag', lag_ms=round(lag_ms, 3))
+        if now - self._last_flush >= FLUSH_INTERVAL_MS / 1000:
+            self._last_flush = now
+            tracer.flush()
+        self._expected = now + self.interval_ms / 1000
+        self.root.after(self.interval_ms, self._tick)
+
+
+# 全局共享的追踪器
+tracer = Tracer()
+span = tracer.span
@@ -0,0 +1,110 @@
+from tracing import span
+
+
+# 一帧的时长（毫秒），拖动时窗口每帧最多移动一次
+FRAME_MS = 16
+
+# 距离虚拟桌面边缘小于该距离时吸附到边缘（像素）
+SNAP_DISTANCE = 12
+
+
+def virtual_desktop(root):
+    """
+    所有显示器组成的虚拟桌面 (左, 上, 宽, 高)。主显示器左边或上边的显示器坐标为负数；
+    winfo_screenwidth 只是主显示器的大小
+    """
+    return (
+        root.winfo_vrootx(),
+        root.winfo_vrooty(),
+        root.winfo_vrootwidth(),
+        root.winfo_vrootheight()
+    )
+
+
+class WindowDragger:
+    """
+    拖动无边框窗口。
+
+    窗口位置保存在本地，拖动过程中不再向窗口系统查询位置；
+    鼠标移动事件只记录目标位置，每帧最多调用一次 geometry，
+    松开鼠标时吸附虚拟桌面的边缘并通过 on_release(x, y) 通知最终位置。
+    """
+    def __init__(self, root, on_release=None, snap_distance=SNAP_DISTANCE):
+        self.root = root
+        self.on_release = on_release
+        self.snap_distance = snap_distance
+        self.position = None
+        self._pending = None
+        self._job = None
+        self._press = None
+        self._bounds = None
+        self._moved = False
+
+    def bind(self, widget):
+        widget.bind('<Button-1>', self.on_press)
+        widget.bind('<B1-Motion>', self.on_motion)
+        widget.bind('<ButtonRelease-1>', self.on_release_event)
+
+    def move_to(self, x, y):
+        """移动窗口并记录位置"""
+        self.position = (x, y)
+        self.root.geometry(f'+{x}+{y}')
+
+    def on_press(self, event):
+        if self.position is None:
+            self.position = (self.root.winfo_x(), self.root.winfo_y())
+        # 虚拟桌面和窗口大小在一次拖动中不会变化，只在按下时查询一次
+        self._bounds = (
+            *virtual_desktop(self.root),
+            self.root.winfo_width(),
+            self.root.winfo_height()
+        )
+        self._press = (event.x_root, event.y_root, *self.position)
+        self._moved = False
+
+    def on_motion(self, event):
+        if self._press is None:
+            return
+        pointer_x, pointer_y, window_x, window_y = self._press
+        self._pending = (
+            window_x + event.x_root - pointer_x,
+            window_y + event.y_root - pointer_y
+        )
+        self._moved = True
+        if self._job is None:
+            self._job = self.root.after(FRAME_MS, self._flush)
+
+    def on_release_event(self, event):
+        if self._press is None:
+            return
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+        self._flush()
+        self._press = None
+        if self._moved and self.on_release is not None:
+            self.on_release(*self.position)
+
+    def _flush(self):
+        self._job = None
+        if self._pending is None:
+            return
+        with span('on_move'):
+            x, y = self.snap(*self._pending)
+            self._pending = None
+            if (x, y) != self.position:
+                self.move_to(x, y)
+
+    def snap(self, x, y):
+        """靠近虚拟桌面（所有显示器）的边缘时吸附到边缘"""
+        left, top, desktop_width, desktop_height, width, height = self._bounds
+        right = left + desktop_width
+        bottom = top + desktop_height
+        if abs(x - left) <= self.snap_distance:
+            x = left
+        elif abs(right - (x + width)) <= self.snap_distance:
+            x = right - width
+        if abs(y - top) <= self.snap_distance:
+            y = top
+        elif abs(bottom - (y + height)) <= self.snap_distance:
+            y = bottom - height
+        return x, y